@@ -0,0 +1,153 @@
+"""Admission control for outbound Nuclia calls: a concurrency cap with a bounded FIFO wait queue."""
+import asyncio
+import math
+import time
+from collections import deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import Callable
+
+from config import SEARCH_MAX_CONCURRENCY, SEARCH_MAX_QUEUE, SEARCH_QUEUE_TIMEOUT
+from tracing import span
+
+QUEUE_FULL = "queue_full"
+DEADLINE = "deadline"
+TIMEOUT = "timeout"
+
+# Absolute time.monotonic() by which the current request must be answered
+_deadline: ContextVar[float | None] = ContextVar("admission_deadline", default=None)
+
+
+class Overloaded(Exception):
+    """Raised instead of queueing a call that could not be served in time."""
+
+    def __init__(self, reason: str, retry_after: int):
+        super().__init__(f"Overloaded ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@contextmanager
+def deadline(seconds: float):
+    """Calls admitted inside the block must start within ``seconds`` from now."""
+    token = _deadline.set(time.monotonic() + seconds)
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+class AdmissionController:
+    """
+    Let at most ``max_concurrency`` calls run, queueing up to ``max_queue`` more.
+
+    Callers are shed with ``Overloaded`` instead of piling onto a struggling
+    upstream:
+    - ``queue_full`` when the wait queue is already full;
+    - ``deadline`` when the expected wait (queue position x average service
+      time / concurrency) exceeds the time left, so they fail fast instead
+      of timing out later;
+    - ``timeout`` when they waited ``max_wait`` (or until their deadline)
+      without getting a slot.
+    Slots are handed to waiters in arrival order.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = SEARCH_MAX_CONCURRENCY,
+        max_queue: int = SEARCH_MAX_QUEUE,
+        max_wait: float = SEARCH_QUEUE_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.clock = clock
+        self.in_flight = 0
+        self.admitted = 0
+        self.shed: dict[str, int] = {QUEUE_FULL: 0, DEADLINE: 0, TIMEOUT: 0}
+        # Exponentially weighted average seconds a slot is held
+        self.service_time: float | None = None
+        self._waiters: deque[asyncio.Future] = deque()
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def estimated_wait(self, position: int) -> float:
+        if not self.service_time:
+            return 0.0
+        return position * self.service_time / max(1, self.max_concurrency)
+
+    def _shed(self, reason: str) -> Overloaded:
+        self.shed[reason] += 1
+        retry_after = max(1, math.ceil(self.estimated_wait(self.queue_depth + 1)))
+        return Overloaded(reason, retry_after)
+
+    async def acquire(self) -> None:
+        if self.in_flight < self.max_concurrency and not self._waiters:
+            self.in_flight += 1
+            self.admitted += 1
+            return
+        if self.queue_depth >= self.max_queue:
+            raise self._shed(QUEUE_FULL)
+
+        timeout = self.max_wait
+        request_deadline = _deadline.get()
+        if request_deadline is not None:
+            timeout = min(timeout, request_deadline - self.clock())
+        if timeout <= 0 or self.estimated_wait(self.queue_depth + 1) > timeout:
+            raise self._shed(DEADLINE)
+
+        waiter = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        try:
+            await asyncio.wait_for(waiter, timeout)
+        except asyncio.TimeoutError:
+            self._discard(waiter)
+            raise self._shed(TIMEOUT) from None
+        except asyncio.CancelledError:
+            if waiter.done() and not waiter.cancelled():
+                # The slot was handed over just as we were cancelled
+                self.release()
+            else:
+                self._discard(waiter)
+            raise
+        self.admitted += 1
+
+    def release(self) -> None:
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                # Hand the slot straight to the next waiter
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def _discard(self, waiter: asyncio.Future) -> None:
+        try:
+            self._waiters.remove(waiter)
+        except ValueError:
+            pass
+
+    @asynccontextmanager
+    async def slot(self):
+        # Time spent waiting shows up as its own phase in Server-Timing
+        with span("queue"):
+            await self.acquire()
+        started = self.clock()
+        try:
+            yield
+        finally:
+            held = self.clock() - started
+            self.service_time = held if self.service_time is None else 0.8 * self.service_time + 0.2 * held
+            self.release()
+
+    def stats(self) -> dict[str, int | float]:
+        return {
+            "in_flight": self.in_flight,
+            "queue_depth": self.queue_depth,
+            "admitted": self.admitted,
+            "shed": sum(self.shed.values()),
+            "service_time": self.service_time or 0.0,
+        }
@@ -1,56 +1,108 @@
-from typing import List, Optional
-from fastapi import FastAPI, HTTPException, Request, status, Security, Depends
-from fastapi.responses import JSONResponse
+import asyncio
+import json
+import time
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Literal, Optional
+from fastapi import FastAPI, HTTPException, Request, Response, status, Security, Depends
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 from fastapi.security import APIKeyHeader
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 import logging
-import os
 
 from search import search_semantic, search_hybrid, search_merged
-from config import get_kb_client
+from ranking import FUSION_METHODS
+import metrics
+from metrics import LOCAL_DURATION, SEARCH_DURATION, SEARCH_ERRORS, SEARCH_IN_FLIGHT, SEARCH_REQUESTS
+from config import (
+    get_kb_client,
+    SEARCH_COMPARE_TIMEOUT,
+    SEARCH_BATCH_MAX_QUERIES,
+    SEARCH_BATCH_CONCURRENCY,
+)
+from client import init_search_client, close_search_client, is_initialized, probe_kb
+from admission import Overloaded, deadline
+from api_keys import ApiKey, KeyLimitExceeded, get_key_ring
+from health import UpstreamProbe
+from tracing import ServerTimingMiddleware, span
 
 logger = logging.getLogger(__name__)
 
-app = FastAPI()
+upstream_probe = UpstreamProbe(probe_kb)
+metrics.registry.gauge("upstream_ready", "1 when the last background KB probe succeeded.", callback=lambda: int(upstream_probe.ready))
+API_KEY_THROTTLED = metrics.registry.counter(
+    "api_key_throttled_total", "Requests rejected with 429, per API key and limit.", ["key", "reason"],
+)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Initialize the Nuclia KB client on startup and release its pool on shutdown."""
+    try:
+        get_kb_client()
+        # Load API keys up front so a malformed API_KEYS_FILE fails startup
+        get_key_ring()
+        await init_search_client()
+        upstream_probe.start()
+        logger.info("API startup complete")
+    except ValueError as e:
+        logger.error(f"Failed to initialize: {e}")
+        raise
+    yield
+    await upstream_probe.stop()
+    await close_search_client()
+    logger.info("API shutdown complete")
+
+
+class TimedJSONResponse(JSONResponse):
+    """JSONResponse whose body encoding is traced as part of serialization."""
+
+    def render(self, content: Any) -> bytes:
+        with span("serialization"):
+            return super().render(content)
+
+
+app = FastAPI(lifespan=lifespan, default_response_class=TimedJSONResponse)
+app.add_middleware(ServerTimingMiddleware)
 
 # API Key authentication (optional, for production deployment)
 API_KEY_NAME = "X-API-Key"
 api_key_header = APIKeyHeader(name=API_KEY_NAME, auto_error=False)
 
-def get_api_key(api_key: str = Security(api_key_header)) -> str:
+async def get_api_key(response: Response, api_key: str = Security(api_key_header)):
     """
-    Validate API key if API_KEY environment variable is set.
-    
-    If API_KEY is not set, authentication is disabled (for local development).
-    For production deployment, always set API_KEY environment variable.
+    Validate the API key and enforce its rate limit and concurrency cap.
+
+    Keys come from API_KEY and/or API_KEYS_FILE. If neither is set,
+    authentication is disabled (for local development). For production
+    deployment, always configure at least one key.
     """
-    required_api_key = os.getenv("API_KEY")
-    
-    # If no API_KEY is configured, allow access (local development mode)
-    if not required_api_key:
+    with span("auth"):
+        key_ring = get_key_ring()
+        client_key = key_ring.lookup(api_key) if key_ring else None
+
+        # If keys are configured, require a valid one
+        if key_ring and client_key is None:
+            logger.warning("Invalid or missing API key")
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid or missing API key"
+            )
+
+        if client_key is not None:
+            client_key.admit()
+            response.headers.update(client_key.budget_headers())
+
+    # If no keys are configured, allow access (local development mode)
+    if client_key is None:
         logger.debug("API authentication disabled - no API_KEY configured")
-        return None
-    
-    # If API_KEY is configured, require valid key
-    if not api_key or api_key != required_api_key:
-        logger.warning("Invalid or missing API key")
-        raise HTTPException(
-            status_code=status.HTTP_401_UNAUTHORIZED,
-            detail="Invalid or missing API key"
-        )
-    
-    return api_key
-
-# Initialize KB client on startup
-@app.on_event("startup")
-async def startup_event():
-    """Initialize Nuclia KB client on application startup."""
+        yield None
+        return
+
+    # Held until the response is sent, so streams count against the cap too
     try:
-        get_kb_client()
-        logger.info("API startup complete")
-    except ValueError as e:
-        logger.error(f"Failed to initialize KB client: {e}")
-        raise
+        yield client_key
+    finally:
+        client_key.release()
 
 # Generic error handler to prevent information leakage
 @app.exception_handler(Exception)
@@ -62,24 +114,277 @@ async def generic_exception_handler(request: Request, exc: Exception):
         content={"detail": "An internal error occurred"}
     )
 
+@app.exception_handler(KeyLimitExceeded)
+async def key_limit_handler(request: Request, exc: KeyLimitExceeded):
+    """One client over its budget gets a 429; other keys are unaffected."""
+    API_KEY_THROTTLED.inc(key=exc.key_name, reason=exc.reason)
+    logger.warning(f"Throttling API key {exc.key_name!r} on {request.url.path}: {exc.reason}")
+    return JSONResponse(
+        status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+        content={"detail": f"API key {exc.reason} limit exceeded, retry later"},
+        headers=exc.headers,
+    )
+
+@app.exception_handler(Overloaded)
+async def overloaded_handler(request: Request, exc: Overloaded):
+    """Shed load: tell the client when to come back instead of queueing forever."""
+    logger.warning(f"Shedding {request.url.path}: {exc.reason}")
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": "Search is overloaded, retry later"},
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+SEARCH_TYPES = ["semantic", "hybrid", "merged"]
+# Resource payload returned with each hit; see search.PROJECTIONS
+Projection = Literal["minimal", "basic", "values", "full"]
+
 class SearchQuery(BaseModel):
     query: str
     search_type: Optional[str] = "merged"
+    # Hybrid only: how semantic and fulltext rankings are fused
+    fusion: Optional[str] = None
+    semantic_weight: Optional[float] = Field(default=None, ge=0, le=1)
+    projection: Projection = "minimal"
 
 class SearchResult(BaseModel):
     text: str
     score: float
     source: str
+    # Only present when a projection other than "minimal" is requested
+    resource: Optional[Dict[str, Any]] = None
+
+class CompareQuery(BaseModel):
+    query: str
+    strategies: List[str] = SEARCH_TYPES
+    page_size: int = Field(default=5, ge=1, le=50)
+    fusion: Optional[str] = None
+    semantic_weight: Optional[float] = Field(default=None, ge=0, le=1)
+    projection: Projection = "minimal"
+    timeout: float = Field(default=SEARCH_COMPARE_TIMEOUT, gt=0, le=SEARCH_COMPARE_TIMEOUT)
+
+class BatchSearchQuery(SearchQuery):
+    page_size: int = Field(default=5, ge=1, le=50)
+
+class BatchQuery(BaseModel):
+    queries: List[BatchSearchQuery] = Field(min_length=1, max_length=SEARCH_BATCH_MAX_QUERIES)
+
+class BatchItemResult(BaseModel):
+    results: List[SearchResult] = []
+    error: Optional[str] = None
+
+class StrategyResult(BaseModel):
+    results: List[SearchResult]
+    latency_ms: float
+    error: Optional[str] = None
+
+class CompareResponse(BaseModel):
+    query: str
+    strategies: Dict[str, StrategyResult]
+    latency_ms: float
 
-@app.post("/search", response_model=List[SearchResult])
-async def search(query: SearchQuery, api_key: str = Depends(get_api_key)):
-    if query.search_type == "semantic":
-        results = await search_semantic(query.query)
-    elif query.search_type == "hybrid":
-        results = await search_hybrid(query.query)
-    elif query.search_type == "merged":
-        results = await search_merged(query.query)
-    else:
+async def run_search(search_type: str, query: str, **kwargs) -> list[dict]:
+    """Dispatch a query to the search strategy named by search_type, recording its metrics."""
+    if search_type not in SEARCH_TYPES:
         raise HTTPException(status_code=422, detail="Invalid search_type")
-    
-    return [SearchResult(text=r.get('text', ''), score=r.get('score', 0.0), source=r.get('field', '')) for r in results]
+
+    SEARCH_REQUESTS.inc(search_type=search_type)
+    SEARCH_IN_FLIGHT.inc(search_type=search_type)
+    try:
+        with SEARCH_DURATION.time(search_type=search_type):
+            if search_type == "semantic":
+                return await search_semantic(query, **kwargs)
+            elif search_type == "hybrid":
+                return await search_hybrid(query, **kwargs)
+            return await search_merged(query, **kwargs)
+    except Exception:
+        SEARCH_ERRORS.inc(search_type=search_type)
+        raise
+    finally:
+        SEARCH_IN_FLIGHT.dec(search_type=search_type)
+
+def strategy_options(search_type: str, fusion: Optional[str], semantic_weight: Optional[float]) -> dict:
+    """Extra keyword arguments for a strategy; fusion settings apply to hybrid only."""
+    if fusion is not None and fusion not in FUSION_METHODS:
+        raise HTTPException(status_code=422, detail="Invalid fusion method")
+    options = {}
+    if search_type == "hybrid":
+        if fusion is not None:
+            options["fusion"] = fusion
+        if semantic_weight is not None:
+            options["semantic_weight"] = semantic_weight
+    return options
+
+def to_search_results(results: list[dict], search_type: str) -> List[SearchResult]:
+    with LOCAL_DURATION.time(search_type=search_type, phase="serialize"), span("serialization"):
+        return [
+            SearchResult(text=r.get('text', ''), score=r.get('score', 0.0), source=r.get('field', ''), resource=r.get('resource'))
+            for r in results
+        ]
+
+@app.post("/search", response_model=List[SearchResult], response_model_exclude_none=True)
+async def search(query: SearchQuery, api_key: Optional[ApiKey] = Depends(get_api_key)):
+    options = strategy_options(query.search_type, query.fusion, query.semantic_weight)
+    results = await run_search(query.search_type, query.query, projection=query.projection, **options)
+    return to_search_results(results, query.search_type)
+
+@app.get("/metrics", include_in_schema=False)
+async def get_metrics():
+    """
+    Prometheus scrape endpoint: per-strategy request/error counts and
+    latencies, upstream Nuclia latency, our own parse/serialize time, and
+    cache and in-flight gauges. Unauthenticated, like /docs, so scrapers
+    need no key; expose it only on the internal network.
+    """
+    return PlainTextResponse(metrics.registry.render(), media_type=metrics.CONTENT_TYPE)
+
+@app.get("/healthz", include_in_schema=False)
+async def healthz():
+    """Liveness: the process is up and serving requests. Never touches the KB."""
+    return {"status": "ok"}
+
+@app.get("/readyz", include_in_schema=False)
+async def readyz():
+    """
+    Readiness: the KB client is initialized and the last background probe
+    of the KB succeeded recently. Served from the cached probe result, so
+    polling it costs no upstream call.
+    """
+    checks = {"kb_client": {"ok": is_initialized()}, "upstream": upstream_probe.status()}
+    ready = all(check["ok"] for check in checks.values())
+    return JSONResponse(
+        status_code=status.HTTP_200_OK if ready else status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"status": "ready" if ready else "not ready", "checks": checks},
+    )
+
+def selected_strategies(query: CompareQuery) -> List[str]:
+    strategies = list(dict.fromkeys(query.strategies))
+    if not strategies or any(s not in SEARCH_TYPES for s in strategies):
+        raise HTTPException(status_code=422, detail="Invalid strategies")
+    # Validate fusion settings up front rather than per strategy
+    strategy_options("hybrid", query.fusion, query.semantic_weight)
+    return strategies
+
+async def run_strategy_timed(strategy: str, query: CompareQuery) -> StrategyResult:
+    """Run one strategy of a multi-strategy request, capturing latency and errors."""
+    t0 = time.perf_counter()
+    results, error = [], None
+    try:
+        # Shed up front if a Nuclia slot cannot be had within the shared deadline
+        with deadline(query.timeout):
+            results = await asyncio.wait_for(
+                run_search(
+                    strategy,
+                    query.query,
+                    page_size=query.page_size,
+                    projection=query.projection,
+                    **strategy_options(strategy, query.fusion, query.semantic_weight),
+                ),
+                timeout=query.timeout,
+            )
+    except asyncio.TimeoutError:
+        error = "Timed out"
+    except Overloaded:
+        error = "Overloaded"
+    except Exception as e:
+        logger.error(f"Strategy {strategy} failed: {e}", exc_info=True)
+        error = "Search failed"
+    return StrategyResult(
+        results=to_search_results(results, strategy),
+        latency_ms=round((time.perf_counter() - t0) * 1000, 2),
+        error=error,
+    )
+
+@app.post("/search/compare", response_model=CompareResponse, response_model_exclude_none=True)
+async def search_compare(query: CompareQuery, api_key: Optional[ApiKey] = Depends(get_api_key)):
+    """Run the selected strategies concurrently under one shared deadline."""
+    strategies = selected_strategies(query)
+    started = time.perf_counter()
+
+    # Every strategy starts now, so the per-strategy timeout is a shared deadline
+    outcomes = await asyncio.gather(*(run_strategy_timed(s, query) for s in strategies))
+
+    return CompareResponse(
+        query=query.query,
+        strategies=dict(zip(strategies, outcomes)),
+        latency_ms=round((time.perf_counter() - started) * 1000, 2),
+    )
+
+def encode_stream_event(event: str, payload: dict, sse: bool) -> str:
+    data = json.dumps(payload)
+    if sse:
+        return f"event: {event}\ndata: {data}\n\n"
+    return data + "\n"
+
+@app.post("/search/stream")
+async def search_stream(query: CompareQuery, request: Request, api_key: Optional[ApiKey] = Depends(get_api_key)):
+    """
+    Stream each strategy's results as soon as that strategy finishes.
+
+    Responds with Server-Sent Events when the client sends
+    ``Accept: text/event-stream`` and with NDJSON otherwise. Every strategy
+    produces one ``result`` event; a final ``done`` event closes the stream.
+    """
+    strategies = selected_strategies(query)
+    sse = "text/event-stream" in request.headers.get("accept", "")
+
+    async def labelled(strategy: str):
+        return strategy, await run_strategy_timed(strategy, query)
+
+    async def events():
+        started = time.perf_counter()
+        tasks = [asyncio.create_task(labelled(s)) for s in strategies]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                strategy, outcome = await next_done
+                payload = {"search_type": strategy, **outcome.model_dump(exclude_none=True)}
+                yield encode_stream_event("result", payload, sse)
+            done = {"done": True, "latency_ms": round((time.perf_counter() - started) * 1000, 2)}
+            yield encode_stream_event("done", done, sse)
+        finally:
+            # Client went away: stop any strategy still running
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream" if sse else "application/x-ndjson",
+        # Headers set on the injected Response are not applied to a returned
+        # StreamingResponse, so the budget headers are passed explicitly
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no", **(api_key.budget_headers() if api_key else {})},
+    )
+
+@app.post("/search/batch", response_model=List[BatchItemResult], response_model_exclude_none=True)
+async def search_batch(batch: BatchQuery, response: Response, api_key: Optional[ApiKey] = Depends(get_api_key)):
+    """Run many searches with bounded concurrency; results keep request order."""
+    concurrency = SEARCH_BATCH_CONCURRENCY
+    if api_key is not None:
+        # Every query costs a token, and a batch may not use more upstream
+        # slots than its key is allowed concurrent requests. A batch larger
+        # than the burst costs the whole burst, as it could never afford more.
+        api_key.surcharge(min(len(batch.queries), api_key.bucket.capacity))
+        response.headers.update(api_key.budget_headers())
+        concurrency = min(concurrency, api_key.max_concurrency)
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def run_item(item: BatchSearchQuery) -> BatchItemResult:
+        async with semaphore:
+            try:
+                options = strategy_options(item.search_type, item.fusion, item.semantic_weight)
+                results = await run_search(
+                    item.search_type,
+                    item.query,
+                    page_size=item.page_size,
+                    projection=item.projection,
+                    **options,
+                )
+                return BatchItemResult(results=to_search_results(results, item.search_type))
+            except HTTPException as e:
+                return BatchItemResult(error=e.detail)
+            except Overloaded:
+                return BatchItemResult(error="Overloaded")
+            except Exception as e:
+                logger.error(f"Batch search failed: {e}", exc_info=True)
+                return BatchItemResult(error="Search failed")
+
+    return await asyncio.gather(*(run_item(item) for item in batch.queries))
@@ -0,0 +1,160 @@
+"""API keys with per-key token-bucket rate limits and concurrency caps."""
+import hmac
+import json
+import logging
+import math
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from config import API_KEY_BURST, API_KEY_MAX_CONCURRENCY, API_KEY_RATE_LIMIT
+from ratelimit import TokenBucket
+
+logger = logging.getLogger(__name__)
+
+RATE = "rate"
+CONCURRENCY = "concurrency"
+
+
+class KeyLimitExceeded(Exception):
+    """A key went over its request rate or its concurrent-request cap."""
+
+    def __init__(self, key_name: str, reason: str, headers: dict[str, str]):
+        super().__init__(f"API key {key_name!r} limit exceeded ({reason})")
+        self.key_name = key_name
+        self.reason = reason
+        self.headers = headers
+
+
+@dataclass
+class ApiKey:
+    """One client's key and its own budget."""
+    name: str
+    key: str = field(repr=False)
+    bucket: TokenBucket = field(repr=False)
+    max_concurrency: int = API_KEY_MAX_CONCURRENCY
+    in_flight: int = 0
+
+    def budget_headers(self) -> dict[str, str]:
+        return {
+            "X-RateLimit-Limit": f"{self.bucket.capacity:g}",
+            "X-RateLimit-Remaining": str(max(0, math.floor(self.bucket.tokens))),
+            "X-Concurrency-Limit": str(self.max_concurrency),
+            "X-Concurrency-Remaining": str(max(0, self.max_concurrency - self.in_flight)),
+        }
+
+    def _refused(self, reason: str, retry_after: float) -> KeyLimitExceeded:
+        headers = self.budget_headers()
+        headers["Retry-After"] = str(max(1, math.ceil(retry_after)))
+        return KeyLimitExceeded(self.name, reason, headers)
+
+    def admit(self) -> None:
+        """
+        Take a concurrency slot and one token, or neither: both limits are
+        checked before anything is spent.
+        """
+        if self.in_flight >= self.max_concurrency:
+            raise self._refused(CONCURRENCY, 1)
+        if not self.bucket.try_acquire():
+            raise self._refused(RATE, self.bucket.wait_time())
+        self.in_flight += 1
+
+    def surcharge(self, cost: float) -> None:
+        """
+        Raise an admitted request's total cost to ``cost`` tokens. If the
+        key cannot afford it, the admission token is refunded as well, so a
+        refused request costs nothing.
+        """
+        if cost <= 1:
+            return
+        if not self.bucket.try_acquire(cost - 1):
+            self.bucket.refund(1)
+            raise self._refused(RATE, self.bucket.wait_time(cost))
+
+    def release(self) -> None:
+        self.in_flight -= 1
+
+
+def make_key(
+    name: str,
+    key: str,
+    rate: float = API_KEY_RATE_LIMIT,
+    burst: float = API_KEY_BURST,
+    max_concurrency: int = API_KEY_MAX_CONCURRENCY,
+) -> ApiKey:
+    return ApiKey(name=name, key=key, bucket=TokenBucket(rate, burst), max_concurrency=max_concurrency)
+
+
+class KeyRing:
+    """The configured keys; an empty ring means authentication is disabled."""
+
+    def __init__(self, keys: list[ApiKey]):
+        names = [k.name for k in keys]
+        if len(set(names)) != len(names):
+            raise ValueError("API key names must be unique")
+        self.keys = keys
+
+    def __bool__(self) -> bool:
+        return bool(self.keys)
+
+    def lookup(self, presented: str | None) -> ApiKey | None:
+        if not presented:
+            return None
+        match = None
+        # Compare against every key in constant time so timing reveals nothing
+        for api_key in self.keys:
+            if hmac.compare_digest(api_key.key.encode(), presented.encode()):
+                match = api_key
+        return match
+
+
+def load_keys(api_key: str | None = None, keys_file: str | Path | None = None) -> KeyRing:
+    """
+    Build the key ring from ``API_KEY`` (one key named "default") and/or an
+    ``API_KEYS_FILE`` JSON object mapping client names to their key and
+    optional limits::
+
+        {"streamlit": {"key": "...", "rate": 20, "burst": 40, "max_concurrency": 8},
+         "batch-jobs": {"key": "...", "rate": 2, "max_concurrency": 2}}
+
+    Limits default to API_KEY_RATE_LIMIT, API_KEY_BURST and
+    API_KEY_MAX_CONCURRENCY.
+    """
+    keys = []
+    if api_key:
+        keys.append(make_key("default", api_key))
+    if keys_file:
+        with open(keys_file) as f:
+            entries = json.load(f)
+        for name, spec in entries.items():
+            if not spec.get("key"):
+                raise ValueError(f"API key {name!r} has no key")
+            keys.append(make_key(
+                name,
+                spec["key"],
+                rate=float(spec.get("rate", API_KEY_RATE_LIMIT)),
+                burst=float(spec.get("burst", API_KEY_BURST)),
+                max_concurrency=int(spec.get("max_concurrency", API_KEY_MAX_CONCURRENCY)),
+            ))
+    return KeyRing(keys)
+
+
+_ring: KeyRing | None = None
+_ring_source: tuple | None = None
+
+
+def get_key_ring() -> KeyRing:
+    """
+    The process-wide key ring, loaded once from the environment.
+
+    It is only rebuilt if API_KEY or API_KEYS_FILE change, so buckets keep
+    their state across requests.
+    """
+    global _ring, _ring_source
+    source = (os.getenv("API_KEY"), os.getenv("API_KEYS_FILE"))
+    if _ring is None or source != _ring_source:
+        _ring = load_keys(*source)
+        _ring_source = source
+        if _ring:
+            logger.info(f"Loaded {len(_ring.keys)} API key(s): {', '.join(k.name for k in _ring.keys)}")
+    return _ring
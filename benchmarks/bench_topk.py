@@ -0,0 +1,63 @@
+"""
+Benchmark top-k selection on synthetic /find responses.
+
+Compares a full sort of every paragraph against the heap-based
+ranking.top_k used by search_merged and search_hybrid.
+
+Usage:
+    python benchmarks/bench_topk.py [--paragraphs 10000] [--repeat 50]
+"""
+import argparse
+import random
+import sys
+import timeit
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from ranking import top_k, score_of  # noqa: E402
+from search import iter_find_paragraphs  # noqa: E402
+
+
+def synthetic_find_response(paragraphs: int, resources: int = 100, fields: int = 4, seed: int = 42) -> dict:
+    """Build a /find-shaped dict with the given number of scored paragraphs."""
+    rng = random.Random(seed)
+    data = {"resources": {}}
+    for i in range(paragraphs):
+        rid = f"rid{i % resources}"
+        field_id = f"f/file{i % fields}"
+        resource = data["resources"].setdefault(rid, {"fields": {}})
+        field = resource["fields"].setdefault(field_id, {"paragraphs": {}})
+        field["paragraphs"][f"{rid}/{field_id}/{i}"] = {
+            "score": rng.random(),
+            "text": f"Paragraph {i} " + "lorem ipsum " * 8,
+        }
+    return data
+
+
+def full_sort(data: dict, k: int) -> list[dict]:
+    return sorted(iter_find_paragraphs(data), key=score_of, reverse=True)[:k]
+
+
+def heap_select(data: dict, k: int) -> list[dict]:
+    return top_k(iter_find_paragraphs(data), k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=10_000)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+
+    data = synthetic_find_response(args.paragraphs)
+    print(f"{args.paragraphs} paragraphs, {args.repeat} runs each")
+    print(f"{'k':>6} {'full sort (ms)':>16} {'heap top-k (ms)':>16} {'speedup':>8}")
+    for k in (5, 20, 100, 1000):
+        assert [p["score"] for p in full_sort(data, k)] == [p["score"] for p in heap_select(data, k)]
+        sort_ms = timeit.timeit(lambda: full_sort(data, k), number=args.repeat) / args.repeat * 1000
+        heap_ms = timeit.timeit(lambda: heap_select(data, k), number=args.repeat) / args.repeat * 1000
+        print(f"{k:>6} {sort_ms:>16.2f} {heap_ms:>16.2f} {sort_ms / heap_ms:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,170 @@
+"""Bounded in-process TTL + LRU cache for search results."""
+import functools
+import inspect
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+
+from tracing import span
+
+# Rough per-result overhead (dict + keys) added to the text payload size
+_RESULT_OVERHEAD_BYTES = 200
+
+
+def normalize_query(query: str) -> str:
+    """Case-fold and collapse whitespace so trivially different queries share a key."""
+    return " ".join(query.casefold().split())
+
+
+def _payload_size(value: Any) -> int:
+    if isinstance(value, str):
+        return len(value)
+    if isinstance(value, dict):
+        return sum(len(str(k)) + _payload_size(v) for k, v in value.items())
+    if isinstance(value, (list, tuple)):
+        return sum(_payload_size(v) for v in value)
+    return 8
+
+
+def estimate_size(results: list[dict]) -> int:
+    """Approximate memory footprint of a result list in bytes."""
+    size = 0
+    for result in results:
+        size += _RESULT_OVERHEAD_BYTES
+        for value in result.values():
+            if isinstance(value, (str, dict, list)):
+                size += _payload_size(value)
+    return size
+
+
+class ResultCache:
+    """
+    Thread-safe LRU cache with per-entry TTL and entry/byte bounds.
+
+    Entries expire ``ttl`` seconds after insertion. When either bound is
+    exceeded the least recently used entries are evicted. A ``ttl`` of 0
+    disables caching entirely.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 300.0,
+        max_entries: int = 1024,
+        max_bytes: int = 16 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, int, list[dict]]] = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def get(self, key: Hashable) -> list[dict] | None:
+        """Return a copy of the cached results, or None on miss/expiry."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, _, results = entry
+            if expires_at <= self._clock():
+                self._remove(key)
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+        return [dict(r) for r in results]
+
+    def set(self, key: Hashable, results: list[dict]) -> None:
+        """Store a copy of results, evicting LRU entries to stay within bounds."""
+        if not self.enabled:
+            return
+        size = estimate_size(results)
+        if size > self.max_bytes:
+            return
+        stored = [dict(r) for r in results]
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = (self._clock() + self.ttl, size, stored)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Counters for monitoring cache effectiveness."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_ratio": self.hits / lookups if lookups else 0.0,
+            }
+
+    def _remove(self, key: Hashable) -> None:
+        _, size, _ = self._entries.pop(key)
+        self._bytes -= size
+
+
+def make_key(strategy: str, query: str, params: dict[str, Any]) -> tuple:
+    """Build a cache key from strategy, normalized query and search settings."""
+    return (strategy, normalize_query(query), tuple(sorted(params.items())))
+
+
+def call_key(signature: inspect.Signature, strategy: str, args: tuple, kwargs: dict) -> tuple:
+    """Build the key for a strategy call, with defaults applied."""
+    bound = signature.bind(*args, **kwargs)
+    bound.apply_defaults()
+    params = dict(bound.arguments)
+    query = params.pop("query")
+    return make_key(strategy, query, params)
+
+
+def cached_search(cache: ResultCache, strategy: str):
+    """
+    Decorate an async search strategy so results are served from ``cache``.
+
+    The key covers the normalized query plus every other argument of the
+    strategy (page_size, min_score settings, ...), with defaults applied.
+    """
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            if not cache.enabled:
+                return await func(*args, **kwargs)
+            key = call_key(signature, strategy, args, kwargs)
+
+            with span("cache"):
+                results = cache.get(key)
+            if results is not None:
+                return results
+            results = await func(*args, **kwargs)
+            cache.set(key, results)
+            return results
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
@@ -1,17 +1,13 @@
 import click
 import asyncio
-from search import search_merged
+from search import search_semantic, search_hybrid, search_merged
+from client import search_client_session
 
 @click.group()
 def cli():
     pass
 
-@cli.command()
-@click.argument("question")
-def ask(question):
-    """Asks a question and prints the top 3 results."""
-    click.echo(f"Asking: {question}")
-    results = asyncio.run(search_merged(query=question, page_size=3))
+def print_results(results):
     if results:
         for i, r in enumerate(results, 1):
             text = r.get("text", "N/A")[:180].strip()
@@ -19,22 +15,58 @@ def ask(question):
     else:
         click.echo("No results found.")
 
+async def ask_once(question):
+    async with search_client_session():
+        return await search_merged(query=question, page_size=3)
+
+async def ask_streaming(question):
+    # Print each strategy's results as soon as it finishes, fastest first
+    strategies = {"semantic": search_semantic, "hybrid": search_hybrid, "merged": search_merged}
+
+    async def labelled(name, search):
+        try:
+            return name, await search(query=question, page_size=3), None
+        except Exception as e:
+            return name, [], e
+
+    async with search_client_session():
+        tasks = [asyncio.create_task(labelled(name, search)) for name, search in strategies.items()]
+        for next_done in asyncio.as_completed(tasks):
+            name, results, error = await next_done
+            if error is not None:
+                click.echo(f"[{name}] failed: {error}")
+                continue
+            click.echo(f"[{name}]")
+            print_results(results)
+
+async def chat_loop():
+    # One event loop for the whole session so pooled connections are reused
+    async with search_client_session():
+        while True:
+            question = click.prompt("Ask a question")
+            if question.lower() == 'exit':
+                break
+            click.echo(f"You asked: {question}")
+            results = await search_merged(query=question, page_size=3)
+            print_results(results)
+
+@cli.command()
+@click.argument("question")
+@click.option("--stream", is_flag=True, help="Run all strategies and print each as it finishes.")
+def ask(question, stream):
+    """Asks a question and prints the top 3 results."""
+    click.echo(f"Asking: {question}")
+    if stream:
+        asyncio.run(ask_streaming(question))
+        return
+    results = asyncio.run(ask_once(question))
+    print_results(results)
+
 @cli.command()
 def chat():
     """Starts an interactive chat session."""
     click.echo("Starting chat session. Type 'exit' to end.")
-    while True:
-        question = click.prompt("Ask a question")
-        if question.lower() == 'exit':
-            break
-        click.echo(f"You asked: {question}")
-        results = asyncio.run(search_merged(query=question, page_size=3))
-        if results:
-            for i, r in enumerate(results, 1):
-                text = r.get("text", "N/A")[:180].strip()
-                click.echo(f"{i}. {text}...")
-        else:
-            click.echo("No results found.")
+    asyncio.run(chat_loop())
 
 if __name__ == "__main__":
     cli()
@@ -0,0 +1,116 @@
+"""Process-wide pooled Nuclia KB client shared by all search functions."""
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+import httpx
+from nuclia import BASE_DOMAIN
+from nuclia.lib.kb import AsyncNucliaDBClient, Environment
+
+from config import (
+    KB_URL,
+    KB_API_KEY,
+    NUCLIA_MAX_CONNECTIONS,
+    NUCLIA_MAX_KEEPALIVE_CONNECTIONS,
+    NUCLIA_KEEPALIVE_EXPIRY,
+    NUCLIA_TIMEOUT,
+)
+
+logger = logging.getLogger(__name__)
+
+_client: AsyncNucliaDBClient | None = None
+_client_loop: asyncio.AbstractEventLoop | None = None
+
+
+def _build_client() -> AsyncNucliaDBClient:
+    """Create a KB client whose HTTP session keeps pooled connections alive."""
+    if not KB_URL:
+        raise ValueError("KB_URL environment variable is required but not set")
+    if not KB_API_KEY:
+        raise ValueError("KB_API_KEY environment variable is required but not set")
+
+    if BASE_DOMAIN in KB_URL:
+        region = KB_URL.split(".")[0].split("/")[-1]
+        ndb = AsyncNucliaDBClient(
+            environment=Environment.CLOUD,
+            url=KB_URL,
+            api_key=KB_API_KEY,
+            region=region,
+        )
+    else:
+        ndb = AsyncNucliaDBClient(environment=Environment.OSS, url=KB_URL)
+
+    # The SDK session is created without limits; swap in a pooled one before
+    # any connection has been opened on it.
+    ndb.ndb.session = httpx.AsyncClient(
+        headers=ndb.ndb.headers,
+        base_url=ndb.ndb.base_url,
+        timeout=NUCLIA_TIMEOUT,
+        limits=httpx.Limits(
+            max_connections=NUCLIA_MAX_CONNECTIONS,
+            max_keepalive_connections=NUCLIA_MAX_KEEPALIVE_CONNECTIONS,
+            keepalive_expiry=NUCLIA_KEEPALIVE_EXPIRY,
+        ),
+    )
+    return ndb
+
+
+async def init_search_client() -> AsyncNucliaDBClient:
+    """Create the shared client for the running event loop if needed."""
+    global _client, _client_loop
+    loop = asyncio.get_running_loop()
+    if _client is not None and _client_loop is loop:
+        return _client
+
+    # Connections from a previous loop cannot be reused once it has closed
+    _client = _build_client()
+    _client_loop = loop
+    logger.info(
+        "Nuclia search client pool created (max_connections=%s, keepalive=%s)",
+        NUCLIA_MAX_CONNECTIONS,
+        NUCLIA_MAX_KEEPALIVE_CONNECTIONS,
+    )
+    return _client
+
+
+def is_initialized() -> bool:
+    """Whether the shared client exists for the running event loop."""
+    try:
+        return _client is not None and _client_loop is asyncio.get_running_loop()
+    except RuntimeError:
+        return False
+
+
+async def probe_kb() -> None:
+    """Fetch the KB's own record through the shared pool; raises if the KB is unreachable."""
+    client = await get_search_client()
+    response = await client.reader_session.get(client.url)
+    response.raise_for_status()
+
+
+async def get_search_client() -> AsyncNucliaDBClient:
+    """Return the shared client, creating it lazily on first use."""
+    return await init_search_client()
+
+
+async def close_search_client() -> None:
+    """Close pooled connections and drop the shared client."""
+    global _client, _client_loop
+    client, _client, _client_loop = _client, None, None
+    if client is None:
+        return
+
+    for session in (client.ndb.session, client.reader_session, client.writer_session):
+        if session is not None:
+            await session.aclose()
+    logger.info("Nuclia search client pool closed")
+
+
+@asynccontextmanager
+async def search_client_session():
+    """Keep the shared client open for the duration of the block."""
+    client = await init_search_client()
+    try:
+        yield client
+    finally:
+        await close_search_client()
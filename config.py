@@ -10,6 +10,79 @@ KB_URL = os.getenv("KB_URL")
 KB_API_KEY = os.getenv("KB_API_KEY")
 DATA_DIR = Path(__file__).parent / "data"
 
+# Connection pool limits for the shared Nuclia search client
+NUCLIA_MAX_CONNECTIONS = int(os.getenv("NUCLIA_MAX_CONNECTIONS", "20"))
+NUCLIA_MAX_KEEPALIVE_CONNECTIONS = int(os.getenv("NUCLIA_MAX_KEEPALIVE_CONNECTIONS", "10"))
+NUCLIA_KEEPALIVE_EXPIRY = float(os.getenv("NUCLIA_KEEPALIVE_EXPIRY", "30"))
+NUCLIA_TIMEOUT = float(os.getenv("NUCLIA_TIMEOUT", "60"))
+
+# In-process search result cache (TTL of 0 disables it)
+SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "300"))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "1024"))
+SEARCH_CACHE_MAX_BYTES = int(os.getenv("SEARCH_CACHE_MAX_BYTES", str(16 * 1024 * 1024)))
+
+# Shared deadline (seconds) for all strategies in a /search/compare request
+SEARCH_COMPARE_TIMEOUT = float(os.getenv("SEARCH_COMPARE_TIMEOUT", "20"))
+
+# /search/batch limits: queries per request and concurrent searches per batch
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv("SEARCH_BATCH_MAX_QUERIES", "100"))
+SEARCH_BATCH_CONCURRENCY = int(os.getenv("SEARCH_BATCH_CONCURRENCY", "8"))
+
+# Background KB probe behind /readyz: seconds between probes and per-probe timeout
+HEALTH_PROBE_INTERVAL = float(os.getenv("HEALTH_PROBE_INTERVAL", "10"))
+HEALTH_PROBE_TIMEOUT = float(os.getenv("HEALTH_PROBE_TIMEOUT", "3"))
+
+# Admission control for outbound Nuclia search calls: concurrent calls, callers
+# allowed to wait for a slot, and the longest wait (seconds) before a 503
+SEARCH_MAX_CONCURRENCY = int(os.getenv("SEARCH_MAX_CONCURRENCY", "16"))
+SEARCH_MAX_QUEUE = int(os.getenv("SEARCH_MAX_QUEUE", "64"))
+SEARCH_QUEUE_TIMEOUT = float(os.getenv("SEARCH_QUEUE_TIMEOUT", "5"))
+
+# Per-API-key limits: requests/second, burst size and concurrent requests.
+# Keys come from API_KEY and/or API_KEYS_FILE (see api_keys.py), and each key
+# in that file may override these.
+API_KEY_RATE_LIMIT = float(os.getenv("API_KEY_RATE_LIMIT", "10"))
+API_KEY_BURST = float(os.getenv("API_KEY_BURST", "20"))
+API_KEY_MAX_CONCURRENCY = int(os.getenv("API_KEY_MAX_CONCURRENCY", "4"))
+
+# Optional JSON-lines file receiving every API request's phase spans
+TRACE_EXPORT_PATH = Path(os.environ["TRACE_EXPORT_PATH"]) if os.getenv("TRACE_EXPORT_PATH") else None
+
+# Ingestion pipeline: workers per stage and queue size between stages
+INGEST_HASH_WORKERS = int(os.getenv("INGEST_HASH_WORKERS", "4"))
+INGEST_CHECK_WORKERS = int(os.getenv("INGEST_CHECK_WORKERS", "8"))
+INGEST_UPLOAD_WORKERS = int(os.getenv("INGEST_UPLOAD_WORKERS", "4"))
+INGEST_PROCESS_WORKERS = int(os.getenv("INGEST_PROCESS_WORKERS", "256"))
+INGEST_QUEUE_SIZE = int(os.getenv("INGEST_QUEUE_SIZE", "64"))
+
+# watch command: quiet period before a batch is ingested, max paths per batch,
+# and the interval of the polling fallback when inotify is unavailable
+WATCH_DEBOUNCE = float(os.getenv("WATCH_DEBOUNCE", "2"))
+WATCH_MAX_BATCH = int(os.getenv("WATCH_MAX_BATCH", "100"))
+WATCH_POLL_INTERVAL = float(os.getenv("WATCH_POLL_INTERVAL", "5"))
+
+# Shared rate limit (requests/second, burst) and retries for ingestion calls to Nuclia
+INGEST_RATE_LIMIT = float(os.getenv("INGEST_RATE_LIMIT", "10"))
+INGEST_RATE_BURST = float(os.getenv("INGEST_RATE_BURST", "20"))
+INGEST_MAX_RETRIES = int(os.getenv("INGEST_MAX_RETRIES", "5"))
+
+# Processing-status tracker: per-resource poll backoff, global status-call budget, timeout
+PROCESSING_POLL_MIN_INTERVAL = float(os.getenv("PROCESSING_POLL_MIN_INTERVAL", "1"))
+PROCESSING_POLL_MAX_INTERVAL = float(os.getenv("PROCESSING_POLL_MAX_INTERVAL", "30"))
+PROCESSING_STATUS_RPS = float(os.getenv("PROCESSING_STATUS_RPS", "5"))
+PROCESSING_TIMEOUT = float(os.getenv("PROCESSING_TIMEOUT", "900"))
+
+# Local manifest of ingested files (defaults to <data dir>/.nuclia-manifest.sqlite)
+INGEST_MANIFEST_PATH = Path(os.environ["INGEST_MANIFEST_PATH"]) if os.getenv("INGEST_MANIFEST_PATH") else None
+
+# Resumable uploads: TUS chunk size (keep >= 5MB for S3-backed storage except in tests)
+# and the journal of in-progress uploads (defaults to <data dir>/.nuclia-uploads.sqlite)
+INGEST_CHUNK_SIZE = int(os.getenv("INGEST_CHUNK_SIZE", str(5 * 1024 * 1024)))
+INGEST_JOURNAL_PATH = Path(os.environ["INGEST_JOURNAL_PATH"]) if os.getenv("INGEST_JOURNAL_PATH") else None
+
+# Per-file ingest timing report, written as CSV for a .csv path and JSON otherwise
+INGEST_REPORT_PATH = Path(os.environ["INGEST_REPORT_PATH"]) if os.getenv("INGEST_REPORT_PATH") else None
+
 logger = logging.getLogger(__name__)
 
 def get_kb_client():
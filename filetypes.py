@@ -0,0 +1,157 @@
+"""Supported document types: recursive discovery, content sniffing and per-type upload options."""
+import fnmatch
+import os
+import zipfile
+from dataclasses import dataclass, field
+from pathlib import Path
+
+SNIFF_BYTES = 8192
+
+
+@dataclass(frozen=True)
+class FileType:
+    """A document type and the upload options used for it unless overridden."""
+    name: str
+    mimetype: str
+    extensions: tuple[str, ...]
+    options: dict = field(default_factory=dict, hash=False)
+
+
+FILE_TYPES = {
+    file_type.name: file_type
+    for file_type in [
+        FileType("pdf", "application/pdf", (".pdf",), {"interpret_tables": True}),
+        FileType(
+            "docx",
+            "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+            (".docx",),
+            {"interpret_tables": True},
+        ),
+        FileType(
+            "pptx",
+            "application/vnd.openxmlformats-officedocument.presentationml.presentation",
+            (".pptx",),
+            {"interpret_tables": True},
+        ),
+        FileType("html", "text/html", (".html", ".htm"), {"interpret_tables": False}),
+        FileType("md", "text/markdown", (".md", ".markdown"), {"interpret_tables": False}),
+        FileType("txt", "text/plain", (".txt",), {"interpret_tables": False, "blank_line_splitter": True}),
+    ]
+}
+
+# Upload options a file type (or a --type-option override) may set
+UPLOAD_OPTIONS = ("extract_strategy", "split_strategy", "interpret_tables", "blank_line_splitter")
+
+DEFAULT_INCLUDE = tuple(f"*{ext}" for file_type in FILE_TYPES.values() for ext in file_type.extensions)
+# Hidden files and folders, which also covers the manifest and upload journal
+DEFAULT_EXCLUDE = (".*",)
+
+
+def _matches(relative: str, patterns) -> bool:
+    name = relative.rsplit("/", 1)[-1]
+    return any(fnmatch.fnmatch(relative, p) or fnmatch.fnmatch(name, p) for p in patterns)
+
+
+def is_excluded(relative: str, exclude=DEFAULT_EXCLUDE) -> bool:
+    """Whether a DATA_DIR-relative posix path, or a folder above it, matches ``exclude``."""
+    parts = relative.split("/")
+    # An excluded folder excludes everything below it
+    return any(_matches("/".join(parts[:i]), exclude) for i in range(1, len(parts) + 1))
+
+
+def is_included(relative: str, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE) -> bool:
+    """Whether a DATA_DIR-relative posix path passes the include/exclude patterns."""
+    return _matches(relative, include) and not is_excluded(relative, exclude)
+
+
+def discover_files(data_dir: Path, include=DEFAULT_INCLUDE, exclude=DEFAULT_EXCLUDE) -> list[Path]:
+    """
+    Walk ``data_dir`` recursively for files matching ``include`` and not ``exclude``.
+
+    Patterns are shell globs matched against both the relative path and the
+    file name, so ``*.pdf`` matches at any depth and ``drafts/*`` excludes a
+    folder. Excluded folders are not descended into.
+    """
+    root = Path(data_dir)
+    found = []
+    for directory, dirnames, filenames in os.walk(root):
+        base = Path(directory).relative_to(root).as_posix()
+        prefix = "" if base == "." else f"{base}/"
+        dirnames[:] = sorted(d for d in dirnames if not _matches(prefix + d, exclude))
+        for filename in filenames:
+            if is_included(prefix + filename, include, exclude):
+                found.append(Path(directory) / filename)
+    return sorted(found)
+
+
+def _zip_type(path: Path) -> FileType | None:
+    try:
+        with zipfile.ZipFile(path) as archive:
+            names = set(archive.namelist())
+    except (zipfile.BadZipFile, OSError):
+        return None
+    if "word/document.xml" in names:
+        return FILE_TYPES["docx"]
+    if "ppt/presentation.xml" in names:
+        return FILE_TYPES["pptx"]
+    return None
+
+
+def sniff_file_type(path: str | Path) -> FileType | None:
+    """
+    Detect the document type from the file's leading bytes.
+
+    Content wins over the extension, so a misnamed PDF is still sent as a
+    PDF; for text without a leading HTML doctype or tag, the extension
+    picks HTML, markdown or plain text. Returns None for content we do not
+    ingest.
+    """
+    path = Path(path)
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+
+    if head.startswith(b"%PDF-"):
+        return FILE_TYPES["pdf"]
+    if head.startswith(b"PK\x03\x04"):
+        return _zip_type(path)
+    if b"\0" in head:
+        return None
+    try:
+        text = head.decode("utf-8")
+    except UnicodeDecodeError as e:
+        # A multi-byte character may be cut at the end of the sniffed block
+        if e.start < len(head) - 3:
+            return None
+        text = head[:e.start].decode("utf-8")
+
+    # Only a leading doctype or <html> tag marks an HTML document; markdown
+    # and text files often quote HTML snippets further down
+    lowered = text.lstrip("\ufeff \t\r\n").lower()
+    if lowered.startswith(("<!doctype html", "<html")):
+        return FILE_TYPES["html"]
+    suffix = path.suffix.lower()
+    for name in ("html", "md"):
+        if suffix in FILE_TYPES[name].extensions:
+            return FILE_TYPES[name]
+    return FILE_TYPES["txt"]
+
+
+def parse_type_options(values) -> dict[str, dict]:
+    """
+    Parse ``type.option=value`` overrides, e.g. ``pdf.split_strategy=PARAGRAPH``.
+
+    Raises ValueError for unknown types or options.
+    """
+    overrides: dict[str, dict] = {}
+    for value in values:
+        key, sep, raw = value.partition("=")
+        type_name, dot, option = key.partition(".")
+        if not sep or not dot:
+            raise ValueError(f"Expected type.option=value, got {value!r}")
+        if type_name not in FILE_TYPES:
+            raise ValueError(f"Unknown file type {type_name!r}; expected one of {', '.join(FILE_TYPES)}")
+        if option not in UPLOAD_OPTIONS:
+            raise ValueError(f"Unknown upload option {option!r}; expected one of {', '.join(UPLOAD_OPTIONS)}")
+        parsed = raw.lower() in ("1", "true", "yes") if option in ("interpret_tables", "blank_line_splitter") else raw
+        overrides.setdefault(type_name, {})[option] = parsed
+    return overrides
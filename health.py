@@ -0,0 +1,79 @@
+"""Background upstream probe backing the API's readiness endpoint."""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from config import HEALTH_PROBE_INTERVAL, HEALTH_PROBE_TIMEOUT
+
+logger = logging.getLogger(__name__)
+
+
+class UpstreamProbe:
+    """
+    Periodically run ``check`` and cache the outcome.
+
+    /readyz reads the cached result, so a load balancer polling readiness
+    never triggers an upstream call itself. A result older than three
+    intervals counts as not ready, which covers a probe loop that has died.
+    """
+
+    def __init__(
+        self,
+        check: Callable[[], Awaitable[None]],
+        interval: float = HEALTH_PROBE_INTERVAL,
+        timeout: float = HEALTH_PROBE_TIMEOUT,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.check = check
+        self.interval = interval
+        self.timeout = timeout
+        self.clock = clock
+        self.ok = False
+        self.error: str | None = "not probed yet"
+        self.latency_ms: float | None = None
+        self.checked_at: float | None = None
+        self._task: asyncio.Task | None = None
+
+    async def probe_once(self) -> bool:
+        started = self.clock()
+        try:
+            await asyncio.wait_for(self.check(), timeout=self.timeout)
+        except asyncio.TimeoutError:
+            self.ok, self.error = False, f"timed out after {self.timeout:g}s"
+        except Exception as e:
+            self.ok, self.error = False, type(e).__name__
+            logger.warning(f"Upstream probe failed: {e}")
+        else:
+            self.ok, self.error = True, None
+        self.checked_at = self.clock()
+        self.latency_ms = round((self.checked_at - started) * 1000, 2)
+        return self.ok
+
+    @property
+    def ready(self) -> bool:
+        if not self.ok or self.checked_at is None:
+            return False
+        return self.clock() - self.checked_at <= 3 * self.interval
+
+    def status(self) -> dict:
+        age = None if self.checked_at is None else round(self.clock() - self.checked_at, 2)
+        return {"ok": self.ready, "error": self.error, "latency_ms": self.latency_ms, "age_seconds": age}
+
+    async def _run(self) -> None:
+        while True:
+            await self.probe_once()
+            await asyncio.sleep(self.interval)
+
+    def start(self) -> None:
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        task, self._task = self._task, None
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                pass
@@ -1,7 +1,34 @@
+import asyncio
+import functools
+import mimetypes
+import os
+from contextlib import nullcontext
+from dataclasses import dataclass, field
 from pathlib import Path
+import httpx
 from nuclia import sdk
-from utils import safe_slug_from_filename, normalize_id, wait_until_processed
-from config import DATA_DIR
+from nuclia.decorators import kb
+from utils import safe_slug_from_path, legacy_slug_from_path, file_content_hash, file_md5, normalize_id, wait_until_processed
+from pipeline import Stage, run_pipeline
+import manifest as manifest_db
+from manifest import Manifest, ManifestEntry
+from status_tracker import get_tracker
+from ratelimit import throttle
+from ingest_report import FileTiming, IngestReport, timed
+from filetypes import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, FileType, discover_files, sniff_file_type
+from upload_journal import UploadJournal, JournalEntry, UPLOADED
+from config import (
+    DATA_DIR,
+    INGEST_HASH_WORKERS,
+    INGEST_CHECK_WORKERS,
+    INGEST_UPLOAD_WORKERS,
+    INGEST_PROCESS_WORKERS,
+    INGEST_QUEUE_SIZE,
+    INGEST_MANIFEST_PATH,
+    INGEST_JOURNAL_PATH,
+    INGEST_CHUNK_SIZE,
+    INGEST_REPORT_PATH,
+)
 import logging
 
 logger = logging.getLogger(__name__)
@@ -43,103 +70,660 @@ def validate_file_path(path: str) -> Path:
     return file_path
 
 
-async def upsert_file(
-    path: str,
-    wait: bool = False,
+@dataclass
+class IngestItem:
+    """State of one file as it moves through the ingestion pipeline."""
+    path: Path
+    slug: str = ""
+    ingest_hash: str = ""
+    rid: str | None = None
+    is_new: bool = False
+    status: str = "Pending"
+    error: str | None = None
+    stat: os.stat_result | None = None
+    known: ManifestEntry | None = None
+    processed: bool = False
+    file_type: FileType | None = None
+    # Seconds per phase (see ingest_report.PHASES) and bytes sent this run
+    timings: dict[str, float] = field(default_factory=dict)
+    bytes_uploaded: int = 0
+
+
+def is_not_found(e: Exception) -> bool:
+    return (ndb_exceptions and isinstance(e, ndb_exceptions.NotFoundError)) or "Resource does not exist" in str(e)
+
+
+def manifest_key(path: Path) -> str:
+    return path.relative_to(DATA_DIR.resolve()).as_posix()
+
+
+async def hash_file(item: IngestItem, known: dict[str, ManifestEntry] | None = None) -> bool:
+    """
+    Validate the path, sniff its type and compute the slug and content hash
+    used for change detection.
+
+    With a manifest, files whose size and mtime are unchanged are skipped
+    without hashing, and files whose content hash still matches are skipped
+    without asking the KB. Returns False when the file needs no upload,
+    including files whose content is not a supported type.
+    """
+    item.path = await asyncio.to_thread(validate_file_path, str(item.path))
+    item.slug = safe_slug_from_path(str(item.path), DATA_DIR.resolve())
+    item.stat = await asyncio.to_thread(item.path.stat)
+
+    entry = (known or {}).get(manifest_key(item.path))
+    if entry is not None and (not entry.rid or entry.slug != item.slug or entry.status == manifest_db.ERROR):
+        entry = None
+    item.known = entry
+
+    if entry is not None and entry.matches_stat(item.stat):
+        item.rid, item.ingest_hash = entry.rid, entry.content_hash
+        item.status = "Already indexed"
+        return False
+
+    item.file_type = await asyncio.to_thread(sniff_file_type, item.path)
+    if item.file_type is None:
+        item.status = "Unsupported"
+        return False
+
+    with timed(item.timings, "hash"):
+        item.ingest_hash = await asyncio.to_thread(file_content_hash, str(item.path))
+    if entry is not None:
+        # Known resource: no KB lookup needed, even if the content changed
+        item.rid = entry.rid
+        if entry.content_hash == item.ingest_hash:
+            item.status = "Already indexed"
+            return False
+    return True
+
+
+async def get_by_slug(res_api, slug: str):
+    """The resource with ``slug``, or None if the KB has none."""
+    try:
+        return await throttle.call(res_api.get, slug=slug, show=["basic", "extra"])
+    except Exception as e:
+        if is_not_found(e):
+            return None
+        raise
+
+
+async def create_resource(res_api, item: IngestItem, ndb):
+    """
+    Create the resource for a new file.
+
+    A create is not safe to resend blindly: after a transport error the
+    resource may exist already, so look the slug up before trying again.
+    """
+    try:
+        return await throttle.call_non_idempotent(res_api.create, title=item.path.name, slug=item.slug, ndb=ndb)
+    except httpx.TransportError:
+        existing = await get_by_slug(res_api, item.slug)
+        if existing is not None:
+            return existing
+        return await throttle.call_non_idempotent(res_api.create, title=item.path.name, slug=item.slug, ndb=ndb)
+
+
+async def migrate_legacy_slug(res_api, item: IngestItem):
+    """
+    Adopt a resource uploaded under the old mtime-based slug.
+
+    Renames it to the path-based slug so the file is updated in place
+    instead of being uploaded a second time. Returns None if there is no
+    such resource (or the file was touched since, changing its mtime).
+    """
+    legacy_slug = await asyncio.to_thread(legacy_slug_from_path, str(item.path))
+    if legacy_slug == item.slug:
+        return None
+    res = await get_by_slug(res_api, legacy_slug)
+    if res is None:
+        return None
+    await throttle.call(res_api.update, rid=normalize_id(res), slug=item.slug)
+    logger.info(f"Migrated {item.path.name} from slug {legacy_slug} to {item.slug}")
+    return res
+
+
+async def check_file(item: IngestItem) -> bool:
+    """Look the slug up in the KB; returns False when the file is unchanged."""
+    if item.known is not None:
+        return True
+
+    res_api = sdk.AsyncNucliaResource()
+    with timed(item.timings, "check"):
+        res = await get_by_slug(res_api, item.slug)
+        if res is None:
+            res = await migrate_legacy_slug(res_api, item)
+    if res is None:
+        item.is_new = True
+        return True
+
+    item.rid = normalize_id(res)
+    extra_obj = getattr(res, "extra", None)
+    extra_dict = (
+        extra_obj.model_dump()
+        if hasattr(extra_obj, "model_dump")
+        else (extra_obj.dict() if hasattr(extra_obj, "dict") else {})
+    )
+    prev_hash = ((extra_dict or {}).get("metadata", {}) or {}).get("ingest_hash")
+
+    if prev_hash == item.ingest_hash:
+        item.status = "Already indexed"
+        return False
+    return True
+
+
+# File field every upload goes into, so a re-upload replaces the content
+FILE_FIELD = "file"
+
+
+async def file_fields(res_api, rid: str, ndb) -> list[str]:
+    """Ids of the resource's file fields."""
+    res = await throttle.call(res_api.get, rid=rid, show=["values"], ndb=ndb)
+    files = getattr(getattr(res, "data", None), "files", None) or {}
+    return sorted(files)
+
+
+def journal_path(data_dir: Path) -> Path:
+    return INGEST_JOURNAL_PATH or data_dir / ".nuclia-uploads.sqlite"
+
+
+def _tus_url(upload_url: str) -> httpx.URL:
+    url = httpx.URL(upload_url)
+    if url.is_relative_url:
+        # Same rewrite as the SDK's patch_tus_upload: the session base URL already ends in /kb/<kbid>
+        url = httpx.URL("/".join(url.path.split("/")[3:]))
+    return url
+
+
+async def acknowledged_offset(ndb, upload_url: str) -> int:
+    """Ask the server how many bytes of a TUS upload it has stored."""
+    response = await ndb.writer_session.head(_tus_url(upload_url), headers={"tus-resumable": "1.0.0"})
+    response.raise_for_status()
+    return int(response.headers["Upload-Offset"])
+
+
+async def send_file(
+    ndb,
+    journal: UploadJournal,
+    item: IngestItem,
+    content_type: str,
+    field: str = FILE_FIELD,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    extract_strategy: str | None = None,
+    split_strategy: str | None = None,
+    language: str | None = None,
+) -> None:
+    """
+    Upload the file in chunks over TUS, resuming from the journal if possible.
+
+    Every acknowledged offset is committed to the journal, so after a crash
+    the next run asks the server for its offset and sends only the rest; a
+    retried chunk is resumed from the server's offset the same way. A
+    journal entry for different content, another resource or another field
+    is discarded.
+    """
+    key = manifest_key(item.path)
+    size = item.path.stat().st_size
+    entry = journal.get(key)
+    if entry is not None and (entry.content_hash != item.ingest_hash or entry.rid != item.rid or entry.field != field):
+        entry = None
+    if entry is not None and entry.state == UPLOADED:
+        return
+
+    offset = 0
+    if entry is not None:
+        try:
+            offset = await throttle.call(acknowledged_offset, ndb, entry.upload_url)
+            logger.info(f"Resuming upload of {key} at byte {offset}/{size}")
+        except Exception as e:
+            logger.warning(f"Cannot resume upload of {key}, starting over: {e}")
+            entry = None
+
+    if entry is None:
+        md5 = await asyncio.to_thread(file_md5, str(item.path))
+        upload_url = await throttle.call(
+            ndb.start_tus_upload,
+            size=size,
+            filename=item.path.name,
+            field=field,
+            rid=item.rid,
+            md5=md5,
+            content_type=content_type,
+            extract_strategy=extract_strategy,
+            split_strategy=split_strategy,
+            language=language,
+        )
+        entry = JournalEntry(
+            path=key,
+            content_hash=item.ingest_hash,
+            rid=item.rid,
+            field=field,
+            upload_url=upload_url,
+            size=size,
+        )
+        journal.save(entry)
+
+    with open(item.path, "rb") as f:
+        retrying = False
+
+        async def patch_chunk() -> int:
+            nonlocal offset, retrying
+            if retrying:
+                # The failed PATCH may have stored part of its chunk before
+                # the connection dropped, so carry on from what the server has
+                offset = await acknowledged_offset(ndb, entry.upload_url)
+            retrying = True
+            f.seek(offset)
+            chunk = await asyncio.to_thread(f.read, chunk_size)
+            return await ndb.patch_tus_upload(upload_url=entry.upload_url, data=chunk, offset=offset)
+
+        while offset < size:
+            sent, retrying = offset, False
+            offset = await throttle.call(patch_chunk)
+            item.bytes_uploaded += offset - sent
+            entry.offset = offset
+            journal.save(entry)
+
+    entry.state = UPLOADED
+    journal.save(entry)
+
+
+@kb
+async def default_kb_client(**kwargs):
+    """
+    The KB client SDK resource calls use by default: the KB set with
+    ``nuclia auth`` (or by config.get_kb_client from KB_URL/KB_API_KEY).
+    """
+    return kwargs["ndb"]
+
+
+async def upload_file(
+    item: IngestItem,
     extract_strategy: str | None = None,
     split_strategy: str | None = None,
     language: str = "en",
-    interpret_tables: bool = True,
-    blank_line_splitter: bool = False,
-) -> tuple[str, bool]:
-    """Upload or update file in Nuclia KB with change detection."""
-    # Validate file path before processing
-    validated_path = validate_file_path(path)
-    path_str = str(validated_path)
-    
-    slug = safe_slug_from_filename(path_str)
-    current_hash = slug
+    interpret_tables: bool | None = None,
+    blank_line_splitter: bool | None = None,
+    journal: UploadJournal | None = None,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    type_options: dict[str, dict] | None = None,
+) -> None:
+    """
+    Create the resource if needed, upload the file and record its hash.
+
+    Upload options start from the file type's defaults, then the arguments
+    that were given, then ``type_options[<type name>]`` overrides.
+
+    The ingest_hash update is journaled too: a file whose bytes all arrived
+    before a crash only gets its metadata written on the next run.
+    """
     res_api = sdk.AsyncNucliaResource()
-    is_new = False
+    # One client for create, TUS and metadata so they all hit the same KB
+    ndb = await default_kb_client()
 
-    try:
-        res = await res_api.get(slug=slug, show=["basic", "extra"])
-        rid = normalize_id(res)
-
-        extra_obj = getattr(res, "extra", None)
-        extra_dict = (
-            extra_obj.model_dump()
-            if hasattr(extra_obj, "model_dump")
-            else (extra_obj.dict() if hasattr(extra_obj, "dict") else {})
-        )
-        prev_hash = ((extra_dict or {}).get("metadata", {}) or {}).get("ingest_hash")
+    if item.is_new:
+        with timed(item.timings, "create"):
+            resource = await create_resource(res_api, item, ndb)
+        item.rid = normalize_id(resource)
 
-        if prev_hash == current_hash:
-            return rid, False
+    # Upload into the field the resource already has (resources from older
+    # versions used random field ids), and drop any extra copies afterwards
+    field, stale = FILE_FIELD, []
+    if not item.is_new:
+        existing = await file_fields(res_api, item.rid, ndb)
+        if existing and FILE_FIELD not in existing:
+            field = existing[0]
+        stale = [f for f in existing if f != field]
 
-    except Exception as e:
-        if (ndb_exceptions and isinstance(e, ndb_exceptions.NotFoundError)) or "Resource does not exist" in str(e):
-            resource = await res_api.create(title=Path(path_str).name, slug=slug)
-            rid = normalize_id(resource)
-            is_new = True
-        else:
-            raise
-
-    uploader = sdk.AsyncNucliaUpload()
-    file_ext = Path(path_str).suffix.lower()
-    mimetype = "application/pdf" if file_ext == ".pdf" else None
-
-    upload_kwargs = {
-        "path": path_str,
-        "rid": rid,
-        "extra": {"metadata": {"language": language}},
-        "interpretTables": interpret_tables,
-        "blanklineSplitter": blank_line_splitter,
+    options = dict(item.file_type.options) if item.file_type else {}
+    given = {
+        "extract_strategy": extract_strategy,
+        "split_strategy": split_strategy,
+        "interpret_tables": interpret_tables,
+        "blank_line_splitter": blank_line_splitter,
     }
+    options.update((name, value) for name, value in given.items() if value is not None)
+    if item.file_type:
+        options.update((type_options or {}).get(item.file_type.name, {}))
+
+    content_type = item.file_type.mimetype if item.file_type else None
+    content_type = content_type or mimetypes.guess_type(item.path.name)[0] or "application/octet-stream"
+    if options.get("interpret_tables"):
+        content_type += "+aitable"
+    if options.get("blank_line_splitter"):
+        content_type += "+blankline"
+
+    with (nullcontext(journal) if journal is not None else UploadJournal(journal_path(DATA_DIR))) as active_journal:
+        with timed(item.timings, "upload"):
+            await send_file(
+                ndb,
+                active_journal,
+                item,
+                content_type,
+                field=field,
+                chunk_size=chunk_size,
+                extract_strategy=options.get("extract_strategy"),
+                split_strategy=options.get("split_strategy"),
+                language=language,
+            )
+        for stale_field in stale:
+            await throttle.call(res_api.delete_field, rid=item.rid, field_type="file", field_id=stale_field, ndb=ndb)
+        with timed(item.timings, "metadata"):
+            await throttle.call(
+                res_api.update, rid=item.rid, extra={"metadata": {"ingest_hash": item.ingest_hash}}, ndb=ndb,
+            )
+        active_journal.remove(manifest_key(item.path))
+    item.status = "Uploaded" if item.is_new else "Updated"
+
+
+async def await_processing(item: IngestItem) -> None:
+    with timed(item.timings, "process"):
+        await wait_until_processed(item.rid)
+    item.processed = True
+
+
+def manifest_entry(item: IngestItem) -> ManifestEntry | None:
+    """The manifest row to write for a finished item, or None if nothing changed."""
+    if item.error or item.stat is None or item.rid is None:
+        return None
+    known = item.known
+    if known is not None and known.matches_stat(item.stat) and not item.processed:
+        return None
+
+    if item.processed:
+        status = manifest_db.PROCESSED
+    elif item.status in ("Uploaded", "Updated"):
+        status = manifest_db.PENDING
+    else:
+        status = known.status if known is not None else manifest_db.UNKNOWN
+
+    entry = manifest_db.new_entry(
+        manifest_key(item.path), item.stat, item.ingest_hash, item.slug, item.rid, status,
+    )
+    if known is not None and item.status == "Already indexed":
+        entry.ingested_at = known.ingested_at
+    return entry
+
 
-    if mimetype:
-        upload_kwargs["mimetype"] = mimetype
-    if extract_strategy:
-        upload_kwargs["extract_strategy"] = extract_strategy
-    if split_strategy:
-        upload_kwargs["split_strategy"] = split_strategy
+async def list_kb_resources(page_size: int = 100) -> dict[str, tuple[str, str]]:
+    """Every resource in the KB as slug -> (rid, processing status), via paged listing."""
+    kb_api = sdk.AsyncNucliaKB()
+    remote = {}
+    page = 0
+    while True:
+        listing = await throttle.call(kb_api.list, page=page, size=page_size)
+        for resource in listing.resources:
+            metadata = getattr(resource, "metadata", None)
+            status = getattr(getattr(metadata, "status", None), "value", None)
+            remote[resource.slug] = (resource.id, (status or manifest_db.UNKNOWN).lower())
+        if listing.pagination is None or listing.pagination.last:
+            break
+        page += 1
+    return remote
 
-    await uploader.file(**upload_kwargs)
-    await res_api.update(rid=rid, extra={"metadata": {"ingest_hash": current_hash}})
 
+async def reconcile_manifest(
+    manifest: Manifest,
+    remote: dict[str, tuple[str, str]] | None = None,
+) -> dict[str, ManifestEntry]:
+    """
+    Reconcile the manifest against the KB with a paged resource listing.
+
+    Entries whose slug no longer exists in the KB are dropped so the file is
+    checked and uploaded again; the rest get the KB's rid and processing status.
+    """
+    if remote is None:
+        remote = await list_kb_resources()
+
+    known = manifest.entries()
+    reconciled = {}
+    for path, entry in known.items():
+        if entry.slug not in remote:
+            manifest.remove(path)
+            continue
+        entry.rid, entry.status = remote[entry.slug]
+        manifest.record(entry)
+        reconciled[path] = entry
+    manifest.flush()
+    print(f"Verified manifest: {len(reconciled)} in KB, {len(known) - len(reconciled)} missing")
+    return reconciled
+
+
+async def upsert_file(
+    path: str,
+    wait: bool = False,
+    extract_strategy: str | None = None,
+    split_strategy: str | None = None,
+    language: str = "en",
+    interpret_tables: bool | None = None,
+    blank_line_splitter: bool | None = None,
+) -> tuple[str, bool]:
+    """Upload or update file in Nuclia KB with change detection."""
+    item = IngestItem(path=Path(path))
+    if not await hash_file(item):
+        if item.status == "Unsupported":
+            raise ValueError(f"Unsupported file type: {item.path}")
+        return item.rid, False
+    if not await check_file(item):
+        return item.rid, False
+
+    await upload_file(
+        item,
+        extract_strategy=extract_strategy,
+        split_strategy=split_strategy,
+        language=language,
+        interpret_tables=interpret_tables,
+        blank_line_splitter=blank_line_splitter,
+    )
     if wait:
-        await wait_until_processed(rid)
+        await await_processing(item)
+
+    return item.rid, item.is_new
+
 
-    return rid, is_new
+def manifest_file(data_dir: Path, manifest_path: Path | None = INGEST_MANIFEST_PATH) -> Path:
+    return manifest_path or data_dir / ".nuclia-manifest.sqlite"
 
 
 async def upload_folder(
     data_dir: Path,
     wait: bool = False,
     split_strategy: str = "PARAGRAPH",
+    check_workers: int = INGEST_CHECK_WORKERS,
+    upload_workers: int = INGEST_UPLOAD_WORKERS,
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+    verify: bool = False,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    include=DEFAULT_INCLUDE,
+    exclude=DEFAULT_EXCLUDE,
+    type_options: dict[str, dict] | None = None,
+    report_path: Path | None = INGEST_REPORT_PATH,
 ) -> dict[str, tuple[str, str]]:
-    """Upload all PDFs from folder."""
+    """
+    Upload all supported documents under folder, recursively.
+
+    Files are picked by the ``include``/``exclude`` glob patterns and typed
+    by content sniffing (pdf, docx, pptx, html, md, txt); ``type_options``
+    overrides upload options per type. Results are keyed by path relative
+    to ``data_dir``.
+
+    The folder is diffed against the local manifest (``data_dir`` /
+    ``.nuclia-manifest.sqlite`` unless ``manifest_path`` is given), so only
+    new or changed files reach the KB. ``verify`` first reconciles the
+    manifest against the KB in bulk. See ``ingest_files`` for the pipeline.
+    """
     if not data_dir.exists():
         raise FileNotFoundError(f"Data directory not found: {data_dir}")
 
-    results = {}
-    pdf_files = list(data_dir.glob("*.pdf"))
+    files = await asyncio.to_thread(discover_files, data_dir, include, exclude)
+    if not files:
+        print(f"No documents found in {data_dir}")
+        return {}
+
+    return await ingest_files(
+        files,
+        data_dir,
+        wait=wait,
+        split_strategy=split_strategy,
+        check_workers=check_workers,
+        upload_workers=upload_workers,
+        manifest_path=manifest_path,
+        verify=verify,
+        chunk_size=chunk_size,
+        type_options=type_options,
+        report_path=report_path,
+    )
+
+
+def result_key(path: Path, data_dir: Path) -> str:
+    try:
+        return path.resolve().relative_to(data_dir.resolve()).as_posix()
+    except ValueError:
+        return path.name
 
-    if not pdf_files:
-        print(f"No PDF files found in {data_dir}")
-        return results
 
-    for pdf_file in pdf_files:
-        rid, is_new = await upsert_file(
-            path=str(pdf_file),
-            wait=wait,
+async def ingest_files(
+    files: list[Path],
+    data_dir: Path,
+    wait: bool = False,
+    split_strategy: str = "PARAGRAPH",
+    check_workers: int = INGEST_CHECK_WORKERS,
+    upload_workers: int = INGEST_UPLOAD_WORKERS,
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+    verify: bool = False,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    type_options: dict[str, dict] | None = None,
+    report_path: Path | None = INGEST_REPORT_PATH,
+) -> dict[str, tuple[str, str]]:
+    """
+    Create or update the given files in the KB.
+
+    Files flow through a staged pipeline (hash, check, upload, then await
+    processing), each stage with its own worker pool, so uploads of later
+    files overlap with Nuclia processing of earlier ones. Uploads are chunked
+    and journaled, so re-running after a crash resumes partially sent files.
+
+    Per-file phase timings are summarized (p50/p95 and throughput) at the
+    end and, with ``report_path``, written out as JSON or CSV.
+    """
+    results = {}
+    report = IngestReport()
+    with Manifest(manifest_file(data_dir, manifest_path)) as manifest, \
+            UploadJournal(journal_path(data_dir)) as journal:
+        known = await reconcile_manifest(manifest) if verify else manifest.entries()
+
+        upload = functools.partial(
+            upload_file,
             language="en",
-            interpret_tables=True,
-            blank_line_splitter=False,
             split_strategy=split_strategy,
+            journal=journal,
+            chunk_size=chunk_size,
+            type_options=type_options,
         )
-        status = "Uploaded" if is_new else "Already indexed"
-        results[pdf_file.name] = (rid, status)
-        print(f"{status}: {pdf_file.name} → {rid}")
 
+        stages = [
+            Stage("hash", functools.partial(hash_file, known=known), INGEST_HASH_WORKERS),
+            Stage("check", check_file, check_workers),
+            Stage("upload", upload, upload_workers),
+        ]
+        if wait:
+            stages.append(Stage("process", await_processing, INGEST_PROCESS_WORKERS))
+
+        def on_error(item: IngestItem, stage: str, e: Exception):
+            item.error = f"{stage}: {e}"
+            item.status = "Failed"
+
+        def on_done(item: IngestItem):
+            key = result_key(item.path, data_dir)
+            results[key] = (item.rid, item.status)
+            report.record(FileTiming(
+                path=key,
+                status=item.status,
+                rid=item.rid,
+                size=item.stat.st_size if item.stat else 0,
+                bytes_uploaded=item.bytes_uploaded,
+                error=item.error,
+                timings=item.timings,
+            ))
+            entry = manifest_entry(item)
+            if entry is not None:
+                manifest.record(entry)
+            if item.error:
+                print(f"Failed: {key} ({item.error})")
+            else:
+                print(f"{item.status}: {key} → {item.rid}")
+
+        def on_progress(rid: str, status: str, finished: int, total: int):
+            print(f"Processing {status.lower()}: {rid} ({finished}/{total})")
+
+        tracker = get_tracker()
+        if wait:
+            tracker.add_progress_callback(on_progress)
+        throttled_before = throttle.stats()
+        try:
+            await run_pipeline(
+                (IngestItem(path=path) for path in files),
+                stages,
+                queue_size=INGEST_QUEUE_SIZE,
+                on_done=on_done,
+                on_error=on_error,
+            )
+        finally:
+            tracker.remove_progress_callback(on_progress)
+        throttled = {key: value - throttled_before[key] for key, value in throttle.stats().items()}
+        if throttled["retries"] or throttled["throttled_seconds"] >= 0.1:
+            print(
+                f"Throttled {throttled['throttled_seconds']:.1f}s across {throttled['retries']} retries "
+                f"({throttled['rate_limited']} rate-limited)"
+            )
+    report.finish()
+    print(report.format_summary())
+    if report_path:
+        report.write(report_path)
+        print(f"Wrote ingest report to {report_path}")
+    return results
+
+
+async def delete_files(
+    paths: list[Path],
+    data_dir: Path,
+    workers: int = INGEST_UPLOAD_WORKERS,
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+) -> dict[str, tuple[str | None, str]]:
+    """
+    Delete the KB resources of files that are gone from ``data_dir``.
+
+    The rid comes from the manifest when known; otherwise the resource is
+    deleted by the slug the file would have had. Resources that no longer
+    exist are treated as already deleted.
+    """
+    results = {}
+    res_api = sdk.AsyncNucliaResource()
+    root = data_dir.resolve()
+    semaphore = asyncio.Semaphore(max(1, workers))
+
+    with Manifest(manifest_file(data_dir, manifest_path)) as manifest:
+        async def delete(path: Path):
+            path = path if path.is_absolute() else root / path
+            key = path.relative_to(root).as_posix()
+            entry = manifest.get(key)
+            rid = entry.rid if entry is not None else None
+            async with semaphore:
+                try:
+                    if rid:
+                        await throttle.call(res_api.delete, rid=rid)
+                    else:
+                        await throttle.call(res_api.delete, slug=safe_slug_from_path(str(path), root))
+                    status = "Deleted"
+                except Exception as e:
+                    if not is_not_found(e):
+                        logger.error(f"Failed to delete {key}: {e}")
+                        results[key] = (rid, "Failed")
+                        print(f"Failed: {key} ({e})")
+                        return
+                    status = "Not in KB"
+            manifest.remove(key)
+            results[key] = (rid, status)
+            print(f"{status}: {key}")
+
+        await asyncio.gather(*(delete(path) for path in paths))
     return results
@@ -0,0 +1,151 @@
+"""Per-file and per-stage ingestion timings, with a JSON/CSV report and a throughput summary."""
+import csv
+import json
+import time
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+
+# Timed phases, in pipeline order
+PHASES = ("hash", "check", "create", "upload", "metadata", "process")
+
+
+@contextmanager
+def timed(timings: dict[str, float], phase: str):
+    """Add the time spent in the block to ``timings[phase]``, even if it raises."""
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        timings[phase] = timings.get(phase, 0.0) + time.perf_counter() - started
+
+
+def percentile(values: list[float], q: float) -> float:
+    """Linearly interpolated percentile (``q`` in 0-100); 0.0 for no values."""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = (len(ordered) - 1) * q / 100
+    low = int(rank)
+    high = min(low + 1, len(ordered) - 1)
+    return ordered[low] + (ordered[high] - ordered[low]) * (rank - low)
+
+
+@dataclass
+class FileTiming:
+    path: str
+    status: str
+    rid: str | None = None
+    size: int = 0
+    bytes_uploaded: int = 0
+    error: str | None = None
+    timings: dict[str, float] = field(default_factory=dict)
+
+    @property
+    def upload_rate(self) -> float | None:
+        """Bytes per second actually sent, or None if nothing was uploaded."""
+        seconds = self.timings.get("upload")
+        if not self.bytes_uploaded or not seconds:
+            return None
+        return self.bytes_uploaded / seconds
+
+
+class IngestReport:
+    """
+    Collects a ``FileTiming`` per ingested file.
+
+    Phase timings are measured around our own work and each Nuclia call, so
+    hashing, the network (check, create, upload, metadata) and Nuclia-side
+    processing can be told apart; the gap between their sum and the wall
+    time is time spent queued between pipeline stages.
+    """
+
+    def __init__(self, clock=time.perf_counter):
+        self.clock = clock
+        self.files: list[FileTiming] = []
+        self.started_at = datetime.now(timezone.utc)
+        self._started = clock()
+        self.wall_seconds: float | None = None
+
+    def record(self, timing: FileTiming) -> None:
+        self.files.append(timing)
+
+    def finish(self) -> None:
+        self.wall_seconds = self.clock() - self._started
+
+    def summary(self) -> dict:
+        wall = self.wall_seconds if self.wall_seconds is not None else self.clock() - self._started
+        uploaded = sum(f.bytes_uploaded for f in self.files)
+        statuses: dict[str, int] = {}
+        for f in self.files:
+            statuses[f.status] = statuses.get(f.status, 0) + 1
+
+        phases = {}
+        for phase in PHASES:
+            values = [f.timings[phase] for f in self.files if phase in f.timings]
+            if values:
+                phases[phase] = {
+                    "count": len(values),
+                    "total": sum(values),
+                    "p50": percentile(values, 50),
+                    "p95": percentile(values, 95),
+                    "max": max(values),
+                }
+        rates = [rate for rate in (f.upload_rate for f in self.files) if rate is not None]
+        if rates and "upload" in phases:
+            phases["upload"]["bytes_per_second_p50"] = percentile(rates, 50)
+            phases["upload"]["bytes_per_second_p95"] = percentile(rates, 95)
+
+        return {
+            "started_at": self.started_at.isoformat(),
+            "wall_seconds": wall,
+            "files": len(self.files),
+            "statuses": statuses,
+            "bytes_uploaded": uploaded,
+            "files_per_second": len(self.files) / wall if wall > 0 else 0.0,
+            "bytes_per_second": uploaded / wall if wall > 0 else 0.0,
+            "phases": phases,
+        }
+
+    def write(self, path: Path) -> None:
+        """Write the report as CSV (one row per file) for a .csv path, JSON otherwise."""
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix.lower() == ".csv":
+            columns = ["path", "status", "rid", "size", "bytes_uploaded", "upload_bytes_per_second"]
+            columns += [f"{phase}_seconds" for phase in PHASES] + ["error"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=columns)
+                writer.writeheader()
+                for timing in self.files:
+                    row = {key: value for key, value in asdict(timing).items() if key != "timings"}
+                    row["upload_bytes_per_second"] = timing.upload_rate
+                    row.update({f"{phase}_seconds": timing.timings.get(phase) for phase in PHASES})
+                    writer.writerow(row)
+        else:
+            document = self.summary()
+            document["items"] = [{**asdict(f), "upload_bytes_per_second": f.upload_rate} for f in self.files]
+            path.write_text(json.dumps(document, indent=2))
+
+    def format_summary(self) -> str:
+        summary = self.summary()
+        statuses = ", ".join(f"{status} {count}" for status, count in sorted(summary["statuses"].items()))
+        lines = [
+            f"Ingested {summary['files']} files in {summary['wall_seconds']:.1f}s: "
+            f"{summary['files_per_second']:.2f} files/s, {_megabytes(summary['bytes_per_second'])}/s uploaded"
+            + (f" ({statuses})" if statuses else "")
+        ]
+        for phase, stats in summary["phases"].items():
+            line = (
+                f"  {phase:<9} n={stats['count']:<5} p50 {stats['p50']:.2f}s  "
+                f"p95 {stats['p95']:.2f}s  total {stats['total']:.1f}s"
+            )
+            if "bytes_per_second_p50" in stats:
+                line += f"  {_megabytes(stats['bytes_per_second_p50'])}/s p50"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+def _megabytes(n: float) -> str:
+    return f"{n / (1024 * 1024):.2f} MB"
@@ -1,23 +1,172 @@
 """Nuclia document ingestion and search."""
 import asyncio
+from pathlib import Path
+
 import click
-from config import DATA_DIR
+from config import (
+    DATA_DIR,
+    INGEST_CHECK_WORKERS,
+    INGEST_UPLOAD_WORKERS,
+    INGEST_CHUNK_SIZE,
+    INGEST_MAX_RETRIES,
+    INGEST_RATE_BURST,
+    INGEST_RATE_LIMIT,
+    INGEST_REPORT_PATH,
+    WATCH_DEBOUNCE,
+    WATCH_MAX_BATCH,
+    WATCH_POLL_INTERVAL,
+)
 from indexing import upload_folder
+from filetypes import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, parse_type_options
+from ratelimit import throttle
+from sync import sync_folder
+from watcher import watch_folder
 from legacy_tests import test_semantic, test_hybrid, test_comparison, test_all
 from cli import cli
 
 
+def type_options_callback(ctx, param, value):
+    try:
+        return parse_type_options(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+
+
+include_option = click.option(
+    "--include", multiple=True, default=DEFAULT_INCLUDE, show_default=True,
+    help="Glob of files to ingest, matched against the relative path or name (repeatable).",
+)
+exclude_option = click.option(
+    "--exclude", multiple=True, default=DEFAULT_EXCLUDE, show_default=True,
+    help="Glob of files or folders to skip (repeatable).",
+)
+type_option = click.option(
+    "--type-option", "type_options", multiple=True, callback=type_options_callback,
+    help="Per-type upload option, e.g. pdf.split_strategy=PARAGRAPH or txt.blank_line_splitter=false (repeatable).",
+)
+
+
+def rate_limit_options(command):
+    """Shared --rate-limit/--burst/--max-retries, applied to the ingestion throttle before the command runs."""
+    def configure(ctx, param, value):
+        if value is not None:
+            throttle.configure(**{param.name: value})
+        return value
+
+    for option in reversed([
+        click.option("--rate-limit", "rate", type=float, callback=configure, expose_value=False,
+                     help=f"Nuclia requests per second during ingestion, 0 to disable [default: {INGEST_RATE_LIMIT:g}]."),
+        click.option("--burst", type=float, callback=configure, expose_value=False,
+                     help=f"Requests allowed in a burst above the rate [default: {INGEST_RATE_BURST:g}]."),
+        click.option("--max-retries", type=int, callback=configure, expose_value=False,
+                     help=f"Retries of a call on 429/5xx or connection errors [default: {INGEST_MAX_RETRIES}]."),
+    ]):
+        command = option(command)
+    return command
+
+
 @cli.command()
 @click.option("--wait/--no-wait", default=True)
 @click.option("--split-strategy", default="PARAGRAPH")
-def upload(wait: bool, split_strategy: str):
+@click.option("--check-workers", default=INGEST_CHECK_WORKERS, show_default=True, help="Concurrent KB existence checks.")
+@click.option("--upload-workers", default=INGEST_UPLOAD_WORKERS, show_default=True, help="Concurrent file uploads.")
+@click.option("--verify", is_flag=True, help="Reconcile the local manifest against the KB before diffing.")
+@click.option("--chunk-size", default=INGEST_CHUNK_SIZE, show_default=True, help="Upload chunk size in bytes.")
+@click.option("--sync", is_flag=True, help="Also delete resources of removed files and relink renamed ones.")
+@click.option("--prune-unknown", is_flag=True, help="With --sync, also delete KB resources not uploaded from the data folder.")
+@click.option("--dry-run", is_flag=True, help="With --sync, only print what would be relinked or deleted.")
+@click.option("--yes", is_flag=True, help="With --prune-unknown, really delete; otherwise the sync is a dry run.")
+@click.option(
+    "--report", "report_path", type=click.Path(dir_okay=False, path_type=Path), default=INGEST_REPORT_PATH,
+    help="Write per-file stage timings here (.csv for CSV, otherwise JSON).",
+)
+@include_option
+@exclude_option
+@type_option
+@rate_limit_options
+def upload(
+    wait: bool,
+    split_strategy: str,
+    check_workers: int,
+    upload_workers: int,
+    verify: bool,
+    chunk_size: int,
+    sync: bool,
+    prune_unknown: bool,
+    dry_run: bool,
+    yes: bool,
+    report_path: Path | None,
+    include: tuple[str, ...],
+    exclude: tuple[str, ...],
+    type_options: dict[str, dict],
+):
     """Upload all documents from data folder."""
     click.echo("Uploading documents...")
-    result = asyncio.run(upload_folder(DATA_DIR, wait=wait, split_strategy=split_strategy))
+    options = dict(
+        wait=wait,
+        split_strategy=split_strategy,
+        check_workers=check_workers,
+        upload_workers=upload_workers,
+        chunk_size=chunk_size,
+        include=include,
+        exclude=exclude,
+        type_options=type_options,
+        report_path=report_path,
+    )
+    if sync and prune_unknown and not (dry_run or yes):
+        click.echo("--prune-unknown deletes KB resources; showing the plan only. Re-run with --yes to apply it.")
+        dry_run = True
+    if sync:
+        result = asyncio.run(sync_folder(DATA_DIR, prune_unknown=prune_unknown, dry_run=dry_run, **options))
+    else:
+        result = asyncio.run(upload_folder(DATA_DIR, verify=verify, **options))
     click.echo("Upload complete.")
     click.echo(result)
 
 
+@cli.command()
+@click.option("--wait/--no-wait", default=False)
+@click.option("--split-strategy", default="PARAGRAPH")
+@click.option("--debounce", default=WATCH_DEBOUNCE, show_default=True, help="Seconds of quiet before a batch is ingested.")
+@click.option("--batch-size", default=WATCH_MAX_BATCH, show_default=True, help="Maximum files per batch.")
+@click.option("--polling", is_flag=True, help="Poll for changes instead of using inotify.")
+@click.option("--poll-interval", default=WATCH_POLL_INTERVAL, show_default=True, help="Seconds between polls.")
+@click.option("--initial-scan/--no-initial-scan", default=True, help="Ingest changes made while not watching first.")
+@include_option
+@exclude_option
+@type_option
+@rate_limit_options
+def watch(
+    wait: bool,
+    split_strategy: str,
+    debounce: float,
+    batch_size: int,
+    polling: bool,
+    poll_interval: float,
+    initial_scan: bool,
+    include: tuple[str, ...],
+    exclude: tuple[str, ...],
+    type_options: dict[str, dict],
+):
+    """Watch the data folder and ingest changes as they happen."""
+    try:
+        asyncio.run(watch_folder(
+            DATA_DIR,
+            wait=wait,
+            split_strategy=split_strategy,
+            debounce=debounce,
+            max_batch=batch_size,
+            polling=polling,
+            poll_interval=poll_interval,
+            initial_scan=initial_scan,
+            include=include,
+            exclude=exclude,
+            type_options=type_options,
+        ))
+    except KeyboardInterrupt:
+        click.echo("Stopped watching.")
+
+
 async def test_workflow():
     """Complete workflow: upload and search."""
     print("\n" + "=" * 80)
@@ -0,0 +1,121 @@
+"""Local SQLite manifest of ingested files, used to skip unchanged files without asking the KB."""
+import sqlite3
+import time
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+
+PROCESSED = "processed"
+PENDING = "pending"
+ERROR = "error"
+UNKNOWN = "unknown"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    content_hash TEXT NOT NULL,
+    slug TEXT NOT NULL,
+    rid TEXT,
+    ingested_at REAL NOT NULL,
+    status TEXT NOT NULL
+)
+"""
+
+
+@dataclass
+class ManifestEntry:
+    """What we last sent to the KB for one file."""
+    path: str
+    size: int
+    mtime_ns: int
+    content_hash: str
+    slug: str
+    rid: str | None
+    ingested_at: float
+    status: str = UNKNOWN
+
+    def matches_stat(self, stat) -> bool:
+        """True when size and mtime are unchanged, so the file need not be re-hashed."""
+        return self.size == stat.st_size and self.mtime_ns == stat.st_mtime_ns
+
+
+_COLUMNS = ", ".join(f.name for f in fields(ManifestEntry))
+_PLACEHOLDERS = ", ".join("?" for _ in fields(ManifestEntry))
+
+
+class Manifest:
+    """
+    SQLite-backed record of path, size, content hash, rid, last ingest time
+    and processing status for every file uploaded from DATA_DIR.
+
+    Writes are buffered and committed in batches so a run over thousands of
+    files costs a handful of transactions rather than one fsync per file.
+    """
+
+    def __init__(self, path: str | Path, batch_size: int = 256):
+        self.path = Path(path)
+        self.batch_size = batch_size
+        self._pending: dict[str, ManifestEntry | None] = {}
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> "Manifest":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def entries(self) -> dict[str, ManifestEntry]:
+        """Load every entry in one query, keyed by path."""
+        self.flush()
+        rows = self._conn.execute(f"SELECT {_COLUMNS} FROM files")
+        return {row[0]: ManifestEntry(*row) for row in rows}
+
+    def get(self, path: str) -> ManifestEntry | None:
+        if path in self._pending:
+            return self._pending[path]
+        row = self._conn.execute(f"SELECT {_COLUMNS} FROM files WHERE path = ?", (path,)).fetchone()
+        return ManifestEntry(*row) if row else None
+
+    def record(self, entry: ManifestEntry) -> None:
+        self._pending[entry.path] = entry
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def remove(self, path: str) -> None:
+        self._pending[path] = None
+        if len(self._pending) >= self.batch_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if not self._pending:
+            return
+        upserts = [astuple(e) for e in self._pending.values() if e is not None]
+        deletes = [(path,) for path, e in self._pending.items() if e is None]
+        with self._conn:
+            if upserts:
+                self._conn.executemany(f"INSERT OR REPLACE INTO files ({_COLUMNS}) VALUES ({_PLACEHOLDERS})", upserts)
+            if deletes:
+                self._conn.executemany("DELETE FROM files WHERE path = ?", deletes)
+        self._pending.clear()
+
+    def close(self) -> None:
+        self.flush()
+        self._conn.close()
+
+
+def new_entry(path: str, stat, content_hash: str, slug: str, rid: str | None, status: str) -> ManifestEntry:
+    return ManifestEntry(
+        path=path,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        content_hash=content_hash,
+        slug=slug,
+        rid=rid,
+        ingested_at=time.time(),
+        status=status,
+    )
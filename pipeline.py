@@ -0,0 +1,90 @@
+"""Staged asyncio pipeline with a bounded queue and worker pool per stage."""
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Any, AsyncIterable, Awaitable, Callable, Iterable
+
+logger = logging.getLogger(__name__)
+
+_DONE = object()
+
+
+@dataclass
+class Stage:
+    """
+    One pipeline step.
+
+    ``fn`` is awaited once per item. Returning False drops the item from the
+    rest of the pipeline (e.g. an unchanged file needs no upload); raising
+    marks the item as failed and drops it too.
+    """
+    name: str
+    fn: Callable[[Any], Awaitable[bool | None]]
+    workers: int = 1
+
+
+async def run_pipeline(
+    items: Iterable[Any] | AsyncIterable[Any],
+    stages: list[Stage],
+    queue_size: int = 64,
+    on_done: Callable[[Any], None] | None = None,
+    on_error: Callable[[Any, str, Exception], None] | None = None,
+) -> None:
+    """
+    Feed items through every stage, with all stages running concurrently.
+
+    Each stage reads from its own bounded queue, so a slow stage applies
+    back-pressure upstream instead of buffering the whole input. ``on_done``
+    is called for every item once it leaves the pipeline, whether it ran
+    every stage, was dropped early or failed.
+    """
+    queues = [asyncio.Queue(maxsize=queue_size) for _ in stages]
+
+    def finish(item):
+        if on_done is not None:
+            on_done(item)
+
+    async def worker(index: int, stage: Stage):
+        inbox = queues[index]
+        outbox = queues[index + 1] if index + 1 < len(queues) else None
+        while True:
+            item = await inbox.get()
+            if item is _DONE:
+                return
+            try:
+                keep = await stage.fn(item)
+            except Exception as e:
+                logger.error(f"Stage {stage.name} failed: {e}")
+                if on_error is not None:
+                    on_error(item, stage.name, e)
+                finish(item)
+                continue
+            if keep is False or outbox is None:
+                finish(item)
+            else:
+                await outbox.put(item)
+
+    async def run_stage(index: int, stage: Stage):
+        await asyncio.gather(*(worker(index, stage) for _ in range(max(1, stage.workers))))
+        # Every worker of this stage is done: release the next stage's workers
+        if index + 1 < len(stages):
+            for _ in range(max(1, stages[index + 1].workers)):
+                await queues[index + 1].put(_DONE)
+
+    async def feed():
+        if hasattr(items, "__aiter__"):
+            async for item in items:
+                await queues[0].put(item)
+        else:
+            for item in items:
+                await queues[0].put(item)
+        for _ in range(max(1, stages[0].workers)):
+            await queues[0].put(_DONE)
+
+    tasks = [asyncio.create_task(run_stage(i, stage)) for i, stage in enumerate(stages)]
+    tasks.append(asyncio.create_task(feed()))
+    try:
+        await asyncio.gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
@@ -0,0 +1,102 @@
+"""Client-side fusion and top-k selection of ranked search results."""
+import heapq
+from typing import Any, Callable, Hashable, Iterable, Sequence
+
+# A ranked list: (key, raw score) pairs, best first
+Ranking = Sequence[tuple[Hashable, float]]
+
+RRF_K = 60
+
+
+def _dedupe(ranking: Ranking) -> list[tuple[Hashable, float]]:
+    """Keep only the best-ranked occurrence of each key."""
+    seen = set()
+    unique = []
+    for key, score in ranking:
+        if key not in seen:
+            seen.add(key)
+            unique.append((key, score))
+    return unique
+
+
+def max_score_fusion(rankings: Sequence[Ranking], weights: Sequence[float] | None = None) -> dict:
+    """Legacy behaviour: keep the highest raw score seen for each key."""
+    fused = {}
+    for ranking in rankings:
+        for key, score in ranking:
+            score = score or 0.0
+            fused[key] = max(fused.get(key, score), score)
+    return fused
+
+
+def reciprocal_rank_fusion(
+    rankings: Sequence[Ranking],
+    weights: Sequence[float] | None = None,
+    k: int = RRF_K,
+) -> dict:
+    """
+    Score each key by sum(weight / (k + rank)) over the lists it appears in.
+
+    Only positions matter, so lists with incomparable score scales (BM25 vs
+    cosine similarity) can be combined directly.
+    """
+    weights = weights or [1.0] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        for rank, (key, _) in enumerate(_dedupe(ranking), start=1):
+            fused[key] = fused.get(key, 0.0) + weight / (k + rank)
+    return fused
+
+
+def linear_fusion(rankings: Sequence[Ranking], weights: Sequence[float] | None = None) -> dict:
+    """Min-max normalize each list's scores to [0, 1] and take a weighted sum."""
+    weights = weights or [1.0 / len(rankings)] * len(rankings)
+    fused = {}
+    for ranking, weight in zip(rankings, weights):
+        ranking = _dedupe(ranking)
+        if not ranking:
+            continue
+        scores = [score or 0.0 for _, score in ranking]
+        low, high = min(scores), max(scores)
+        spread = high - low
+        for (key, _), score in zip(ranking, scores):
+            normalized = (score - low) / spread if spread else 1.0
+            fused[key] = fused.get(key, 0.0) + weight * normalized
+    return fused
+
+
+FUSION_METHODS = {
+    "max": max_score_fusion,
+    "rrf": lambda rankings, weights=None: reciprocal_rank_fusion(rankings),
+    "weighted_rrf": reciprocal_rank_fusion,
+    "linear": linear_fusion,
+}
+
+
+def fuse(method: str, rankings: Sequence[Ranking], weights: Sequence[float] | None = None) -> dict:
+    """Fuse ranked lists with the named method, returning key -> fused score."""
+    try:
+        fusion = FUSION_METHODS[method]
+    except KeyError:
+        raise ValueError(f"Unknown fusion method: {method}") from None
+    return fusion(rankings, weights)
+
+
+def score_of(result: dict) -> float:
+    return result.get("score") or 0.0
+
+
+def top_k(
+    items: Iterable[Any],
+    k: int,
+    key: Callable[[Any], float] = score_of,
+) -> list[Any]:
+    """
+    Return the k highest-scoring items, best first, in O(n log k).
+
+    Items are consumed as a stream through a bounded heap, so a large
+    candidate set never needs a full sort. Ties keep their input order.
+    """
+    if k <= 0:
+        return []
+    return heapq.nlargest(k, items, key=key)
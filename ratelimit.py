@@ -0,0 +1,223 @@
+"""Token-bucket rate limiting and retry policy shared by every Nuclia call made during ingestion."""
+import asyncio
+import email.utils
+import logging
+import random
+import re
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+
+import httpx
+
+from config import INGEST_RATE_LIMIT, INGEST_RATE_BURST, INGEST_MAX_RETRIES
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+_STATUS_IN_MESSAGE = re.compile(r"Status code (\d{3})")
+
+
+class TokenBucket:
+    """
+    Async token bucket: ``rate`` tokens per second, bursting up to ``capacity``.
+
+    Callers reserve tokens up front and sleep off any deficit, so waiters are
+    served in arrival order without a lock. A rate of 0 disables limiting.
+    """
+
+    def __init__(self, rate: float, capacity: float | None = None, clock: Callable[[], float] = time.monotonic):
+        self.clock = clock
+        self.configure(rate, capacity)
+
+    def configure(self, rate: float, capacity: float | None = None) -> None:
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = self.clock()
+
+    def _refill(self) -> None:
+        now = self.clock()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, tokens: float = 1.0) -> float:
+        """Take ``tokens``, sleeping until they are available; returns the seconds waited."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        self.tokens -= tokens
+        if self.tokens >= 0:
+            return 0.0
+        delay = -self.tokens / self.rate
+        await asyncio.sleep(delay)
+        return delay
+
+    def try_acquire(self, tokens: float = 1.0) -> bool:
+        """Take ``tokens`` only if they are available right now; never waits."""
+        if self.rate <= 0:
+            return True
+        self._refill()
+        if self.tokens < tokens:
+            return False
+        self.tokens -= tokens
+        return True
+
+    def refund(self, tokens: float = 1.0) -> None:
+        """Give back ``tokens`` taken for work that was then refused."""
+        self._refill()
+        self.tokens = min(self.capacity, self.tokens + tokens)
+
+    def wait_time(self, tokens: float = 1.0) -> float:
+        """Seconds until ``tokens`` would be available."""
+        if self.rate <= 0:
+            return 0.0
+        self._refill()
+        return max(0.0, (tokens - self.tokens) / self.rate)
+
+    def penalize(self, seconds: float) -> None:
+        """Hold every caller back for ``seconds``, e.g. after the server asked us to slow down."""
+        if self.rate <= 0:
+            return
+        self._refill()
+        self.tokens = min(self.tokens, -seconds * self.rate)
+
+
+def status_code_of(error: Exception) -> int | None:
+    response = getattr(error, "response", None)
+    status = getattr(response, "status_code", None)
+    if isinstance(status, int):
+        return status
+    # The nuclia SDK raises plain exceptions for non-httpx responses
+    match = _STATUS_IN_MESSAGE.search(str(error))
+    return int(match.group(1)) if match else None
+
+
+def is_rate_limited(error: Exception) -> bool:
+    return type(error).__name__ == "RateLimitError" or status_code_of(error) == 429
+
+
+def is_retryable(error: Exception) -> bool:
+    """429s, 5xx responses and transport failures (connect/read errors, timeouts)."""
+    if isinstance(error, httpx.TransportError) or is_rate_limited(error):
+        return True
+    return status_code_of(error) in RETRYABLE_STATUS
+
+
+def is_refused(error: Exception) -> bool:
+    """
+    429s and 503s: the server turned the request away without acting on it,
+    so even a non-idempotent call is safe to send again. A transport error
+    or other 5xx may have arrived after the work was done.
+    """
+    return is_rate_limited(error) or status_code_of(error) == 503
+
+
+def retry_after(error: Exception) -> float | None:
+    """
+    Seconds the server asked us to wait, if it said.
+
+    Reads the Retry-After header (seconds or HTTP date) or the ``try_after``
+    attribute NucliaDB sets on rate-limit errors (an epoch timestamp).
+    """
+    try_after = getattr(error, "try_after", None)
+    if isinstance(try_after, (int, float)):
+        return max(0.0, try_after - time.time()) if try_after > 1e9 else float(try_after)
+
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    value = headers.get("Retry-After") if hasattr(headers, "get") else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Exponential backoff with full jitter, capped at ``max_delay``."""
+    max_retries: int = INGEST_MAX_RETRIES
+    base_delay: float = 0.5
+    max_delay: float = 30.0
+
+    def backoff(self, attempt: int) -> float:
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+class Throttle:
+    """
+    Run Nuclia calls through a shared token bucket and retry policy.
+
+    A Retry-After from the server pauses the whole bucket, so every
+    concurrent worker backs off together instead of each one hammering the
+    quota; other retryable failures back off per call. Time spent waiting
+    on either is accumulated in ``throttled_seconds``.
+    """
+
+    def __init__(self, bucket: TokenBucket, policy: RetryPolicy):
+        self.bucket = bucket
+        self.policy = policy
+        self.throttled_seconds = 0.0
+        self.retries = 0
+        self.rate_limited = 0
+
+    def configure(self, rate: float | None = None, burst: float | None = None, max_retries: int | None = None) -> None:
+        if rate is not None or burst is not None:
+            self.bucket.configure(
+                self.bucket.rate if rate is None else rate,
+                self.bucket.capacity if burst is None else burst,
+            )
+        if max_retries is not None:
+            self.policy.max_retries = max_retries
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "throttled_seconds": self.throttled_seconds,
+            "retries": self.retries,
+            "rate_limited": self.rate_limited,
+        }
+
+    async def call(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        return await self._call(fn, is_retryable, args, kwargs)
+
+    async def call_non_idempotent(self, fn: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Like ``call``, but only retry requests the server refused outright (see ``is_refused``)."""
+        return await self._call(fn, is_refused, args, kwargs)
+
+    async def _call(self, fn: Callable[..., Awaitable[Any]], retryable: Callable[[Exception], bool], args, kwargs) -> Any:
+        attempt = 0
+        while True:
+            self.throttled_seconds += await self.bucket.acquire()
+            try:
+                return await fn(*args, **kwargs)
+            except Exception as e:
+                if attempt >= self.policy.max_retries or not retryable(e):
+                    raise
+                wait = retry_after(e)
+                self.retries += 1
+                if is_rate_limited(e):
+                    self.rate_limited += 1
+                if wait is not None and self.bucket.rate > 0:
+                    # Paid for on the next acquire, by this and every other caller
+                    self.bucket.penalize(wait)
+                    delay = 0.0
+                elif wait is not None:
+                    # No bucket to pause, so at least this call honours it
+                    delay = wait
+                else:
+                    delay = self.policy.backoff(attempt)
+                logger.warning(
+                    f"Nuclia call failed ({e}); retry {attempt + 1}/{self.policy.max_retries} "
+                    f"in {wait if wait is not None else delay:.1f}s"
+                )
+                self.throttled_seconds += delay
+                await asyncio.sleep(delay)
+                attempt += 1
+
+
+throttle = Throttle(TokenBucket(INGEST_RATE_LIMIT, INGEST_RATE_BURST), RetryPolicy())
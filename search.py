@@ -1,48 +1,134 @@
+from contextlib import asynccontextmanager
+
 from nuclia import sdk
 from nucliadb_models.search import SearchRequest, FindRequest, SearchOptions, FindOptions, ResourceProperties
 
-
+from admission import AdmissionController
+from cache import ResultCache, cached_search
+from client import get_search_client
+from ranking import FUSION_METHODS, fuse, top_k
+from singleflight import SingleFlight, coalesced
+from metrics import LOCAL_DURATION, UPSTREAM_DURATION, UPSTREAM_ERRORS, registry
+from tracing import span
+from config import SEARCH_CACHE_TTL, SEARCH_CACHE_MAX_ENTRIES, SEARCH_CACHE_MAX_BYTES
+
+result_cache = ResultCache(
+    ttl=SEARCH_CACHE_TTL,
+    max_entries=SEARCH_CACHE_MAX_ENTRIES,
+    max_bytes=SEARCH_CACHE_MAX_BYTES,
+)
+search_flight = SingleFlight()
+upstream_limiter = AdmissionController()
+
+registry.counter("search_cache_hits_total", "Result cache hits.", callback=lambda: result_cache.stats()["hits"])
+registry.counter("search_cache_misses_total", "Result cache misses.", callback=lambda: result_cache.stats()["misses"])
+registry.counter("search_cache_evictions_total", "Result cache evictions.", callback=lambda: result_cache.stats()["evictions"])
+registry.gauge("search_cache_hit_ratio", "Result cache hits / lookups since start.", callback=lambda: result_cache.stats()["hit_ratio"])
+registry.gauge("search_cache_entries", "Entries in the result cache.", callback=lambda: result_cache.stats()["entries"])
+registry.gauge("search_cache_bytes", "Estimated size of the result cache.", callback=lambda: result_cache.stats()["bytes"])
+registry.gauge("search_upstream_in_flight", "Distinct Nuclia searches in flight after coalescing.", callback=lambda: search_flight.stats()["in_flight"])
+registry.counter("search_coalesced_total", "Searches that joined an identical in-flight call.", callback=lambda: search_flight.stats()["collapsed"])
+registry.gauge("search_admission_queue_depth", "Nuclia calls waiting for a concurrency slot.", callback=lambda: upstream_limiter.queue_depth)
+registry.gauge("search_admission_in_flight", "Nuclia calls holding a concurrency slot.", callback=lambda: upstream_limiter.in_flight)
+registry.counter(
+    "search_admission_shed_total", "Nuclia calls refused with 503, per reason.", ["reason"],
+    callback=lambda: {(reason,): count for reason, count in upstream_limiter.shed.items()},
+)
+
+# Resource properties Nuclia returns with each hit. "minimal" ships none of
+# them; the others let callers opt in to resource values at a payload cost.
+PROJECTIONS = {
+    "minimal": [],
+    "basic": [ResourceProperties.BASIC],
+    "values": [ResourceProperties.BASIC, ResourceProperties.VALUES],
+    "full": [ResourceProperties.BASIC, ResourceProperties.VALUES, ResourceProperties.EXTRA],
+}
+
+
+def resource_properties(projection: str) -> list[ResourceProperties]:
+    try:
+        return PROJECTIONS[projection]
+    except KeyError:
+        raise ValueError(f"Unknown projection: {projection}") from None
+
+
+@asynccontextmanager
+async def upstream_call(search_type: str):
+    """
+    Run a Nuclia search/find call under the shared concurrency limit, timing
+    it (metrics and request trace) and counting its failures. Raises
+    admission.Overloaded when no slot frees up in time.
+    """
+    async with upstream_limiter.slot():
+        try:
+            with UPSTREAM_DURATION.time(search_type=search_type), span("upstream"):
+                yield
+        except Exception:
+            UPSTREAM_ERRORS.inc(search_type=search_type)
+            raise
+
+
+@coalesced(search_flight, "semantic")
+@cached_search(result_cache, "semantic")
 async def search_semantic(
     query: str,
     page_size: int = 5,
     min_score: float | None = None,
+    projection: str = "minimal",
 ) -> list[dict]:
     """Semantic-only search using /search endpoint."""
     search_api = sdk.AsyncNucliaSearch()
+    ndb = await get_search_client()
     req = SearchRequest(
         query=query,
         top_k=page_size,
-        show=[ResourceProperties.VALUES, ResourceProperties.EXTRA],
+        show=resource_properties(projection),
         features=[SearchOptions.SEMANTIC],
     )
     if min_score is not None:
         req.min_score = min_score
 
-    res = await search_api.search(query=req)
-    data = res.model_dump()
-    results = []
+    async with upstream_call("semantic"):
+        res = await search_api.search(query=req, ndb=ndb)
 
-    sentences = data.get("sentences", {}) or {}
-    for result in sentences.get("results", []):
-        results.append({
-            "rid": result.get("rid"),
-            "score": result.get("score"),
-            "text": result.get("text"),
-            "field": result.get("field"),
-            "search_type": "semantic",
-        })
-
-    return results[:page_size]
+    with LOCAL_DURATION.time(search_type="semantic", phase="parse"), span("extraction"):
+        results = []
+        for result in iter_section_results(res, "sentences"):
+            results.append({
+                "rid": _field(result, "rid"),
+                "score": _field(result, "score"),
+                "text": _field(result, "text"),
+                "field": _field(result, "field"),
+                "search_type": "semantic",
+            })
+        return attach_resources(res, results[:page_size], projection)
 
 
+@coalesced(search_flight, "hybrid")
+@cached_search(result_cache, "hybrid")
 async def search_hybrid(
     query: str,
     page_size: int = 5,
     min_score_semantic: float | None = None,
     min_score_bm25: float = 0.0,
+    fusion: str = "max",
+    semantic_weight: float = 0.5,
+    projection: str = "minimal",
 ) -> list[dict]:
-    """Hybrid search: semantic + fulltext using /search endpoint."""
+    """
+    Hybrid search: semantic + fulltext using /search endpoint.
+
+    Semantic and fulltext hits are combined client-side with the ``fusion``
+    method from ranking.FUSION_METHODS ("max", "rrf", "weighted_rrf" or
+    "linear"); ``semantic_weight`` sets the semantic share for weighted
+    methods. Rank-based methods need no over-fetch, so only "max" requests
+    ``page_size * 2`` hits.
+    """
+    if fusion not in FUSION_METHODS:
+        raise ValueError(f"Unknown fusion method: {fusion}")
+
     search_api = sdk.AsyncNucliaSearch()
+    ndb = await get_search_client()
 
     min_score_dict = {}
     if min_score_semantic is not None:
@@ -52,67 +138,115 @@ async def search_hybrid(
 
     req = SearchRequest(
         query=query,
-        top_k=page_size * 2,
-        show=[ResourceProperties.VALUES, ResourceProperties.EXTRA],
+        top_k=page_size * 2 if fusion == "max" else page_size,
+        show=resource_properties(projection),
         features=[SearchOptions.SEMANTIC, SearchOptions.FULLTEXT],
     )
     if min_score_dict:
         req.min_score = min_score_dict
 
-    res = await search_api.search(query=req)
-    data = res.model_dump()
-
-    results_map = {}
-    for result_type in ["sentences", "fulltext"]:
-        results_data = data.get(result_type, {}) or {}
-        for result in results_data.get("results", []):
-            key = f"{result.get('rid')}:{result.get('field')}:{result.get('index')}"
-            if key in results_map:
-                results_map[key]["score"] = max(results_map[key]["score"], result.get("score", 0))
-            else:
-                results_map[key] = {
-                    "rid": result.get("rid"),
-                    "score": result.get("score", 0),
-                    "text": result.get("text", ""),
-                    "field": result.get("field"),
-                    "search_type": "hybrid",
-                }
-
-    sorted_results = sorted(results_map.values(), key=lambda x: x["score"], reverse=True)
-    return sorted_results[:page_size]
-
-
+    async with upstream_call("hybrid"):
+        res = await search_api.search(query=req, ndb=ndb)
+
+    with LOCAL_DURATION.time(search_type="hybrid", phase="parse"), span("extraction"):
+        results_map = {}
+        rankings = []
+        for result_type in ["sentences", "fulltext"]:
+            ranking = []
+            for result in iter_section_results(res, result_type):
+                rid, field = _field(result, "rid"), _field(result, "field")
+                key = f"{rid}:{field}:{_field(result, 'index')}"
+                ranking.append((key, _field(result, "score", 0)))
+                if key not in results_map:
+                    results_map[key] = {
+                        "rid": rid,
+                        "score": 0,
+                        "text": _field(result, "text", ""),
+                        "field": field,
+                        "search_type": "hybrid",
+                    }
+            ranking.sort(key=lambda item: item[1] or 0, reverse=True)
+            rankings.append(ranking)
+
+        fused = fuse(fusion, rankings, weights=[semantic_weight, 1 - semantic_weight])
+        for key, score in fused.items():
+            results_map[key]["score"] = score
+
+        return attach_resources(res, top_k(results_map.values(), page_size), projection)
+
+
+@coalesced(search_flight, "merged")
+@cached_search(result_cache, "merged")
 async def search_merged(
     query: str = "Search query",
     page_size: int = 5,
     min_score: float | None = None,
+    projection: str = "minimal",
 ) -> list[dict]:
     """Merged+ranked search using /find endpoint with rank fusion."""
     search_api = sdk.AsyncNucliaSearch()
+    ndb = await get_search_client()
     req = FindRequest(
         query=query,
         top_k=page_size,
-        show=[ResourceProperties.VALUES, ResourceProperties.EXTRA],
+        show=resource_properties(projection),
         features=[FindOptions.SEMANTIC, FindOptions.KEYWORD],
     )
     if min_score is not None:
         req.min_score = min_score
 
-    res = await search_api.find(query=req)
-    data = res.model_dump()
+    async with upstream_call("merged"):
+        res = await search_api.find(query=req, ndb=ndb)
 
-    resources = data.get("resources") or {}
-    paragraphs = []
+    with LOCAL_DURATION.time(search_type="merged", phase="parse"), span("extraction"):
+        return attach_resources(res, top_k(iter_find_paragraphs(res), page_size), projection)
 
+
+def _field(obj, name: str, default=None):
+    """Read one value from an SDK response model or from raw JSON."""
+    value = obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+    return default if value is None else value
+
+
+def iter_section_results(res, section: str):
+    """
+    Yield the hits of one /search section ("sentences", "fulltext", ...).
+
+    Reads straight from the response instead of model_dump(), so resource
+    values and extra metadata are never copied.
+    """
+    block = _field(res, section)
+    if block is None:
+        return
+    yield from _field(block, "results") or []
+
+
+def iter_find_paragraphs(res):
+    """Yield paragraph hits from a /find response, in no particular order."""
+    resources = _field(res, "resources") or {}
     for rid, resource in resources.items():
-        for field_id, field in (resource.get("fields") or {}).items():
-            for paragraph in (field.get("paragraphs") or {}).values():
-                paragraphs.append({
+        for field_id, field in (_field(resource, "fields") or {}).items():
+            for paragraph in (_field(field, "paragraphs") or {}).values():
+                yield {
                     "rid": rid,
-                    "score": paragraph.get("score"),
-                    "text": paragraph.get("text"),
+                    "score": _field(paragraph, "score"),
+                    "text": _field(paragraph, "text"),
                     "field": field_id,
                     "search_type": "merged",
-                })
+                }
+
 
-    return paragraphs[:page_size]
+def attach_resources(res, results: list[dict], projection: str) -> list[dict]:
+    """Add the projected resource payload to each returned hit (not for "minimal")."""
+    if projection == "minimal":
+        return results
+    resources = _field(res, "resources") or {}
+    for result in results:
+        resource = resources.get(result["rid"])
+        if resource is None:
+            continue
+        if isinstance(resource, dict):
+            result["resource"] = {k: v for k, v in resource.items() if k != "fields"}
+        else:
+            result["resource"] = resource.model_dump(exclude={"fields"}, exclude_none=True)
+    return results
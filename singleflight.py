@@ -0,0 +1,79 @@
+"""Single-flight coalescing of identical in-flight search calls."""
+import asyncio
+import functools
+import inspect
+from typing import Any, Awaitable, Callable, Hashable
+
+from cache import call_key
+from tracing import span
+
+
+class SingleFlight:
+    """
+    Share one upstream task between concurrent callers using the same key.
+
+    The first caller for a key starts the work; callers arriving while it is
+    still running await the same task instead of issuing their own request.
+    Callers are shielded from each other: cancelling one does not cancel the
+    shared task.
+    """
+
+    def __init__(self):
+        self._in_flight: dict[Hashable, asyncio.Task] = {}
+        self.executions = 0
+        self.collapsed = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Any:
+        task = self._in_flight.get(key)
+        if task is None or task.get_loop() is not asyncio.get_running_loop():
+            task = asyncio.ensure_future(fn())
+            self._in_flight[key] = task
+            task.add_done_callback(functools.partial(self._finished, key))
+            self.executions += 1
+            leader = True
+        else:
+            self.collapsed += 1
+            leader = False
+
+        if leader:
+            result = await asyncio.shield(task)
+        else:
+            # The upstream spans land in the leader's trace; a follower's own
+            # trace still has to show the time it spent waiting on that call
+            with span("coalesced"):
+                result = await asyncio.shield(task)
+        if leader or not isinstance(result, list):
+            return result
+        # Followers get their own copies so nobody mutates a shared list
+        return [dict(r) if isinstance(r, dict) else r for r in result]
+
+    def stats(self) -> dict[str, int]:
+        """Counters for monitoring how many callers were collapsed."""
+        return {
+            "in_flight": len(self._in_flight),
+            "executions": self.executions,
+            "collapsed": self.collapsed,
+        }
+
+    def _finished(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._in_flight.get(key) is task:
+            del self._in_flight[key]
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not task.cancelled():
+            task.exception()
+
+
+def coalesced(group: SingleFlight, strategy: str):
+    """Decorate an async search strategy so identical concurrent calls share one run."""
+    def decorator(func):
+        signature = inspect.signature(func)
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            key = call_key(signature, strategy, args, kwargs)
+            return await group.do(key, lambda: func(*args, **kwargs))
+
+        wrapper.flight = group
+        return wrapper
+
+    return decorator
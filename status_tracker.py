@@ -0,0 +1,209 @@
+"""Shared tracker that waits for many resources to finish processing from a single polling loop."""
+import asyncio
+import logging
+import random
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Iterable
+
+from nuclia import sdk
+from nucliadb_models.metadata import ResourceProcessingStatus
+
+from config import (
+    PROCESSING_POLL_MIN_INTERVAL,
+    PROCESSING_POLL_MAX_INTERVAL,
+    PROCESSING_STATUS_RPS,
+    PROCESSING_TIMEOUT,
+)
+from ratelimit import throttle
+
+logger = logging.getLogger(__name__)
+
+# Called as on_progress(rid, status, finished, total) whenever a watched rid settles
+ProgressCallback = Callable[[str, str, int, int], None]
+
+
+@dataclass
+class _Watch:
+    rid: str
+    future: asyncio.Future
+    deadline: float
+    interval: float
+    next_poll: float
+
+
+class ProcessingTracker:
+    """
+    Wait for many resources to reach PROCESSED while sharing one poll loop.
+
+    Each watched rid is polled on its own schedule, starting at
+    ``min_interval`` and backing off by ``backoff`` up to ``max_interval``
+    while it stays pending, with +/- ``jitter`` spread so polls do not
+    synchronize. All polls draw from one budget of ``requests_per_second``,
+    so a large ingest costs a bounded status-call rate no matter how many
+    resources are being waited on; a rate of 0 disables the budget. The loop exits as soon as the last
+    watched resource settles.
+    """
+
+    def __init__(
+        self,
+        min_interval: float = PROCESSING_POLL_MIN_INTERVAL,
+        max_interval: float = PROCESSING_POLL_MAX_INTERVAL,
+        backoff: float = 1.5,
+        jitter: float = 0.2,
+        requests_per_second: float = PROCESSING_STATUS_RPS,
+        timeout: float = PROCESSING_TIMEOUT,
+        on_progress: ProgressCallback | None = None,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.backoff = backoff
+        self.jitter = jitter
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.clock = clock
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.requests = 0
+        self.finished = 0
+        self.total = 0
+        self._callbacks: list[ProgressCallback] = [on_progress] if on_progress else []
+        self._watches: dict[str, _Watch] = {}
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+
+    def add_progress_callback(self, callback: ProgressCallback) -> None:
+        self._callbacks.append(callback)
+
+    def remove_progress_callback(self, callback: ProgressCallback) -> None:
+        if callback in self._callbacks:
+            self._callbacks.remove(callback)
+
+    def watch(self, rid: str, timeout: float | None = None) -> asyncio.Future:
+        """Start tracking ``rid``; the returned future resolves to the processed resource."""
+        existing = self._watches.get(rid)
+        if existing is not None:
+            return existing.future
+
+        self.loop = asyncio.get_running_loop()
+        now = self.clock()
+        watch = _Watch(
+            rid=rid,
+            future=self.loop.create_future(),
+            deadline=now + (timeout if timeout is not None else self.timeout),
+            interval=self.min_interval,
+            next_poll=now + self._jittered(self.min_interval),
+        )
+        self._watches[rid] = watch
+        self.total += 1
+        self._ensure_running()
+        return watch.future
+
+    async def wait(self, rid: str, timeout: float | None = None) -> Any:
+        # Shielded so a cancelled waiter does not cancel the shared future
+        return await asyncio.shield(self.watch(rid, timeout))
+
+    async def wait_all(self, rids: Iterable[str], timeout: float | None = None) -> list[Any]:
+        return await asyncio.gather(*(self.wait(rid, timeout) for rid in rids))
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "watching": len(self._watches),
+            "finished": self.finished,
+            "total": self.total,
+            "requests": self.requests,
+        }
+
+    def _jittered(self, interval: float) -> float:
+        return interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def _ensure_running(self) -> None:
+        if self._task is None or self._task.done():
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+        else:
+            self._wakeup.set()
+
+    async def _run(self) -> None:
+        res_api = sdk.AsyncNucliaResource()
+        unthrottled = self.requests_per_second <= 0
+        capacity = max(1.0, self.requests_per_second)
+        tokens = capacity
+        refilled_at = self.clock()
+
+        while self._watches:
+            now = self.clock()
+            if not unthrottled:
+                tokens = min(capacity, tokens + (now - refilled_at) * self.requests_per_second)
+            refilled_at = now
+
+            for watch in [w for w in self._watches.values() if now >= w.deadline]:
+                self._finish(watch, "TIMEOUT", error=TimeoutError(f"Timed out waiting for {watch.rid}"))
+
+            due = sorted((w for w in self._watches.values() if w.next_poll <= now), key=lambda w: w.next_poll)
+            batch = due if unthrottled else due[:int(tokens)]
+            if batch:
+                if not unthrottled:
+                    tokens -= len(batch)
+                await asyncio.gather(*(self._poll(res_api, watch) for watch in batch))
+                continue
+            if not self._watches:
+                break
+
+            # Sleep until the next poll or deadline, a budget token, or a new watch
+            wake_at = min(min(w.next_poll, w.deadline) for w in self._watches.values())
+            delay = max(wake_at - now, 0.0)
+            if due and not unthrottled:
+                delay = max(delay, (1 - tokens) / self.requests_per_second)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _poll(self, res_api, watch: _Watch) -> None:
+        self.requests += 1
+        status = None
+        try:
+            res = await throttle.call(res_api.get, rid=watch.rid, show=["basic"])
+            status = res.metadata.status
+        except Exception as e:
+            logger.warning(f"Status check failed for {watch.rid}: {e}")
+
+        if watch.rid not in self._watches:
+            return
+        if status == ResourceProcessingStatus.PROCESSED:
+            self._finish(watch, "PROCESSED", result=res)
+        elif status == ResourceProcessingStatus.ERROR:
+            self._finish(watch, "ERROR", error=RuntimeError(f"Processing failed for {watch.rid}"))
+        else:
+            watch.interval = min(watch.interval * self.backoff, self.max_interval)
+            watch.next_poll = self.clock() + self._jittered(watch.interval)
+
+    def _finish(self, watch: _Watch, status: str, result: Any = None, error: Exception | None = None) -> None:
+        del self._watches[watch.rid]
+        self.finished += 1
+        if not watch.future.done():
+            if error is not None:
+                watch.future.set_exception(error)
+                # Nobody may be awaiting any more; avoid "exception never retrieved"
+                watch.future.exception()
+            else:
+                watch.future.set_result(result)
+        for callback in list(self._callbacks):
+            try:
+                callback(watch.rid, status, self.finished, self.total)
+            except Exception as e:
+                logger.error(f"Progress callback failed: {e}")
+
+
+_tracker: ProcessingTracker | None = None
+
+
+def get_tracker() -> ProcessingTracker:
+    """Process-wide tracker, rebuilt if the running event loop has changed."""
+    global _tracker
+    loop = asyncio.get_running_loop()
+    if _tracker is None or (_tracker.loop is not None and _tracker.loop is not loop):
+        _tracker = ProcessingTracker()
+    return _tracker
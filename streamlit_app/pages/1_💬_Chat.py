@@ -50,6 +50,13 @@ with st.sidebar:
     if strategy != get_strategy():
         set_strategy(strategy)
     
+    # Streaming mode: run every strategy and show each as soon as it returns
+    stream_all = st.toggle(
+        "⚡ Stream all strategies",
+        value=False,
+        help="Run semantic, hybrid and merged together and show the fastest first"
+    )
+    
     st.divider()
     
     # Strategy descriptions
@@ -139,6 +146,41 @@ if user_query:
     # Execute search
     client = get_api_client()
     
+    if stream_all:
+        try:
+            with st.spinner("Searching with all strategies..."):
+                for event in client.search_stream(user_query, ["semantic", "hybrid", "merged"]):
+                    event_strategy = event["search_type"]
+                    results = event.get("results", [])
+                    
+                    if event.get("error"):
+                        answer = f"❌ {event_strategy.title()} failed: {event['error']}"
+                    else:
+                        answer = f"{event_strategy.title()} found {len(results)} result{'s' if len(results) != 1 else ''} in {event['latency_ms']:.0f} ms."
+                    
+                    add_message(
+                        "assistant",
+                        answer,
+                        metadata={
+                            "strategy": event_strategy,
+                            "result_count": len(results),
+                            "results": results
+                        }
+                    )
+                    
+                    # Show each strategy as soon as it arrives
+                    with chat_container:
+                        with st.chat_message("assistant"):
+                            st.caption(f"Strategy: {event_strategy} • Results: {len(results)}")
+                            st.write(answer)
+                            if results:
+                                with st.expander("📄 View Search Results", expanded=False):
+                                    render_search_results(results, max_results=5, show_scores=True)
+        except Exception as e:
+            add_message("assistant", f"❌ Error: {str(e)}", metadata={"error": True})
+        
+        st.rerun()
+    
     with st.spinner(f"Searching with {strategy} strategy..."):
         response = safe_search(client, user_query, strategy)
     
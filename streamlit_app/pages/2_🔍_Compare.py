@@ -18,7 +18,7 @@ from utils.display import (
     render_error,
     format_result_count
 )
-from utils.api_client import safe_search
+from utils.api_client import safe_compare
 
 # Page configuration
 st.set_page_config(
@@ -111,31 +111,30 @@ if search_button and query:
             st.info("📦 Using cached results")
             results_by_strategy = cached_results
         else:
-            # Execute searches
+            # Execute all strategies concurrently in one request
             client = get_api_client()
             results_by_strategy = {}
+            latency_by_strategy = {}
             
-            # Progress tracking
-            progress_bar = st.progress(0)
-            status_text = st.empty()
+            with st.spinner(f"Searching with {len(selected_strategies)} strategies..."):
+                response = safe_compare(client, query, selected_strategies)
             
-            for i, strategy in enumerate(selected_strategies):
-                status_text.text(f"Searching with {strategy} strategy...")
-                
-                response = safe_search(client, query, strategy)
-                
-                if response["success"]:
-                    results_by_strategy[strategy] = response["results"]
-                else:
+            if response["success"]:
+                for strategy, outcome in response["strategies"].items():
+                    results_by_strategy[strategy] = outcome["results"]
+                    latency_by_strategy[strategy] = outcome["latency_ms"]
+                    if outcome.get("error"):
+                        st.warning(f"❌ {strategy.title()} failed: {outcome['error']}")
+            else:
+                st.error(f"❌ Comparison failed: {response['error']}")
+                for strategy in selected_strategies:
                     results_by_strategy[strategy] = []
-                    st.warning(f"❌ {strategy.title()} failed: {response['error']}")
-                
-                # Update progress
-                progress_bar.progress((i + 1) / len(selected_strategies))
             
-            # Clear progress indicators
-            progress_bar.empty()
-            status_text.empty()
+            if latency_by_strategy:
+                st.caption(" • ".join(
+                    f"{strategy.title()}: {latency:.0f} ms"
+                    for strategy, latency in latency_by_strategy.items()
+                ))
             
             # Cache results
             cache_comparison_results(query, results_by_strategy)
@@ -12,7 +12,7 @@ Tests cover all requirements from API Integration Contract:
 - Health check
 """
 import pytest
-from unittest.mock import Mock, patch
+from unittest.mock import MagicMock, Mock, patch
 import requests
 
 
@@ -216,6 +216,61 @@ class TestSearchAPIClient:
             timeout=30
         )
     
+    # Compare tests
+    
+    @patch('requests.post')
+    def test_compare_success(self, mock_post, client):
+        """Test compare sends one request and returns per-strategy results."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_response.json.return_value = {
+            "query": "test",
+            "strategies": {
+                "semantic": {"results": [{"text": "a", "score": 0.9, "source": "f"}], "latency_ms": 120.0, "error": None},
+                "merged": {"results": [], "latency_ms": 80.0, "error": None}
+            },
+            "latency_ms": 121.0
+        }
+        mock_post.return_value = mock_response
+        
+        strategies = client.compare("  test  ", ["semantic", "merged"])
+        
+        assert strategies["semantic"]["results"][0]["text"] == "a"
+        assert strategies["merged"]["latency_ms"] == 80.0
+        mock_post.assert_called_once_with(
+            "http://localhost:8000/search/compare",
+            json={"query": "test", "strategies": ["semantic", "merged"], "page_size": 5},
+            timeout=30
+        )
+    
+    def test_compare_invalid_strategy_error(self, client):
+        """Test that compare validates strategies before sending."""
+        with pytest.raises(ValueError, match="Invalid search_type"):
+            client.compare("test", ["semantic", "keyword"])
+        
+        with pytest.raises(ValueError, match="at least one strategy"):
+            client.compare("test", [])
+    
+    # Streaming tests
+    
+    @patch('requests.post')
+    def test_search_stream_yields_events_in_arrival_order(self, mock_post, client):
+        """Test streaming yields one event per strategy and stops at done."""
+        mock_response = MagicMock()
+        mock_response.iter_lines.return_value = [
+            b'{"search_type": "merged", "results": [], "latency_ms": 50.0}',
+            b'',
+            b'{"search_type": "semantic", "results": [{"text": "a", "score": 0.9, "source": "f"}], "latency_ms": 90.0}',
+            b'{"done": true, "latency_ms": 91.0}'
+        ]
+        mock_post.return_value.__enter__.return_value = mock_response
+        
+        events = list(client.search_stream("test", ["semantic", "merged"]))
+        
+        assert [e["search_type"] for e in events] == ["merged", "semantic"]
+        assert mock_post.call_args[1]["stream"] is True
+        assert mock_post.call_args[0][0] == "http://localhost:8000/search/stream"
+    
     # Health check tests
     
     @patch('requests.get')
@@ -229,8 +284,8 @@ class TestSearchAPIClient:
         
         assert is_healthy is True
         mock_get.assert_called_once_with(
-            "http://localhost:8000/docs",
-            timeout=5
+            "http://localhost:8000/readyz",
+            timeout=2
         )
     
     @patch('requests.get')
@@ -252,6 +307,32 @@ class TestSearchAPIClient:
         is_healthy = client.health_check()
         
         assert is_healthy is False
+    
+    @patch('requests.get')
+    def test_health_check_result_is_cached(self, mock_get, client):
+        """Test repeated health checks within the TTL reuse one request."""
+        mock_response = Mock()
+        mock_response.status_code = 200
+        mock_get.return_value = mock_response
+        
+        assert client.health_check() is True
+        mock_response.status_code = 503
+        assert client.health_check() is True
+        assert mock_get.call_count == 1
+    
+    @patch('requests.get')
+    def test_health_check_refreshes_after_ttl(self, mock_get):
+        """Test a health check result expires after its TTL."""
+        from utils.api_client import SearchAPIClient
+        
+        client = SearchAPIClient("http://localhost:8000", health_ttl=0)
+        mock_get.side_effect = requests.ConnectionError("Connection refused")
+        assert client.health_check() is False
+        
+        mock_get.side_effect = None
+        mock_get.return_value = Mock(status_code=200)
+        assert client.health_check() is True
+        assert mock_get.call_count == 2
 
 
 class TestSearchAPIClientInitialization:
@@ -5,8 +5,10 @@ This module provides the SearchAPIClient class for executing search queries
 against the backend API with comprehensive error handling and validation.
 """
 import os
+import json
+import time
 import requests
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterator, Optional
 from dotenv import load_dotenv
 
 
@@ -14,6 +16,8 @@ from dotenv import load_dotenv
 load_dotenv()
 API_BASE_URL = os.getenv("API_BASE_URL", "http://localhost:8000")
 API_TIMEOUT = int(os.getenv("API_TIMEOUT", "30"))
+# Seconds a health check result is reused across Streamlit reruns
+HEALTH_CHECK_TTL = float(os.getenv("HEALTH_CHECK_TTL", "10"))
 
 
 class SearchAPIClient:
@@ -30,16 +34,19 @@ class SearchAPIClient:
         5
     """
     
-    def __init__(self, base_url: str, timeout: int = 30):
+    def __init__(self, base_url: str, timeout: int = 30, health_ttl: float = HEALTH_CHECK_TTL):
         """
         Initialize the API client.
         
         Args:
             base_url: Base URL of the API server (e.g., "http://localhost:8000")
             timeout: Request timeout in seconds (default: 30)
+            health_ttl: Seconds to reuse a health check result (default: 10)
         """
         self.base_url = base_url.rstrip('/')
         self.timeout = timeout
+        self.health_ttl = health_ttl
+        self._health: Optional[tuple] = None
     
     def search(
         self, 
@@ -104,12 +111,128 @@ class SearchAPIClient:
         # Return results
         return response.json()
     
+    def compare(
+        self,
+        query: str,
+        strategies: List[str],
+        page_size: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Run several search strategies concurrently in a single request.
+        
+        Args:
+            query: Search query string (non-empty)
+            strategies: Strategies to compare (subset of semantic/hybrid/merged)
+            page_size: Maximum results per strategy
+            
+        Returns:
+            Dictionary keyed by strategy, each containing:
+                - results (list): Search results for that strategy
+                - latency_ms (float): Server-side latency of the strategy
+                - error (str|None): Error message if the strategy failed
+            
+        Raises:
+            ValueError: If query is empty or a strategy is invalid
+            requests.ConnectionError: If API server is unreachable
+            requests.Timeout: If request exceeds timeout limit
+            requests.HTTPError: If API returns error status (4xx, 5xx)
+        """
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty")
+        
+        valid_types = ["semantic", "hybrid", "merged"]
+        if not strategies:
+            raise ValueError("Select at least one strategy")
+        for strategy in strategies:
+            if strategy not in valid_types:
+                raise ValueError(
+                    f"Invalid search_type: {strategy}. "
+                    f"Must be one of: {', '.join(valid_types)}"
+                )
+        
+        payload = {
+            "query": query.strip(),
+            "strategies": strategies,
+            "page_size": page_size
+        }
+        
+        response = requests.post(
+            f"{self.base_url}/search/compare",
+            json=payload,
+            timeout=self.timeout
+        )
+        response.raise_for_status()
+        
+        return response.json()["strategies"]
+    
+    def search_stream(
+        self,
+        query: str,
+        strategies: List[str],
+        page_size: int = 5
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Stream per-strategy results from /search/stream as they complete.
+        
+        Args:
+            query: Search query string (non-empty)
+            strategies: Strategies to run (subset of semantic/hybrid/merged)
+            page_size: Maximum results per strategy
+            
+        Yields:
+            One dictionary per strategy, fastest first, containing:
+                - search_type (str): Strategy that produced the results
+                - results (list): Search results for that strategy
+                - latency_ms (float): Server-side latency of the strategy
+                - error (str, optional): Present if the strategy failed
+            
+        Raises:
+            ValueError: If query is empty or a strategy is invalid
+            requests.ConnectionError: If API server is unreachable
+            requests.Timeout: If request exceeds timeout limit
+            requests.HTTPError: If API returns error status (4xx, 5xx)
+        """
+        if not query or not query.strip():
+            raise ValueError("Query cannot be empty")
+        
+        valid_types = ["semantic", "hybrid", "merged"]
+        if not strategies:
+            raise ValueError("Select at least one strategy")
+        for strategy in strategies:
+            if strategy not in valid_types:
+                raise ValueError(
+                    f"Invalid search_type: {strategy}. "
+                    f"Must be one of: {', '.join(valid_types)}"
+                )
+        
+        payload = {
+            "query": query.strip(),
+            "strategies": strategies,
+            "page_size": page_size
+        }
+        
+        with requests.post(
+            f"{self.base_url}/search/stream",
+            json=payload,
+            timeout=self.timeout,
+            stream=True
+        ) as response:
+            response.raise_for_status()
+            for line in response.iter_lines():
+                if not line:
+                    continue
+                event = json.loads(line)
+                if event.get("done"):
+                    break
+                yield event
+    
     def health_check(self) -> bool:
         """
-        Check if the API server is reachable and responding.
+        Check if the API server is ready to serve searches.
         
-        This performs a lightweight check by hitting the /docs endpoint
-        with a short timeout (5 seconds).
+        Hits the /readyz endpoint, which answers from the server's cached
+        KB probe, with a short timeout (2 seconds). The result is reused for
+        ``health_ttl`` seconds so Streamlit reruns do not each make a request.
         
         Returns:
             True if server responds with 200 status, False otherwise
@@ -121,15 +244,22 @@ class SearchAPIClient:
             ...     print("API is unavailable")
             API is healthy
         """
+        now = time.monotonic()
+        if self._health is not None and now - self._health[1] < self.health_ttl:
+            return self._health[0]
+        
         try:
             response = requests.get(
-                f"{self.base_url}/docs",
-                timeout=5
+                f"{self.base_url}/readyz",
+                timeout=2
             )
-            return response.status_code == 200
+            is_healthy = response.status_code == 200
         except Exception:
             # Any exception means server is not healthy
-            return False
+            is_healthy = False
+        
+        self._health = (is_healthy, now)
+        return is_healthy
 
 
 def get_default_client() -> SearchAPIClient:
@@ -229,3 +359,67 @@ def safe_search(
             "results": [],
             "error": f"Unexpected error: {str(e)}"
         }
+
+
+def safe_compare(
+    client: SearchAPIClient,
+    query: str,
+    strategies: List[str],
+    page_size: int = 5
+) -> Dict[str, Any]:
+    """
+    Execute a multi-strategy comparison with comprehensive error handling.
+    
+    Mirrors safe_search() but returns per-strategy results from a single
+    /search/compare request.
+    
+    Returns:
+        Dictionary with keys:
+            - success (bool): Whether the request succeeded
+            - strategies (dict): Per-strategy results/latency/error (empty on error)
+            - error (str|None): Error message if failed, None if successful
+    """
+    try:
+        return {
+            "success": True,
+            "strategies": client.compare(query, strategies, page_size),
+            "error": None
+        }
+    except ValueError as e:
+        return {
+            "success": False,
+            "strategies": {},
+            "error": f"Validation error: {str(e)}"
+        }
+    except requests.ConnectionError:
+        return {
+            "success": False,
+            "strategies": {},
+            "error": (
+                f"Unable to connect to search API. "
+                f"Please ensure the API server is running at {client.base_url}."
+            )
+        }
+    except requests.Timeout:
+        return {
+            "success": False,
+            "strategies": {},
+            "error": "Comparison request timed out. Please try again."
+        }
+    except requests.HTTPError as e:
+        try:
+            error_detail = e.response.json().get("detail", str(e))
+        except Exception:
+            error_detail = str(e)
+        
+        return {
+            "success": False,
+            "strategies": {},
+            "error": f"Comparison failed: {error_detail}"
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "strategies": {},
+            "error": f"Unexpected error: {str(e)}"
+        }
@@ -0,0 +1,216 @@
+"""Sync DATA_DIR with the KB: relink renamed files and delete resources whose files are gone."""
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from pathlib import Path
+
+from nuclia import sdk
+
+from config import (
+    INGEST_CHECK_WORKERS,
+    INGEST_CHUNK_SIZE,
+    INGEST_HASH_WORKERS,
+    INGEST_MANIFEST_PATH,
+    INGEST_REPORT_PATH,
+    INGEST_UPLOAD_WORKERS,
+)
+from filetypes import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, discover_files
+from indexing import (
+    is_not_found,
+    list_kb_resources,
+    manifest_file,
+    reconcile_manifest,
+    upload_folder,
+)
+from manifest import Manifest, ManifestEntry, new_entry
+from ratelimit import throttle
+from utils import file_content_hash, is_path_slug, safe_slug_from_path
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class SyncPlan:
+    """What a sync will change in the KB before uploading new and changed files."""
+    # (orphaned manifest entry, renamed file, its new slug)
+    relinks: list[tuple[ManifestEntry, Path, str]] = field(default_factory=list)
+    # (manifest key or None for resources we never uploaded, rid, slug)
+    deletes: list[tuple[str | None, str, str]] = field(default_factory=list)
+
+
+def find_orphans(root: Path, known: dict[str, ManifestEntry]) -> dict[str, ManifestEntry]:
+    """Manifest entries whose file no longer exists under ``root``."""
+    return {key: entry for key, entry in known.items() if entry.rid and not (root / key).exists()}
+
+
+async def plan_sync(
+    data_dir: Path,
+    manifest: Manifest,
+    remote: dict[str, tuple[str, str]],
+    prune_unknown: bool = False,
+    include=DEFAULT_INCLUDE,
+    exclude=DEFAULT_EXCLUDE,
+) -> SyncPlan:
+    """
+    Diff local files against the manifest and KB listing.
+
+    Manifest entries whose file no longer exists are orphans; entries
+    outside the include/exclude filter are left alone while their file is
+    still there. A new local file with the same content hash as an orphan is
+    a rename, so its resource is relinked to the new slug instead of being
+    deleted and re-uploaded. With ``prune_unknown``, KB resources with a
+    path-based slug (see utils.is_path_slug) that neither match a local file
+    nor appear in the manifest are deleted too; resources under other slugs,
+    such as those from other tools or the legacy mtime scheme, are kept.
+    """
+    root = data_dir.resolve()
+    local = {path.resolve().relative_to(root).as_posix(): path.resolve() for path in discover_files(data_dir, include, exclude)}
+    local_slugs = {key: safe_slug_from_path(str(path), root) for key, path in local.items()}
+    known = manifest.entries()
+    orphans = find_orphans(root, known)
+
+    plan = SyncPlan()
+    by_hash: dict[str, list[ManifestEntry]] = {}
+    for entry in orphans.values():
+        by_hash.setdefault(entry.content_hash, []).append(entry)
+    candidates = [key for key in local if key not in known and local_slugs[key] not in remote]
+
+    if by_hash and candidates:
+        semaphore = asyncio.Semaphore(INGEST_HASH_WORKERS)
+
+        async def content_hash(key: str) -> str:
+            async with semaphore:
+                return await asyncio.to_thread(file_content_hash, str(local[key]))
+
+        hashes = await asyncio.gather(*(content_hash(key) for key in candidates))
+        for key, digest in zip(candidates, hashes):
+            matches = by_hash.get(digest)
+            if matches:
+                plan.relinks.append((matches.pop(), local[key], local_slugs[key]))
+
+    relinked = {entry.path for entry, _, _ in plan.relinks}
+    for key, entry in orphans.items():
+        if key not in relinked:
+            plan.deletes.append((key, entry.rid, entry.slug))
+
+    if prune_unknown:
+        ours = set(local_slugs.values()) | {entry.slug for entry in known.values()}
+        for slug, (rid, _) in remote.items():
+            if slug not in ours and is_path_slug(slug):
+                plan.deletes.append((None, rid, slug))
+    return plan
+
+
+async def apply_sync(
+    plan: SyncPlan,
+    data_dir: Path,
+    manifest: Manifest,
+    workers: int = INGEST_UPLOAD_WORKERS,
+) -> dict[str, tuple[str | None, str]]:
+    """Relink and delete concurrently, keeping the manifest in step with the KB."""
+    root = data_dir.resolve()
+    res_api = sdk.AsyncNucliaResource()
+    semaphore = asyncio.Semaphore(max(1, workers))
+    results = {}
+
+    async def relink(entry: ManifestEntry, path: Path, slug: str):
+        try:
+            async with semaphore:
+                await throttle.call(res_api.update, rid=entry.rid, slug=slug, title=path.name)
+        except Exception as e:
+            logger.error(f"Failed to relink {entry.path}: {e}")
+            key = path.relative_to(root).as_posix()
+            results[key] = (entry.rid, "Failed")
+            print(f"Failed: {entry.path} → {key} ({e})")
+            return
+        key = path.relative_to(root).as_posix()
+        moved = new_entry(key, path.stat(), entry.content_hash, slug, entry.rid, entry.status)
+        moved.ingested_at = entry.ingested_at
+        manifest.remove(entry.path)
+        manifest.record(moved)
+        results[key] = (entry.rid, "Relinked")
+        print(f"Relinked: {entry.path} → {key} ({entry.rid})")
+
+    async def delete(key: str | None, rid: str, slug: str):
+        name = key or slug
+        try:
+            async with semaphore:
+                await throttle.call(res_api.delete, rid=rid)
+        except Exception as e:
+            if not is_not_found(e):
+                logger.error(f"Failed to delete {name}: {e}")
+                results[name] = (rid, "Failed")
+                print(f"Failed: {name} ({e})")
+                return
+        if key:
+            manifest.remove(key)
+        results[name] = (rid, "Deleted")
+        print(f"Deleted: {name} ({rid})")
+
+    await asyncio.gather(
+        *(relink(*relinking) for relinking in plan.relinks),
+        *(delete(*deleting) for deleting in plan.deletes),
+    )
+    manifest.flush()
+    return results
+
+
+async def sync_folder(
+    data_dir: Path,
+    wait: bool = False,
+    split_strategy: str = "PARAGRAPH",
+    check_workers: int = INGEST_CHECK_WORKERS,
+    upload_workers: int = INGEST_UPLOAD_WORKERS,
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+    chunk_size: int = INGEST_CHUNK_SIZE,
+    prune_unknown: bool = False,
+    dry_run: bool = False,
+    include=DEFAULT_INCLUDE,
+    exclude=DEFAULT_EXCLUDE,
+    type_options: dict[str, dict] | None = None,
+    report_path: Path | None = INGEST_REPORT_PATH,
+) -> dict[str, tuple[str | None, str]]:
+    """
+    Make the KB mirror ``data_dir``.
+
+    One paged KB listing reconciles the manifest, renames are relinked and
+    orphaned resources deleted in bulk, then new and changed files are
+    uploaded as in ``upload_folder``. ``dry_run`` only reports the plan.
+    """
+    if not data_dir.exists():
+        raise FileNotFoundError(f"Data directory not found: {data_dir}")
+
+    with Manifest(manifest_file(data_dir, manifest_path)) as manifest:
+        remote = await list_kb_resources()
+        await reconcile_manifest(manifest, remote)
+        plan = await plan_sync(data_dir, manifest, remote, prune_unknown=prune_unknown, include=include, exclude=exclude)
+        print(f"Sync plan: {len(plan.relinks)} to relink, {len(plan.deletes)} to delete")
+
+        if dry_run:
+            results = {}
+            for entry, path, _ in plan.relinks:
+                key = path.relative_to(data_dir.resolve()).as_posix()
+                results[key] = (entry.rid, "Would relink")
+                print(f"Would relink: {entry.path} → {key} ({entry.rid})")
+            for key, rid, slug in plan.deletes:
+                results[key or slug] = (rid, "Would delete")
+                print(f"Would delete: {key or slug} ({rid})")
+            return results
+
+        results = await apply_sync(plan, data_dir, manifest, workers=upload_workers)
+
+    uploaded = await upload_folder(
+        data_dir,
+        wait=wait,
+        split_strategy=split_strategy,
+        check_workers=check_workers,
+        upload_workers=upload_workers,
+        manifest_path=manifest_path,
+        chunk_size=chunk_size,
+        include=include,
+        exclude=exclude,
+        type_options=type_options,
+        report_path=report_path,
+    )
+    # A relinked file is "Already indexed" to the upload; report the relink
+    return {**uploaded, **results}
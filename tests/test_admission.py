@@ -0,0 +1,129 @@
+"""Tests for admission control of outbound Nuclia calls."""
+import asyncio
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import search
+from admission import AdmissionController, Overloaded, deadline
+from api import app
+
+
+async def hold(limiter, seconds):
+    async with limiter.slot():
+        await asyncio.sleep(seconds)
+
+
+@pytest.mark.asyncio
+async def test_caps_concurrency_and_serves_waiters_in_order():
+    limiter = AdmissionController(max_concurrency=2, max_queue=10, max_wait=5)
+    peak = 0
+    order = []
+
+    async def call(i):
+        nonlocal peak
+        async with limiter.slot():
+            order.append(i)
+            peak = max(peak, limiter.in_flight)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(call(i) for i in range(8)))
+
+    assert peak == 2
+    assert order == list(range(8))
+    assert limiter.stats()["in_flight"] == 0 and limiter.queue_depth == 0
+    assert limiter.admitted == 8
+
+
+@pytest.mark.asyncio
+async def test_sheds_when_queue_is_full():
+    limiter = AdmissionController(max_concurrency=1, max_queue=1, max_wait=5)
+    running = asyncio.create_task(hold(limiter, 0.1))
+    queued = asyncio.create_task(hold(limiter, 0))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.reason == "queue_full"
+    assert excinfo.value.retry_after >= 1
+
+    await asyncio.gather(running, queued)
+    assert limiter.shed["queue_full"] == 1
+
+
+@pytest.mark.asyncio
+async def test_sheds_immediately_when_deadline_cannot_be_met():
+    limiter = AdmissionController(max_concurrency=1, max_queue=10, max_wait=5)
+    limiter.service_time = 2.0
+    running = asyncio.create_task(hold(limiter, 0.05))
+    await asyncio.sleep(0)
+
+    with deadline(1.0):
+        with pytest.raises(Overloaded) as excinfo:
+            await limiter.acquire()
+    assert excinfo.value.reason == "deadline"
+    assert excinfo.value.retry_after == 2
+    # Without a tighter deadline the same wait is acceptable
+    await limiter.acquire()
+    limiter.release()
+    await running
+
+
+@pytest.mark.asyncio
+async def test_sheds_after_waiting_max_wait():
+    limiter = AdmissionController(max_concurrency=1, max_queue=10, max_wait=0.02)
+    running = asyncio.create_task(hold(limiter, 0.2))
+    await asyncio.sleep(0)
+
+    with pytest.raises(Overloaded) as excinfo:
+        await limiter.acquire()
+    assert excinfo.value.reason == "timeout"
+    assert limiter.queue_depth == 0
+    await running
+    assert limiter.in_flight == 0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_gives_up_its_place():
+    limiter = AdmissionController(max_concurrency=1, max_queue=10, max_wait=5)
+    running = asyncio.create_task(hold(limiter, 0.05))
+    await asyncio.sleep(0)
+    waiting = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    assert limiter.queue_depth == 1
+
+    waiting.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiting
+    assert limiter.queue_depth == 0
+    await running
+    assert limiter.in_flight == 0
+
+
+def test_search_returns_503_with_retry_after_when_overloaded():
+    limiter = AdmissionController(max_concurrency=1, max_queue=0, max_wait=5)
+    limiter.in_flight = 1
+    search_api = SimpleNamespace(search=AsyncMock())
+
+    with patch.object(search, "upstream_limiter", limiter), \
+            patch("search.sdk.AsyncNucliaSearch", return_value=search_api), \
+            patch("search.get_search_client", AsyncMock()), \
+            patch.object(search.result_cache, "ttl", 0):
+        client = TestClient(app)
+        response = client.post("/search", json={"query": "overloaded", "search_type": "semantic"})
+        compare = client.post("/search/compare", json={"query": "overloaded", "strategies": ["semantic"]})
+
+    assert response.status_code == 503
+    assert response.headers["retry-after"] == "1"
+    assert compare.status_code == 200
+    assert compare.json()["strategies"]["semantic"]["error"] == "Overloaded"
+    search_api.search.assert_not_awaited()
+    assert limiter.shed["queue_full"] == 2
+
+
+def test_admission_metrics_are_exported():
+    text = TestClient(app).get("/metrics").text
+    assert "search_admission_queue_depth" in text
+    assert 'search_admission_shed_total{reason="queue_full"}' in text
@@ -1,4 +1,7 @@
+import asyncio
+import json
 import pytest
+from unittest.mock import patch
 from fastapi.testclient import TestClient
 from api import app
 
@@ -14,3 +17,160 @@ async def test_search_success():
 async def test_search_invalid_search_type():
     response = client.post("/search", json={"query": "test query", "search_type": "invalid"})
     assert response.status_code == 422
+
+@patch('api.search_merged')
+@patch('api.search_hybrid')
+@patch('api.search_semantic')
+def test_search_compare_runs_strategies_concurrently(mock_semantic, mock_hybrid, mock_merged):
+    async def slow_search(query, page_size=5, **kwargs):
+        await asyncio.sleep(0.2)
+        return [{"text": query, "score": 0.5, "field": "f"}]
+
+    mock_semantic.side_effect = slow_search
+    mock_hybrid.side_effect = slow_search
+    mock_merged.side_effect = slow_search
+
+    response = client.post("/search/compare", json={"query": "test query"})
+    assert response.status_code == 200
+    body = response.json()
+    assert set(body["strategies"]) == {"semantic", "hybrid", "merged"}
+    for outcome in body["strategies"].values():
+        assert outcome.get("error") is None
+        assert outcome["results"][0]["text"] == "test query"
+        assert outcome["latency_ms"] >= 200
+    # Wall-clock tracks the slowest strategy, not the sum
+    assert body["latency_ms"] < 500
+
+@patch('api.search_hybrid')
+@patch('api.search_semantic')
+def test_search_compare_reports_timeouts_and_errors(mock_semantic, mock_hybrid):
+    async def hang(query, page_size=5, **kwargs):
+        await asyncio.sleep(10)
+
+    mock_semantic.side_effect = hang
+    mock_hybrid.side_effect = RuntimeError("upstream down")
+
+    response = client.post(
+        "/search/compare",
+        json={"query": "test", "strategies": ["semantic", "hybrid"], "timeout": 0.1},
+    )
+    assert response.status_code == 200
+    strategies = response.json()["strategies"]
+    assert strategies["semantic"]["error"] == "Timed out"
+    assert strategies["hybrid"]["error"] == "Search failed"
+    assert "upstream" not in response.text
+
+def test_search_compare_invalid_strategy():
+    response = client.post("/search/compare", json={"query": "test", "strategies": ["keyword"]})
+    assert response.status_code == 422
+
+@patch('api.search_hybrid')
+def test_search_hybrid_forwards_fusion(mock_hybrid):
+    mock_hybrid.return_value = []
+    response = client.post(
+        "/search",
+        json={"query": "test", "search_type": "hybrid", "fusion": "rrf", "semantic_weight": 0.7},
+    )
+    assert response.status_code == 200
+    mock_hybrid.assert_called_once_with("test", projection="minimal", fusion="rrf", semantic_weight=0.7)
+
+def test_search_invalid_fusion():
+    response = client.post("/search", json={"query": "test", "search_type": "hybrid", "fusion": "borda"})
+    assert response.status_code == 422
+
+@patch('api.search_merged')
+def test_search_projection_returns_resource_payload(mock_merged):
+    mock_merged.return_value = [
+        {"text": "t", "score": 0.5, "field": "f", "resource": {"id": "r1", "title": "Glossary"}},
+    ]
+    response = client.post("/search", json={"query": "test", "projection": "values"})
+    assert response.status_code == 200
+    assert response.json()[0]["resource"]["title"] == "Glossary"
+    mock_merged.assert_called_once_with("test", projection="values")
+
+@patch('api.search_merged')
+def test_search_default_projection_is_minimal(mock_merged):
+    mock_merged.return_value = [{"text": "t", "score": 0.5, "field": "f"}]
+    response = client.post("/search", json={"query": "test"})
+    assert response.json() == [{"text": "t", "score": 0.5, "source": "f"}]
+    mock_merged.assert_called_once_with("test", projection="minimal")
+
+def test_search_invalid_projection():
+    response = client.post("/search", json={"query": "test", "projection": "everything"})
+    assert response.status_code == 422
+
+@patch('api.SEARCH_BATCH_CONCURRENCY', 2)
+@patch('api.search_semantic')
+@patch('api.search_merged')
+def test_search_batch_bounded_and_ordered(mock_merged, mock_semantic):
+    active = 0
+    peak = 0
+
+    async def fake_search(query, page_size=5, **kwargs):
+        nonlocal active, peak
+        active += 1
+        peak = max(peak, active)
+        await asyncio.sleep(0.01)
+        active -= 1
+        if query == "boom":
+            raise RuntimeError("upstream secret")
+        return [{"text": query, "score": 0.5, "field": "f"}][:page_size]
+
+    mock_merged.side_effect = fake_search
+    mock_semantic.side_effect = fake_search
+
+    queries = [{"query": f"q{i}"} for i in range(5)]
+    queries.append({"query": "s", "search_type": "semantic", "page_size": 1})
+    queries.append({"query": "boom"})
+    queries.append({"query": "bad", "search_type": "keyword"})
+
+    response = client.post("/search/batch", json={"queries": queries})
+    assert response.status_code == 200
+    items = response.json()
+    assert [item["results"][0]["text"] for item in items[:6]] == ["q0", "q1", "q2", "q3", "q4", "s"]
+    assert items[6] == {"results": [], "error": "Search failed"}
+    assert items[7]["error"] == "Invalid search_type"
+    assert peak <= 2
+
+def test_search_batch_rejects_empty_batch():
+    response = client.post("/search/batch", json={"queries": []})
+    assert response.status_code == 422
+
+@patch('api.search_merged')
+@patch('api.search_semantic')
+def test_search_stream_ndjson_fast_strategy_first(mock_semantic, mock_merged):
+    async def fast(query, **kwargs):
+        return [{"text": "fast", "score": 0.9, "field": "f"}]
+
+    async def slow(query, **kwargs):
+        await asyncio.sleep(0.2)
+        return [{"text": "slow", "score": 0.8, "field": "f"}]
+
+    mock_semantic.side_effect = slow
+    mock_merged.side_effect = fast
+
+    response = client.post("/search/stream", json={"query": "test", "strategies": ["semantic", "merged"]})
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    lines = [json.loads(line) for line in response.text.splitlines()]
+    assert [line.get("search_type") for line in lines] == ["merged", "semantic", None]
+    assert lines[0]["results"][0]["text"] == "fast"
+    assert lines[-1]["done"] is True
+
+@patch('api.search_merged')
+def test_search_stream_sse(mock_merged):
+    mock_merged.return_value = [{"text": "t", "score": 0.5, "field": "f"}]
+    response = client.post(
+        "/search/stream",
+        json={"query": "test", "strategies": ["merged"]},
+        headers={"Accept": "text/event-stream"},
+    )
+    assert response.headers["content-type"].startswith("text/event-stream")
+    events = response.text.strip().split("\n\n")
+    assert events[0].startswith("event: result\ndata: ")
+    assert json.loads(events[0].split("data: ", 1)[1])["search_type"] == "merged"
+    assert events[1].startswith("event: done")
+
+def test_search_stream_invalid_strategy():
+    response = client.post("/search/stream", json={"query": "test", "strategies": ["keyword"]})
+    assert response.status_code == 422
@@ -0,0 +1,173 @@
+"""Tests for per-API-key rate limits and concurrency caps."""
+import json
+import os
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api_keys
+from api import app
+from api_keys import KeyLimitExceeded, KeyRing, get_key_ring, load_keys, make_key
+
+client = TestClient(app)
+
+
+@pytest.fixture
+def keys_file(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({
+        "interactive": {"key": "key-interactive", "rate": 100, "burst": 100},
+        "batch": {"key": "key-batch", "rate": 0.001, "burst": 3, "max_concurrency": 1},
+    }))
+    with patch.dict(os.environ, {"API_KEYS_FILE": str(path)}):
+        os.environ.pop("API_KEY", None)
+        yield path
+
+
+@pytest.fixture
+def search_ok():
+    with patch("api.search_semantic", return_value=[{"text": "t", "score": 0.9, "field": "f"}]):
+        yield
+
+
+def test_load_keys_from_api_key_and_file(keys_file):
+    ring = load_keys("legacy-key", keys_file)
+    assert [k.name for k in ring.keys] == ["default", "interactive", "batch"]
+    batch = ring.lookup("key-batch")
+    assert batch.name == "batch"
+    assert batch.bucket.capacity == 3
+    assert batch.max_concurrency == 1
+    assert ring.lookup("nope") is None
+    assert ring.lookup(None) is None
+    assert not load_keys()
+
+
+def test_file_keys_need_a_key_and_unique_names(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"broken": {"rate": 1}}))
+    with pytest.raises(ValueError, match="broken"):
+        load_keys(keys_file=path)
+    with pytest.raises(ValueError, match="unique"):
+        KeyRing([make_key("a", "x"), make_key("a", "y")])
+
+
+def test_key_ring_is_loaded_once_per_configuration(keys_file):
+    ring = get_key_ring()
+    assert get_key_ring() is ring
+    with patch.dict(os.environ, {"API_KEY": "another"}):
+        assert get_key_ring() is not ring
+
+
+def test_admit_raises_with_budget_headers():
+    key = make_key("k", "secret", rate=0.5, burst=1, max_concurrency=2)
+    key.admit()
+    with pytest.raises(KeyLimitExceeded) as rate_limited:
+        key.admit()
+    assert rate_limited.value.reason == "rate"
+    assert rate_limited.value.headers["X-RateLimit-Remaining"] == "0"
+    assert int(rate_limited.value.headers["Retry-After"]) >= 1
+    assert key.in_flight == 1
+
+
+def test_refusal_for_concurrency_spends_no_token():
+    key = make_key("k", "secret", rate=0.001, burst=2, max_concurrency=1)
+    key.admit()
+    with pytest.raises(KeyLimitExceeded) as capped:
+        key.admit()
+    assert capped.value.reason == "concurrency"
+    assert key.bucket.tokens == pytest.approx(1, abs=0.01)
+    key.release()
+    key.admit()
+
+
+def test_refused_surcharge_refunds_the_admission_token():
+    key = make_key("k", "secret", rate=0.001, burst=3)
+    key.admit()
+    with pytest.raises(KeyLimitExceeded):
+        key.surcharge(4)
+    assert key.bucket.tokens == pytest.approx(3, abs=0.01)
+    key.admit()
+    key.surcharge(3)
+    assert key.bucket.tokens == pytest.approx(0, abs=0.01)
+
+
+def test_exhausted_key_gets_429_while_other_keys_are_served(keys_file, search_ok):
+    body = {"query": "q", "search_type": "semantic"}
+    for _ in range(3):
+        response = client.post("/search", json=body, headers={"X-API-Key": "key-batch"})
+        assert response.status_code == 200
+    assert response.headers["X-RateLimit-Limit"] == "3"
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    throttled = client.post("/search", json=body, headers={"X-API-Key": "key-batch"})
+    assert throttled.status_code == 429
+    assert int(throttled.headers["Retry-After"]) >= 1
+    assert throttled.headers["X-RateLimit-Remaining"] == "0"
+
+    interactive = client.post("/search", json=body, headers={"X-API-Key": "key-interactive"})
+    assert interactive.status_code == 200
+    assert 'api_key_throttled_total{key="batch",reason="rate"}' in client.get("/metrics").text
+
+
+def test_batch_costs_one_token_per_query(keys_file, search_ok):
+    queries = [{"query": f"q{i}", "search_type": "semantic"} for i in range(3)]
+    response = client.post("/search/batch", json={"queries": queries[:2]}, headers={"X-API-Key": "key-batch"})
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Remaining"] == "1"
+
+    # Refused: two queries left no room for three, and the refusal is free
+    response = client.post("/search/batch", json={"queries": queries}, headers={"X-API-Key": "key-batch"})
+    assert response.status_code == 429
+    response = client.post("/search", json=queries[0], headers={"X-API-Key": "key-batch"})
+    assert response.status_code == 200
+
+
+def test_batch_larger_than_burst_costs_the_whole_burst(keys_file, search_ok):
+    queries = [{"query": f"q{i}", "search_type": "semantic"} for i in range(5)]
+    response = client.post("/search/batch", json={"queries": queries}, headers={"X-API-Key": "key-batch"})
+    assert response.status_code == 200
+    assert len(response.json()) == 5
+    assert response.headers["X-RateLimit-Remaining"] == "0"
+
+    response = client.post("/search", json=queries[0], headers={"X-API-Key": "key-batch"})
+    assert response.status_code == 429
+
+
+def test_unthrottled_key_accepts_any_batch_size(tmp_path, search_ok):
+    path = tmp_path / "keys.json"
+    path.write_text(json.dumps({"free": {"key": "key-free", "rate": 0}}))
+    queries = [{"query": f"q{i}", "search_type": "semantic"} for i in range(50)]
+    with patch.dict(os.environ, {"API_KEYS_FILE": str(path)}):
+        os.environ.pop("API_KEY", None)
+        response = client.post("/search/batch", json={"queries": queries}, headers={"X-API-Key": "key-free"})
+    assert response.status_code == 200
+    assert len(response.json()) == 50
+
+
+def test_stream_carries_budget_headers(keys_file, search_ok):
+    with patch("api.search_hybrid", return_value=[]), patch("api.search_merged", return_value=[]):
+        response = client.post("/search/stream", json={"query": "q"}, headers={"X-API-Key": "key-interactive"})
+    assert response.status_code == 200
+    assert response.headers["X-RateLimit-Limit"] == "100"
+    assert "X-Concurrency-Remaining" in response.headers
+
+
+def test_concurrency_slot_is_released_after_each_request(keys_file, search_ok):
+    key = get_key_ring().lookup("key-interactive")
+    for _ in range(key.max_concurrency + 2):
+        response = client.post("/search", json={"query": "q", "search_type": "semantic"},
+                               headers={"X-API-Key": "key-interactive"})
+        assert response.status_code == 200
+    assert key.in_flight == 0
+
+
+def test_invalid_key_file_fails_startup(tmp_path):
+    path = tmp_path / "keys.json"
+    path.write_text("{not json")
+    with patch.dict(os.environ, {"API_KEYS_FILE": str(path)}), \
+            patch("api.get_kb_client"), patch("api.init_search_client"), patch("api.close_search_client"), \
+            patch.object(api_keys, "_ring", None):
+        with pytest.raises(ValueError):
+            with TestClient(app):
+                pass
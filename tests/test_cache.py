@@ -0,0 +1,93 @@
+"""Tests for the TTL + LRU search result cache."""
+import pytest
+
+from cache import ResultCache, cached_search, normalize_query
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_results(text="hello", count=1):
+    return [{"rid": "r", "score": 0.9, "text": text, "field": "f"} for _ in range(count)]
+
+
+class TestResultCache:
+    """Test eviction, expiry and counters."""
+
+    def test_hit_and_miss_counters(self):
+        cache = ResultCache()
+        assert cache.get("k") is None
+        cache.set("k", make_results())
+        assert cache.get("k") == make_results()
+        stats = cache.stats()
+        assert stats["hits"] == 1
+        assert stats["misses"] == 1
+        assert stats["hit_ratio"] == 0.5
+
+    def test_entries_expire_after_ttl(self):
+        clock = FakeClock()
+        cache = ResultCache(ttl=10, clock=clock)
+        cache.set("k", make_results())
+        clock.now = 9.9
+        assert cache.get("k") is not None
+        clock.now = 10.0
+        assert cache.get("k") is None
+        assert cache.stats()["entries"] == 0
+
+    def test_lru_eviction_by_entries(self):
+        cache = ResultCache(max_entries=2)
+        cache.set("a", make_results())
+        cache.set("b", make_results())
+        cache.get("a")
+        cache.set("c", make_results())
+        assert cache.get("b") is None
+        assert cache.get("a") is not None
+        assert cache.stats()["evictions"] == 1
+
+    def test_eviction_by_bytes(self):
+        cache = ResultCache(max_bytes=1000)
+        cache.set("a", make_results("x" * 500))
+        cache.set("b", make_results("y" * 500))
+        assert cache.get("a") is None
+        assert cache.stats()["bytes"] <= 1000
+
+    def test_returned_results_are_copies(self):
+        cache = ResultCache()
+        cache.set("k", make_results())
+        cache.get("k")[0]["text"] = "mutated"
+        assert cache.get("k")[0]["text"] == "hello"
+
+    def test_zero_ttl_disables_cache(self):
+        cache = ResultCache(ttl=0)
+        cache.set("k", make_results())
+        assert cache.stats()["entries"] == 0
+
+
+def test_normalize_query():
+    assert normalize_query("  What IS   RAG? ") == "what is rag?"
+
+
+@pytest.mark.asyncio
+async def test_cached_search_keys_on_settings():
+    """Same normalized query and settings hit; different settings miss."""
+    calls = []
+    cache = ResultCache()
+
+    @cached_search(cache, "semantic")
+    async def strategy(query: str, page_size: int = 5, min_score: float | None = None):
+        calls.append((query, page_size, min_score))
+        return make_results(query)
+
+    await strategy("What is X")
+    await strategy("what  is x")
+    await strategy("what is x", page_size=5)
+    assert len(calls) == 1
+
+    await strategy("what is x", page_size=3)
+    await strategy("what is x", min_score=0.5)
+    assert len(calls) == 3
@@ -1,4 +1,7 @@
+import asyncio
 import pytest
+from contextlib import asynccontextmanager
+from unittest.mock import patch
 from click.testing import CliRunner
 from cli import cli
 
@@ -13,3 +16,29 @@ def test_chat_command():
     result = runner.invoke(cli, ["chat"], input="test question\nexit\n")
     assert result.exit_code == 0
     assert "You asked: test question" in result.output
+
+def test_ask_stream_prints_fastest_strategy_first():
+    async def fast(query, page_size):
+        return [{"text": "fast hit"}]
+
+    async def slow(query, page_size):
+        await asyncio.sleep(0.05)
+        return [{"text": "slow hit"}]
+
+    async def failing(query, page_size):
+        raise RuntimeError("boom")
+
+    @asynccontextmanager
+    async def no_client():
+        yield None
+
+    runner = CliRunner()
+    with patch("cli.search_client_session", no_client), \
+            patch("cli.search_semantic", slow), \
+            patch("cli.search_hybrid", failing), \
+            patch("cli.search_merged", fast):
+        result = runner.invoke(cli, ["ask", "--stream", "test question"])
+
+    assert result.exit_code == 0
+    assert result.output.index("[merged]") < result.output.index("[semantic]")
+    assert "[hybrid] failed: boom" in result.output
@@ -0,0 +1,51 @@
+"""Tests for the shared pooled Nuclia search client."""
+import asyncio
+import pytest
+from unittest.mock import patch
+
+import client as client_module
+
+KB_URL = "https://aws-us-east-2-1.rag.progress.cloud/api/v1/kb/test-kb"
+
+
+@pytest.fixture
+def kb_env():
+    """Point the client module at a fake KB without touching the network."""
+    with patch.object(client_module, "KB_URL", KB_URL), \
+            patch.object(client_module, "KB_API_KEY", "test-key"):
+        yield
+    asyncio.run(client_module.close_search_client())
+
+
+@pytest.mark.asyncio
+async def test_client_is_shared_within_loop(kb_env):
+    """Repeated lookups return the same pooled client."""
+    first = await client_module.get_search_client()
+    second = await client_module.get_search_client()
+    assert first is second
+    assert first.kbid == "test-kb"
+    await client_module.close_search_client()
+
+
+def test_client_rebuilt_for_new_loop(kb_env):
+    """A client bound to a finished event loop is not reused."""
+    first = asyncio.run(client_module.get_search_client())
+    second = asyncio.run(client_module.get_search_client())
+    assert first is not second
+
+
+@pytest.mark.asyncio
+async def test_close_releases_client(kb_env):
+    """Closing drops the client and closes its HTTP session."""
+    ndb = await client_module.get_search_client()
+    await client_module.close_search_client()
+    assert ndb.ndb.session.is_closed
+    assert client_module._client is None
+
+
+@pytest.mark.asyncio
+async def test_missing_kb_url_raises():
+    """The client cannot be built without KB configuration."""
+    with patch.object(client_module, "KB_URL", None):
+        with pytest.raises(ValueError, match="KB_URL"):
+            await client_module.get_search_client()
@@ -0,0 +1,75 @@
+"""Tests for document discovery and content-sniffing type detection."""
+import zipfile
+import pytest
+
+from filetypes import discover_files, is_included, parse_type_options, sniff_file_type
+
+
+def write_zip(path, member):
+    with zipfile.ZipFile(path, "w") as archive:
+        archive.writestr("[Content_Types].xml", "<Types/>")
+        archive.writestr(member, "<xml/>")
+
+
+@pytest.mark.parametrize("name, content, expected", [
+    ("a.pdf", b"%PDF-1.7\n...", "pdf"),
+    ("misnamed.txt", b"%PDF-1.4\n...", "pdf"),
+    ("page.html", b"<!DOCTYPE html><html><body>x</body></html>", "html"),
+    ("page.txt", b"\xef\xbb\xbf  <html lang='en'>", "html"),
+    ("notes.md", b"# Title\n\ntext", "md"),
+    ("README.md", b"# Embedding\n\n```\n<html><body>snippet</body></html>\n```\n", "md"),
+    ("notes.txt", b"Use <html> as the root element.", "txt"),
+    ("fragment.html", b"<div>no doctype</div>", "html"),
+    ("notes.txt", "café\n".encode() * 10, "txt"),
+])
+def test_sniff_text_and_pdf(tmp_path, name, content, expected):
+    path = tmp_path / name
+    path.write_bytes(content)
+    assert sniff_file_type(path).name == expected
+
+
+def test_sniff_office_documents(tmp_path):
+    write_zip(tmp_path / "doc.docx", "word/document.xml")
+    write_zip(tmp_path / "slides.bin", "ppt/presentation.xml")
+    write_zip(tmp_path / "archive.zip", "data/file.csv")
+
+    assert sniff_file_type(tmp_path / "doc.docx").name == "docx"
+    assert sniff_file_type(tmp_path / "slides.bin").name == "pptx"
+    assert sniff_file_type(tmp_path / "archive.zip") is None
+
+
+def test_sniff_rejects_binary(tmp_path):
+    path = tmp_path / "image.txt"
+    path.write_bytes(b"\x89PNG\r\n\x1a\n\0\0")
+    assert sniff_file_type(path) is None
+
+
+def test_discover_is_recursive_and_honours_patterns(tmp_path):
+    for relative in ["a.pdf", "sub/b.docx", "sub/deeper/c.md", "drafts/d.pdf", ".hidden/e.pdf", "f.png"]:
+        path = tmp_path / relative
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(b"x")
+
+    found = [p.relative_to(tmp_path).as_posix() for p in discover_files(tmp_path, exclude=(".*", "drafts"))]
+    assert found == ["a.pdf", "sub/b.docx", "sub/deeper/c.md"]
+
+    found = [p.relative_to(tmp_path).as_posix() for p in discover_files(tmp_path, include=("sub/*",))]
+    assert found == ["sub/b.docx", "sub/deeper/c.md"]
+
+
+def test_is_included_excludes_everything_below_excluded_folder():
+    assert is_included("reports/q1.pdf")
+    assert not is_included(".cache/q1.pdf")
+    assert not is_included(".nuclia-manifest.sqlite")
+    assert not is_included("drafts/x/q1.pdf", exclude=("drafts",))
+
+
+def test_parse_type_options():
+    assert parse_type_options(["pdf.split_strategy=PARAGRAPH", "txt.blank_line_splitter=false"]) == {
+        "pdf": {"split_strategy": "PARAGRAPH"},
+        "txt": {"blank_line_splitter": False},
+    }
+    with pytest.raises(ValueError):
+        parse_type_options(["exe.split_strategy=X"])
+    with pytest.raises(ValueError):
+        parse_type_options(["pdf.colour=blue"])
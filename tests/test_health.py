@@ -0,0 +1,100 @@
+"""Tests for the liveness/readiness endpoints and the background upstream probe."""
+import asyncio
+import time
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import api
+from api import app
+from health import UpstreamProbe
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_healthz_is_always_ok():
+    response = TestClient(app).get("/healthz")
+    assert response.status_code == 200
+    assert response.json() == {"status": "ok"}
+
+
+@pytest.mark.asyncio
+async def test_probe_caches_result_and_goes_stale():
+    clock = FakeClock()
+    check = AsyncMock()
+    probe = UpstreamProbe(check, interval=10, timeout=1, clock=clock)
+    assert not probe.ready
+
+    assert await probe.probe_once()
+    assert probe.ready and probe.status()["error"] is None
+    clock.now = 29
+    assert probe.ready
+    # No fresh probe for three intervals: the loop is presumed dead
+    clock.now = 31
+    assert not probe.ready
+
+    check.side_effect = ConnectionError("refused")
+    assert not await probe.probe_once()
+    assert probe.status() == {"ok": False, "error": "ConnectionError", "latency_ms": 0.0, "age_seconds": 0.0}
+
+
+@pytest.mark.asyncio
+async def test_probe_times_out_slow_checks():
+    async def hang():
+        await asyncio.sleep(10)
+
+    probe = UpstreamProbe(hang, interval=10, timeout=0.05)
+    assert not await probe.probe_once()
+    assert probe.error == "timed out after 0.05s"
+
+
+@pytest.mark.asyncio
+async def test_probe_loop_runs_in_background():
+    check = AsyncMock()
+    probe = UpstreamProbe(check, interval=0.01, timeout=1)
+    probe.start()
+    await asyncio.sleep(0.05)
+    await probe.stop()
+    assert check.await_count >= 2
+    assert probe.ready
+
+
+def test_readyz_reflects_client_and_cached_probe():
+    check = AsyncMock()
+    with patch("api.get_kb_client"), \
+            patch("api.init_search_client", AsyncMock()), \
+            patch("api.close_search_client", AsyncMock()), \
+            patch("api.is_initialized", return_value=True), \
+            patch.object(api.upstream_probe, "check", check), \
+            patch.object(api.upstream_probe, "interval", 60):
+        with TestClient(app) as client:
+            for _ in range(20):
+                if api.upstream_probe.checked_at is not None:
+                    break
+                time.sleep(0.01)
+            response = client.get("/readyz")
+            assert response.status_code == 200
+            assert response.json()["status"] == "ready"
+            # Served from the cache: polling readiness makes no upstream calls
+            for _ in range(5):
+                client.get("/readyz")
+            assert check.await_count == 1
+
+            check.side_effect = ConnectionError("refused")
+            asyncio.run(api.upstream_probe.probe_once())
+            response = client.get("/readyz")
+            assert response.status_code == 503
+            assert response.json()["checks"]["upstream"]["error"] == "ConnectionError"
+
+
+def test_readyz_not_ready_without_kb_client():
+    response = TestClient(app).get("/readyz")
+    assert response.status_code == 503
+    assert response.json()["checks"]["kb_client"] == {"ok": False}
@@ -0,0 +1,426 @@
+"""Tests for the ingestion pipeline against an in-memory fake KB."""
+import asyncio
+import json
+import os
+import httpx
+import pytest
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import indexing
+from indexing import delete_files, upload_folder
+from manifest import Manifest
+from ratelimit import throttle
+
+
+class FakeExtra:
+    def __init__(self, metadata):
+        self.metadata = metadata
+
+    def model_dump(self):
+        return {"metadata": self.metadata}
+
+
+class FakeKB:
+    """Minimal stand-in for the resource SDK object and the KB client's TUS calls."""
+
+    def __init__(self):
+        self.resources = {}
+        self.uploads = []
+        self.tus = {}
+        self.patches = []
+        self.active_uploads = 0
+        self.peak_uploads = 0
+        self.gets = 0
+        self.created = 0
+        self.deleted = []
+        # Client passed explicitly to create/update calls
+        self.clients = []
+
+    async def get(self, slug=None, rid=None, show=None, ndb=None):
+        self.gets += 1
+        await asyncio.sleep(0)
+        for resource_id, resource in self.resources.items():
+            if resource["slug"] == slug or resource_id == rid:
+                files = {field: {} for field in resource.get("fields", ())}
+                return SimpleNamespace(
+                    id=resource_id,
+                    extra=FakeExtra(dict(resource["metadata"])),
+                    data=SimpleNamespace(files=files),
+                )
+        raise Exception("Resource does not exist")
+
+    async def create(self, title, slug, ndb=None):
+        self.clients.append(ndb)
+        rid = f"rid-{self.created}"
+        self.created += 1
+        self.resources[rid] = {"slug": slug, "title": title, "metadata": {}}
+        return rid
+
+    async def update(self, rid, extra=None, slug=None, title=None, ndb=None):
+        if ndb is not None:
+            self.clients.append(ndb)
+        resource = self.resources[rid]
+        if extra:
+            resource["metadata"].update(extra["metadata"])
+        if slug:
+            resource["slug"] = slug
+        if title:
+            resource["title"] = title
+
+    async def delete_field(self, rid, field_type, field_id, ndb=None):
+        self.resources[rid]["fields"].remove(field_id)
+
+    async def delete(self, rid=None, slug=None):
+        await asyncio.sleep(0)
+        if rid not in self.resources:
+            raise Exception("Resource does not exist")
+        self.deleted.append(rid)
+        del self.resources[rid]
+
+    async def start_tus_upload(self, size, filename, field, rid, **kwargs):
+        upload_url = f"/kb/kbid/resource/{rid}/file/{field}/tusupload/{len(self.tus)}"
+        fields = self.resources[rid].setdefault("fields", [])
+        if field not in fields:
+            fields.append(field)
+        self.tus[upload_url] = {
+            "filename": filename,
+            "rid": rid,
+            "size": size,
+            "received": 0,
+            "content_type": kwargs.get("content_type"),
+            "split_strategy": kwargs.get("split_strategy"),
+        }
+        self.active_uploads += 1
+        self.peak_uploads = max(self.peak_uploads, self.active_uploads)
+        return upload_url
+
+    async def patch_tus_upload(self, upload_url, data, offset):
+        upload = self.tus[upload_url]
+        assert offset == upload["received"]
+        await asyncio.sleep(0.01)
+        upload["received"] += len(data)
+        self.patches.append((upload["filename"], offset))
+        if upload["received"] == upload["size"]:
+            self.active_uploads -= 1
+            self.uploads.append((upload["filename"], upload["rid"]))
+        return upload["received"]
+
+    @property
+    def writer_session(self):
+        async def head(url, headers=None):
+            upload = next(u for key, u in self.tus.items() if key.endswith(str(url)))
+            return SimpleNamespace(headers={"Upload-Offset": str(upload["received"])}, raise_for_status=lambda: None)
+        return SimpleNamespace(head=head)
+
+    async def list(self, page=0, size=100):
+        resources = [
+            SimpleNamespace(id=rid, slug=r["slug"], metadata=SimpleNamespace(status=SimpleNamespace(value="PROCESSED")))
+            for rid, r in self.resources.items()
+        ]
+        return SimpleNamespace(resources=resources, pagination=SimpleNamespace(last=True))
+
+
+@pytest.fixture
+def fake_kb(tmp_path):
+    kb = FakeKB()
+    with patch("indexing.DATA_DIR", tmp_path), \
+            patch("indexing.sdk.AsyncNucliaResource", return_value=kb), \
+            patch("indexing.default_kb_client", AsyncMock(return_value=kb)), \
+            patch("indexing.sdk.AsyncNucliaKB", return_value=kb), \
+            patch.object(throttle.bucket, "rate", 0):
+        yield kb
+
+
+def make_pdfs(folder, count):
+    for i in range(count):
+        (folder / f"doc{i}.pdf").write_bytes(f"%PDF-1.4 document {i}".encode())
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_uploads_new_files_concurrently(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 6)
+
+    results = await upload_folder(tmp_path, wait=False, upload_workers=3)
+
+    assert len(results) == 6
+    assert all(status == "Uploaded" for _, status in results.values())
+    assert len(fake_kb.uploads) == 6
+    assert 1 < fake_kb.peak_uploads <= 3
+
+
+@pytest.mark.asyncio
+async def test_upload_uses_one_client_for_resource_calls_and_tus(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    await upload_folder(tmp_path, wait=False)
+
+    # Two creates and two metadata updates, all through the client TUS used
+    assert fake_kb.clients == [fake_kb] * 4
+    assert len(fake_kb.uploads) == 2
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_skips_unchanged_files(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    await upload_folder(tmp_path, wait=False)
+    # New files are looked up by slug and by legacy slug
+    assert fake_kb.gets == 4
+
+    results = await upload_folder(tmp_path, wait=False)
+
+    assert {status for _, status in results.values()} == {"Already indexed"}
+    assert len(fake_kb.uploads) == 2
+    # The second run is answered by the local manifest alone
+    assert fake_kb.gets == 4
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_reports_per_file_failures(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 3)
+    original = fake_kb.start_tus_upload
+
+    async def flaky(size, filename, field, rid, **kwargs):
+        if filename == "doc1.pdf":
+            raise RuntimeError("network blip")
+        return await original(size, filename, field, rid, **kwargs)
+
+    fake_kb.start_tus_upload = flaky
+    results = await upload_folder(tmp_path, wait=False)
+
+    assert results["doc1.pdf"][1] == "Failed"
+    assert results["doc0.pdf"][1] == "Uploaded"
+    assert results["doc2.pdf"][1] == "Uploaded"
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_waits_for_processing(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    waited = []
+
+    async def fake_wait(rid):
+        waited.append(rid)
+
+    with patch("indexing.wait_until_processed", fake_wait):
+        await upload_folder(tmp_path, wait=True)
+
+    assert sorted(waited) == ["rid-0", "rid-1"]
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_writes_timing_report(fake_kb, tmp_path, capsys):
+    make_pdfs(tmp_path, 3)
+    report_path = tmp_path / "reports" / "ingest.json"
+
+    async def fake_wait(rid):
+        pass
+
+    with patch("indexing.wait_until_processed", fake_wait):
+        await upload_folder(tmp_path, wait=True, report_path=report_path)
+
+    report = json.loads(report_path.read_text())
+    assert report["files"] == 3
+    assert report["statuses"] == {"Uploaded": 3}
+    assert set(report["phases"]) == {"hash", "check", "create", "upload", "metadata", "process"}
+    assert report["bytes_uploaded"] == sum(item["size"] for item in report["items"])
+    assert "Ingested 3 files" in capsys.readouterr().out
+
+    await upload_folder(tmp_path, wait=False, report_path=report_path)
+    report = json.loads(report_path.read_text())
+    # Unchanged files skip on stat alone: no hashing, no KB calls
+    assert report["statuses"] == {"Already indexed": 3}
+    assert report["phases"] == {}
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_ignores_touch_but_detects_edits(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    first = await upload_folder(tmp_path, wait=False)
+
+    os.utime(tmp_path / "doc0.pdf", (0, 0))
+    (tmp_path / "doc1.pdf").write_bytes(b"%PDF-1.4 edited")
+    results = await upload_folder(tmp_path, wait=False)
+
+    assert results["doc0.pdf"][1] == "Already indexed"
+    assert results["doc1.pdf"] == (first["doc1.pdf"][0], "Updated")
+    assert len(fake_kb.uploads) == 3
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_verify_reuploads_resources_missing_from_kb(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    first = await upload_folder(tmp_path, wait=False)
+    del fake_kb.resources[first["doc0.pdf"][0]]
+
+    results = await upload_folder(tmp_path, wait=False, verify=True)
+
+    assert results["doc0.pdf"] == ("rid-2", "Uploaded")
+    assert results["doc1.pdf"] == (first["doc1.pdf"][0], "Already indexed")
+    with Manifest(tmp_path / ".nuclia-manifest.sqlite") as manifest:
+        assert manifest.get("doc1.pdf").status == "processed"
+        assert manifest.get("doc0.pdf").rid == "rid-2"
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_resumes_interrupted_upload(fake_kb, tmp_path):
+    (tmp_path / "big.pdf").write_bytes(b"%PDF-1.4 " + b"x" * 31)
+    original = fake_kb.patch_tus_upload
+
+    async def crash_after_two_chunks(upload_url, data, offset):
+        if offset >= 16:
+            raise ConnectionError("connection reset")
+        return await original(upload_url, data, offset)
+
+    fake_kb.patch_tus_upload = crash_after_two_chunks
+    first = await upload_folder(tmp_path, wait=False, chunk_size=8)
+    assert first["big.pdf"][1] == "Failed"
+
+    fake_kb.patch_tus_upload = original
+    results = await upload_folder(tmp_path, wait=False, chunk_size=8)
+
+    assert results["big.pdf"][1] == "Updated"
+    assert len(fake_kb.tus) == 1
+    assert [offset for _, offset in fake_kb.patches] == [0, 8, 16, 24, 32]
+    assert fake_kb.resources[results["big.pdf"][0]]["metadata"]["ingest_hash"].startswith("sha256:")
+
+
+@pytest.mark.asyncio
+async def test_create_lost_in_transit_is_not_sent_twice(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 1)
+    original = fake_kb.create
+
+    async def create_then_time_out(title, slug, ndb=None):
+        await original(title, slug, ndb=ndb)
+        raise httpx.ReadTimeout("no response")
+
+    fake_kb.create = create_then_time_out
+    results = await upload_folder(tmp_path, wait=False)
+
+    assert results["doc0.pdf"] == ("rid-0", "Uploaded")
+    assert fake_kb.created == 1
+    assert len(fake_kb.uploads) == 1
+
+
+@pytest.mark.asyncio
+async def test_retried_chunk_resumes_from_the_server_offset(fake_kb, tmp_path):
+    content = b"%PDF-1.4 " + b"x" * 31
+    (tmp_path / "big.pdf").write_bytes(content)
+    original = fake_kb.patch_tus_upload
+    stored = bytearray()
+
+    async def drop_connection_mid_chunk(upload_url, data, offset):
+        if offset == 8 and not stored[8:]:
+            # The server keeps half the chunk, then the connection resets
+            await original(upload_url, data[:4], offset)
+            stored.extend(data[:4])
+            raise httpx.ReadError("connection reset")
+        stored.extend(data)
+        return await original(upload_url, data, offset)
+
+    fake_kb.patch_tus_upload = drop_connection_mid_chunk
+    results = await upload_folder(tmp_path, wait=False, chunk_size=8)
+
+    assert results["big.pdf"][1] == "Uploaded"
+    assert bytes(stored) == content
+    assert [offset for _, offset in fake_kb.patches] == [0, 8, 12, 20, 28, 36]
+
+
+@pytest.mark.asyncio
+async def test_metadata_update_is_retried_without_reuploading(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 1)
+    original = fake_kb.update
+
+    async def fail_update(rid, extra):
+        raise ConnectionError("connection reset")
+
+    fake_kb.update = fail_update
+    assert (await upload_folder(tmp_path, wait=False))["doc0.pdf"][1] == "Failed"
+
+    fake_kb.update = original
+    results = await upload_folder(tmp_path, wait=False)
+
+    assert results["doc0.pdf"][1] == "Updated"
+    assert len(fake_kb.tus) == 1
+    assert len(fake_kb.uploads) == 1
+
+
+@pytest.mark.asyncio
+async def test_delete_files_removes_resource_and_manifest_entry(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    first = await upload_folder(tmp_path, wait=False)
+    (tmp_path / "doc0.pdf").unlink()
+    results = await delete_files([tmp_path / "doc0.pdf"], tmp_path)
+
+    assert results["doc0.pdf"] == (first["doc0.pdf"][0], "Deleted")
+    assert fake_kb.deleted == [first["doc0.pdf"][0]]
+    with Manifest(tmp_path / ".nuclia-manifest.sqlite") as manifest:
+        assert manifest.get("doc0.pdf") is None
+        assert manifest.get("doc1.pdf") is not None
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_ingests_mixed_formats_recursively(fake_kb, tmp_path):
+    (tmp_path / "reports" / "drafts").mkdir(parents=True)
+    (tmp_path / "reports" / "q1.pdf").write_bytes(b"%PDF-1.4 q1")
+    (tmp_path / "reports" / "drafts" / "q2.pdf").write_bytes(b"%PDF-1.4 q2")
+    (tmp_path / "notes.md").write_text("# Notes\n\nSome text")
+    (tmp_path / "readme.txt").write_text("plain text\n\nsecond paragraph")
+    (tmp_path / "image.png").write_bytes(b"\x89PNG\r\n")
+
+    results = await upload_folder(
+        tmp_path,
+        wait=False,
+        exclude=(".*", "drafts"),
+        type_options={"md": {"split_strategy": "MARKDOWN"}},
+    )
+
+    assert sorted(results) == ["notes.md", "readme.txt", "reports/q1.pdf"]
+    by_name = {u["filename"]: u for u in fake_kb.tus.values()}
+    assert by_name["q1.pdf"]["content_type"] == "application/pdf+aitable"
+    assert by_name["readme.txt"]["content_type"] == "text/plain+blankline"
+    assert by_name["notes.md"]["content_type"] == "text/markdown"
+    assert by_name["notes.md"]["split_strategy"] == "MARKDOWN"
+    assert by_name["q1.pdf"]["split_strategy"] == "PARAGRAPH"
+
+
+@pytest.mark.asyncio
+async def test_upload_folder_migrates_resources_with_legacy_slugs(fake_kb, tmp_path):
+    from utils import legacy_slug_from_path, safe_slug_from_path
+
+    make_pdfs(tmp_path, 2)
+    legacy = legacy_slug_from_path(str(tmp_path / "doc0.pdf"))
+    fake_kb.resources["old-rid"] = {"slug": legacy, "title": "doc0.pdf", "metadata": {}}
+
+    results = await upload_folder(tmp_path, wait=False)
+
+    assert results["doc0.pdf"] == ("old-rid", "Updated")
+    assert fake_kb.created == 1
+    assert fake_kb.resources["old-rid"]["slug"] == safe_slug_from_path(str(tmp_path / "doc0.pdf"), tmp_path)
+    assert fake_kb.resources["old-rid"]["metadata"]["ingest_hash"].startswith("sha256:")
+
+
+@pytest.mark.asyncio
+async def test_reupload_replaces_the_file_field(fake_kb, tmp_path):
+    make_pdfs(tmp_path, 1)
+    first = await upload_folder(tmp_path, wait=False)
+    (tmp_path / "doc0.pdf").write_bytes(b"%PDF-1.4 edited")
+
+    results = await upload_folder(tmp_path, wait=False)
+
+    rid = first["doc0.pdf"][0]
+    assert results["doc0.pdf"] == (rid, "Updated")
+    assert fake_kb.resources[rid]["fields"] == ["file"]
+    assert len(fake_kb.uploads) == 2
+
+
+@pytest.mark.asyncio
+async def test_reupload_keeps_an_older_field_id_and_drops_extra_copies(fake_kb, tmp_path):
+    from utils import legacy_slug_from_path
+
+    make_pdfs(tmp_path, 1)
+    legacy = legacy_slug_from_path(str(tmp_path / "doc0.pdf"))
+    fake_kb.resources["old-rid"] = {"slug": legacy, "title": "doc0.pdf", "metadata": {}, "fields": ["a1", "b2"]}
+
+    await upload_folder(tmp_path, wait=False)
+
+    assert fake_kb.resources["old-rid"]["fields"] == ["a1"]
+    assert [u["rid"] for u in fake_kb.tus.values()] == ["old-rid"]
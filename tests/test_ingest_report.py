@@ -0,0 +1,79 @@
+"""Tests for ingestion timing reports."""
+import csv
+import json
+import pytest
+
+from ingest_report import FileTiming, IngestReport, percentile, timed
+
+
+def make_report():
+    clock = iter([0.0, 10.0]).__next__
+    report = IngestReport(clock=clock)
+    for i in range(10):
+        report.record(FileTiming(
+            path=f"doc{i}.pdf",
+            status="Uploaded",
+            rid=f"rid{i}",
+            size=1000,
+            bytes_uploaded=1000,
+            timings={"hash": 0.1, "upload": (i + 1) / 10},
+        ))
+    report.record(FileTiming(path="old.pdf", status="Already indexed", size=500, timings={"hash": 0.2}))
+    report.finish()
+    return report
+
+
+def test_percentile_interpolates():
+    assert percentile([], 50) == 0.0
+    assert percentile([4.0], 95) == 4.0
+    assert percentile([1.0, 2.0, 3.0, 4.0], 50) == 2.5
+    assert percentile(list(range(101)), 95) == 95
+
+
+def test_timed_accumulates_even_on_error():
+    timings = {}
+    with timed(timings, "upload"):
+        pass
+    with pytest.raises(RuntimeError):
+        with timed(timings, "upload"):
+            raise RuntimeError("boom")
+    assert set(timings) == {"upload"} and timings["upload"] >= 0
+
+
+def test_summary_has_phase_percentiles_and_throughput():
+    summary = make_report().summary()
+
+    assert summary["files"] == 11
+    assert summary["wall_seconds"] == 10.0
+    assert summary["statuses"] == {"Uploaded": 10, "Already indexed": 1}
+    assert summary["bytes_uploaded"] == 10_000
+    assert summary["bytes_per_second"] == 1000
+    assert summary["phases"]["hash"]["count"] == 11
+    upload = summary["phases"]["upload"]
+    assert upload["count"] == 10
+    assert upload["p50"] == pytest.approx(0.55)
+    assert upload["p95"] == pytest.approx(0.955)
+    assert upload["bytes_per_second_p50"] > 0
+    assert "process" not in summary["phases"]
+
+
+def test_writes_json_and_csv(tmp_path):
+    report = make_report()
+
+    report.write(tmp_path / "out" / "report.json")
+    document = json.loads((tmp_path / "out" / "report.json").read_text())
+    assert document["files"] == 11
+    assert document["items"][0]["upload_bytes_per_second"] == pytest.approx(10_000)
+
+    report.write(tmp_path / "report.csv")
+    with open(tmp_path / "report.csv") as f:
+        rows = list(csv.DictReader(f))
+    assert len(rows) == 11
+    assert rows[0]["upload_seconds"] == "0.1"
+    assert rows[-1]["upload_seconds"] == ""
+
+
+def test_format_summary_mentions_each_phase():
+    text = make_report().format_summary()
+    assert text.startswith("Ingested 11 files in 10.0s")
+    assert "hash" in text and "upload" in text and "p95" in text
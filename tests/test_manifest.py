@@ -0,0 +1,37 @@
+"""Tests for the local SQLite ingestion manifest."""
+import os
+
+from manifest import Manifest, new_entry
+
+
+def test_manifest_round_trip(tmp_path):
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"%PDF")
+    db = tmp_path / "manifest.sqlite"
+
+    with Manifest(db) as manifest:
+        manifest.record(new_entry("doc.pdf", doc.stat(), "sha256:abc", "doc-1", "rid-1", "pending"))
+        assert manifest.get("doc.pdf").rid == "rid-1"
+
+    with Manifest(db) as manifest:
+        entry = manifest.entries()["doc.pdf"]
+        assert (entry.content_hash, entry.slug, entry.status) == ("sha256:abc", "doc-1", "pending")
+        assert entry.matches_stat(doc.stat())
+
+        os.utime(doc, (0, 0))
+        assert not entry.matches_stat(doc.stat())
+
+        manifest.remove("doc.pdf")
+        assert manifest.entries() == {}
+
+
+def test_manifest_commits_in_batches(tmp_path):
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"%PDF")
+    manifest = Manifest(tmp_path / "manifest.sqlite", batch_size=2)
+
+    manifest.record(new_entry("a.pdf", doc.stat(), "h", "a", "rid-a", "pending"))
+    assert manifest._pending
+    manifest.record(new_entry("b.pdf", doc.stat(), "h", "b", "rid-b", "pending"))
+    assert not manifest._pending
+    manifest.close()
@@ -0,0 +1,114 @@
+"""Tests for the Prometheus metrics registry and the /metrics endpoint."""
+import asyncio
+import re
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi.testclient import TestClient
+
+import search
+from api import app
+from metrics import Registry, SEARCH_ERRORS, SEARCH_REQUESTS, UPSTREAM_DURATION
+
+client = TestClient(app)
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Value of one sample line in rendered metrics."""
+    label_text = ",".join(f'{k}="{v}"' for k, v in labels.items())
+    pattern = re.escape(name + (f"{{{label_text}}}" if labels else "")) + r" (\S+)"
+    match = re.search("^" + pattern + "$", text, re.MULTILINE)
+    assert match, f"{name} {labels} not in output"
+    return float(match.group(1))
+
+
+def test_render_counters_gauges_and_histograms():
+    registry = Registry()
+    requests = registry.counter("requests_total", "Requests.", ["route"])
+    depth = registry.gauge("queue_depth", "Queued.", callback=lambda: 3)
+    latency = registry.histogram("latency_seconds", "Latency.", ["route"], buckets=(0.1, 1.0))
+
+    requests.inc(route="a")
+    requests.inc(2, route="a")
+    latency.observe(0.05, route="a")
+    latency.observe(0.5, route="a")
+    latency.observe(5, route="a")
+    text = registry.render()
+
+    assert "# TYPE requests_total counter" in text
+    assert "# TYPE latency_seconds histogram" in text
+    assert sample(text, "requests_total", route="a") == 3
+    assert sample(text, "queue_depth") == 3
+    assert sample(text, "latency_seconds_bucket", route="a", le="0.1") == 1
+    assert sample(text, "latency_seconds_bucket", route="a", le="1") == 2
+    assert sample(text, "latency_seconds_bucket", route="a", le="+Inf") == 3
+    assert sample(text, "latency_seconds_count", route="a") == 3
+    assert sample(text, "latency_seconds_sum", route="a") == pytest.approx(5.55)
+    assert depth.value() == 3
+
+
+def test_labels_must_match_and_names_are_unique():
+    registry = Registry()
+    counter = registry.counter("things_total", "Things.", ["kind"])
+    with pytest.raises(ValueError):
+        counter.inc(other="x")
+    with pytest.raises(ValueError):
+        registry.counter("things_total", "Again.")
+
+
+def test_label_values_are_escaped():
+    registry = Registry()
+    registry.counter("odd_total", "Odd.", ["value"]).inc(value='say "hi"\n')
+    assert 'odd_total{value="say \\"hi\\"\\n"} 1' in registry.render()
+
+
+@patch("api.search_hybrid")
+@patch("api.search_semantic")
+def test_search_requests_and_errors_are_counted_per_strategy(mock_semantic, mock_hybrid):
+    mock_semantic.return_value = [{"text": "t", "score": 0.9, "field": "f"}]
+    mock_hybrid.side_effect = RuntimeError("upstream down")
+    semantic_before = SEARCH_REQUESTS.value(search_type="semantic")
+    hybrid_errors_before = SEARCH_ERRORS.value(search_type="hybrid")
+
+    assert client.post("/search", json={"query": "q", "search_type": "semantic"}).status_code == 200
+    failing = TestClient(app, raise_server_exceptions=False)
+    assert failing.post("/search", json={"query": "q", "search_type": "hybrid"}).status_code == 500
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    text = response.text
+    assert sample(text, "search_requests_total", search_type="semantic") == semantic_before + 1
+    assert sample(text, "search_errors_total", search_type="hybrid") == hybrid_errors_before + 1
+    assert sample(text, "search_in_flight", search_type="semantic") == 0
+    assert sample(text, "search_duration_seconds_count", search_type="semantic") >= 1
+    assert sample(text, "search_local_duration_seconds_count", search_type="semantic", phase="serialize") >= 1
+    for name in ("search_cache_hit_ratio", "search_cache_entries", "search_upstream_in_flight", "search_coalesced_total"):
+        assert name in text
+
+
+def test_invalid_search_type_is_not_a_metric_label():
+    client.post("/search", json={"query": "q", "search_type": "bogus"})
+    assert 'search_type="bogus"' not in client.get("/metrics").text
+
+
+def test_upstream_latency_is_separate_from_parse_time():
+    hit = SimpleNamespace(rid="r1", score=0.8, text="hello", field="f/a", index=0)
+    response = SimpleNamespace(sentences=SimpleNamespace(results=[hit]), resources={})
+
+    async def slow_search(query, ndb):
+        await asyncio.sleep(0.05)
+        return response
+
+    before = UPSTREAM_DURATION.count(search_type="semantic")
+    with patch("search.sdk.AsyncNucliaSearch", return_value=SimpleNamespace(search=slow_search)), \
+            patch("search.get_search_client", AsyncMock()), \
+            patch.object(search.result_cache, "ttl", 0):
+        results = asyncio.run(search.search_semantic("metrics upstream test"))
+
+    assert results[0]["text"] == "hello"
+    assert UPSTREAM_DURATION.count(search_type="semantic") == before + 1
+    text = client.get("/metrics").text
+    assert sample(text, "nuclia_upstream_duration_seconds_sum", search_type="semantic") >= 0.05
+    assert sample(text, "search_local_duration_seconds_count", search_type="semantic", phase="parse") >= 1
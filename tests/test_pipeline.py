@@ -0,0 +1,84 @@
+"""Tests for the staged asyncio pipeline."""
+import asyncio
+import pytest
+
+from pipeline import Stage, run_pipeline
+
+
+@pytest.mark.asyncio
+async def test_items_flow_through_all_stages():
+    seen = []
+
+    async def double(item):
+        item["value"] *= 2
+
+    async def add_one(item):
+        item["value"] += 1
+
+    items = [{"value": i} for i in range(10)]
+    await run_pipeline(items, [Stage("double", double, 3), Stage("add", add_one, 2)], on_done=seen.append)
+
+    assert sorted(item["value"] for item in seen) == [i * 2 + 1 for i in range(10)]
+
+
+@pytest.mark.asyncio
+async def test_stage_can_drop_items_and_errors_are_isolated():
+    done, errors = [], []
+    reached_last = []
+
+    async def check(item):
+        if item == 3:
+            raise RuntimeError("bad file")
+        return item % 2 == 0
+
+    async def last(item):
+        reached_last.append(item)
+
+    await run_pipeline(
+        range(6),
+        [Stage("check", check, 2), Stage("last", last)],
+        on_done=done.append,
+        on_error=lambda item, stage, e: errors.append((item, stage)),
+    )
+
+    assert sorted(done) == list(range(6))
+    assert sorted(reached_last) == [0, 2, 4]
+    assert errors == [(3, "check")]
+
+
+@pytest.mark.asyncio
+async def test_stages_overlap_and_respect_worker_limits():
+    active = {"a": 0, "b": 0}
+    peak = {"a": 0, "b": 0}
+    b_started_before_a_finished = []
+
+    def stage(name, delay):
+        async def fn(item):
+            active[name] += 1
+            peak[name] = max(peak[name], active[name])
+            if name == "b":
+                b_started_before_a_finished.append(active["a"] > 0)
+            await asyncio.sleep(delay)
+            active[name] -= 1
+        return fn
+
+    await run_pipeline(range(12), [Stage("a", stage("a", 0.01), 2), Stage("b", stage("b", 0.01), 3)], queue_size=2)
+
+    assert peak["a"] <= 2
+    assert peak["b"] <= 3
+    assert any(b_started_before_a_finished)
+
+
+@pytest.mark.asyncio
+async def test_accepts_async_iterables():
+    async def produce():
+        for i in range(3):
+            yield i
+
+    done = []
+
+    async def noop(item):
+        return None
+
+    await run_pipeline(produce(), [Stage("noop", noop)], on_done=done.append)
+    assert sorted(done) == [0, 1, 2]
@@ -0,0 +1,75 @@
+"""Tests for client-side rank fusion."""
+import pytest
+
+from ranking import fuse, linear_fusion, max_score_fusion, reciprocal_rank_fusion, top_k, RRF_K
+from search import iter_find_paragraphs
+
+SEMANTIC = [("a", 0.91), ("b", 0.85), ("c", 0.40)]
+FULLTEXT = [("c", 14.2), ("d", 9.7), ("a", 3.1)]
+
+
+def test_max_fusion_keeps_highest_raw_score():
+    fused = max_score_fusion([SEMANTIC, FULLTEXT])
+    assert fused["c"] == 14.2
+    assert fused["a"] == 3.1
+    assert fused["b"] == 0.85
+
+
+def test_rrf_rewards_agreement_between_lists():
+    fused = reciprocal_rank_fusion([SEMANTIC, FULLTEXT])
+    assert fused["a"] == pytest.approx(1 / (RRF_K + 1) + 1 / (RRF_K + 3))
+    ranked = sorted(fused, key=fused.get, reverse=True)
+    # a and c appear in both lists and beat single-list hits despite BM25 scale
+    assert ranked[:2] == ["a", "c"]
+
+
+def test_weighted_rrf_favours_weighted_list():
+    fused = reciprocal_rank_fusion([SEMANTIC, FULLTEXT], weights=[0.9, 0.1])
+    assert fused["b"] > fused["d"]
+    fused = reciprocal_rank_fusion([SEMANTIC, FULLTEXT], weights=[0.1, 0.9])
+    assert fused["d"] > fused["b"]
+
+
+def test_rrf_ignores_duplicate_keys_within_list():
+    fused = reciprocal_rank_fusion([[("a", 1.0), ("a", 0.5), ("b", 0.4)]])
+    assert fused["b"] == pytest.approx(1 / (RRF_K + 2))
+
+
+def test_linear_fusion_normalizes_scales():
+    fused = linear_fusion([SEMANTIC, FULLTEXT], weights=[0.5, 0.5])
+    assert all(0.0 <= score <= 1.0 for score in fused.values())
+    assert fused["c"] == pytest.approx(0.5 * 0.0 + 0.5 * 1.0)
+
+
+def test_fuse_rejects_unknown_method():
+    with pytest.raises(ValueError, match="Unknown fusion method"):
+        fuse("borda", [SEMANTIC])
+
+
+def test_plain_rrf_ignores_weights():
+    assert fuse("rrf", [SEMANTIC, FULLTEXT], [0.9, 0.1]) == reciprocal_rank_fusion([SEMANTIC, FULLTEXT])
+
+
+def test_top_k_matches_full_sort():
+    items = [{"score": (i * 37) % 101 / 100} for i in range(500)]
+    expected = sorted(items, key=lambda r: r["score"], reverse=True)[:10]
+    assert top_k(iter(items), 10) == expected
+
+
+def test_top_k_handles_missing_scores_and_small_inputs():
+    items = [{"score": None}, {"score": 0.2}]
+    assert top_k(items, 5) == [{"score": 0.2}, {"score": None}]
+    assert top_k(items, 0) == []
+
+
+def test_merged_paragraphs_ranked_by_score():
+    data = {"resources": {
+        "r1": {"fields": {"f/a": {"paragraphs": {"p1": {"score": 0.2, "text": "low"}}}}},
+        "r2": {"fields": {"f/b": {"paragraphs": {
+            "p2": {"score": 0.9, "text": "high"},
+            "p3": {"score": 0.5, "text": "mid"},
+        }}}},
+    }}
+    ranked = top_k(iter_find_paragraphs(data), 2)
+    assert [r["text"] for r in ranked] == ["high", "mid"]
+    assert ranked[0]["rid"] == "r2"
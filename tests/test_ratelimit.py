@@ -0,0 +1,182 @@
+"""Tests for the ingestion rate limiter and retry policy."""
+import asyncio
+import time
+import pytest
+from types import SimpleNamespace
+
+import httpx
+
+from ratelimit import RetryPolicy, Throttle, TokenBucket, is_refused, is_retryable, retry_after
+
+
+def http_error(status, headers=None):
+    request = httpx.Request("GET", "https://kb.example/resource")
+    response = httpx.Response(status, headers=headers or {}, request=request)
+    return httpx.HTTPStatusError(f"{status}", request=request, response=response)
+
+
+class RateLimitError(Exception):
+    """Stand-in for nucliadb_sdk's RateLimitError, which carries try_after."""
+
+    def __init__(self, try_after=None):
+        super().__init__("Rate limited")
+        self.try_after = try_after
+
+
+class Flaky:
+    """Fails with the given errors in turn, then succeeds."""
+
+    def __init__(self, *errors):
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self, **kwargs):
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return SimpleNamespace(**kwargs)
+
+
+def fast_throttle(rate=0, burst=None, max_retries=3):
+    return Throttle(TokenBucket(rate, burst), RetryPolicy(max_retries=max_retries, base_delay=0.001, max_delay=0.01))
+
+
+@pytest.mark.asyncio
+async def test_bucket_paces_calls_after_burst():
+    bucket = TokenBucket(rate=100, capacity=5)
+    started = time.monotonic()
+    waited = [await bucket.acquire() for _ in range(15)]
+    elapsed = time.monotonic() - started
+
+    assert waited[:5] == [0.0] * 5
+    assert all(w > 0 for w in waited[5:])
+    # 10 tokens beyond the burst at 100/s
+    assert 0.08 <= elapsed < 0.5
+
+
+@pytest.mark.asyncio
+async def test_bucket_rate_zero_disables_limiting():
+    bucket = TokenBucket(rate=0)
+    assert [await bucket.acquire() for _ in range(1000)] == [0.0] * 1000
+
+
+def test_retry_after_from_header_and_try_after():
+    assert retry_after(http_error(429, {"Retry-After": "3"})) == 3.0
+    dated = retry_after(http_error(503, {"Retry-After": "Wed, 21 Oct 2015 07:28:00 GMT"}))
+    assert dated == 0.0
+    assert 9 < retry_after(RateLimitError(try_after=time.time() + 10)) <= 10
+    assert retry_after(RateLimitError(try_after=2)) == 2.0
+    assert retry_after(http_error(500)) is None
+
+
+def test_retryable_classification():
+    assert is_retryable(http_error(429))
+    assert is_retryable(http_error(502))
+    assert is_retryable(httpx.ConnectError("refused"))
+    assert is_retryable(Exception("Status code 503: unavailable"))
+    assert is_retryable(RateLimitError())
+    assert not is_retryable(http_error(404))
+    assert not is_retryable(Exception("Status code 400: bad request"))
+    assert not is_retryable(ValueError("boom"))
+
+
+@pytest.mark.asyncio
+async def test_retries_transient_errors_then_succeeds():
+    throttle = fast_throttle()
+    fn = Flaky(http_error(503), httpx.ReadTimeout("slow"))
+
+    result = await throttle.call(fn, rid="r1")
+
+    assert result.rid == "r1"
+    assert fn.calls == 3
+    assert throttle.stats()["retries"] == 2
+
+
+@pytest.mark.asyncio
+async def test_retry_after_penalizes_the_shared_bucket():
+    throttle = fast_throttle(rate=100, burst=10)
+    fn = Flaky(http_error(429, {"Retry-After": "0.1"}))
+
+    started = time.monotonic()
+    await throttle.call(fn)
+    # Another caller sharing the bucket waits out the same pause
+    await throttle.bucket.acquire()
+    elapsed = time.monotonic() - started
+
+    assert fn.calls == 2
+    assert elapsed >= 0.1
+    assert throttle.stats()["rate_limited"] == 1
+    assert throttle.stats()["throttled_seconds"] >= 0.09
+
+
+@pytest.mark.asyncio
+async def test_retry_after_is_honoured_without_a_rate_limit():
+    throttle = fast_throttle(rate=0)
+    fn = Flaky(http_error(429, {"Retry-After": "0.1"}))
+
+    started = time.monotonic()
+    await throttle.call(fn)
+
+    assert fn.calls == 2
+    assert time.monotonic() - started >= 0.1
+    assert throttle.stats()["throttled_seconds"] >= 0.1
+
+
+def test_refused_classification():
+    assert is_refused(http_error(429))
+    assert is_refused(http_error(503))
+    assert is_refused(RateLimitError())
+    assert not is_refused(http_error(500))
+    assert not is_refused(httpx.ReadTimeout("slow"))
+
+
+@pytest.mark.asyncio
+async def test_non_idempotent_calls_are_only_retried_when_refused():
+    throttle = fast_throttle()
+    fn = Flaky(http_error(429), http_error(503))
+    await throttle.call_non_idempotent(fn)
+    assert fn.calls == 3
+
+    fn = Flaky(httpx.ReadTimeout("slow"))
+    with pytest.raises(httpx.ReadTimeout):
+        await throttle.call_non_idempotent(fn)
+    assert fn.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_client_errors_are_not_retried():
+    throttle = fast_throttle()
+    fn = Flaky(http_error(409))
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await throttle.call(fn)
+    assert fn.calls == 1
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries():
+    throttle = fast_throttle(max_retries=2)
+    fn = Flaky(*[http_error(500) for _ in range(5)])
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await throttle.call(fn)
+    assert fn.calls == 3
+
+
+def test_configure_keeps_burst_when_only_rate_changes():
+    throttle = fast_throttle(rate=10, burst=20)
+    throttle.configure(rate=5)
+    assert (throttle.bucket.rate, throttle.bucket.capacity) == (5, 20)
+    throttle.configure(burst=2, max_retries=7)
+    assert (throttle.bucket.rate, throttle.bucket.capacity, throttle.policy.max_retries) == (5, 2, 7)
+
+
+def test_try_acquire_never_waits():
+    now = [0.0]
+    bucket = TokenBucket(rate=2, capacity=2, clock=lambda: now[0])
+    assert bucket.try_acquire() and bucket.try_acquire()
+    assert not bucket.try_acquire()
+    assert bucket.wait_time() == pytest.approx(0.5)
+    now[0] = 0.5
+    assert bucket.wait_time() == 0
+    assert bucket.try_acquire()
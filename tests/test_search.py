@@ -1,5 +1,15 @@
 import pytest
-from search import search_semantic, search_hybrid, search_merged
+from unittest.mock import AsyncMock, patch
+from nucliadb_models.search import (
+    FindField,
+    FindParagraph,
+    FindResource,
+    KnowledgeboxFindResults,
+    KnowledgeboxSearchResults,
+    Sentence,
+    Sentences,
+)
+from search import search_semantic, search_hybrid, search_merged, iter_section_results
 
 
 @pytest.mark.asyncio
@@ -234,3 +244,59 @@ async def test_hybrid_page_size():
     
     assert isinstance(results, list)
     assert len(results) <= page_size
+
+
+def make_find_response():
+    return KnowledgeboxFindResults(resources={
+        "r1": FindResource(id="r1", fields={"f/a": FindField(paragraphs={
+            "r1/f/a/0-10": FindParagraph(score=0.4, score_type="BM25", text="low", id="r1/f/a/0-10"),
+        })}),
+        "r2": FindResource(id="r2", fields={"f/b": FindField(paragraphs={
+            "r2/f/b/0-10": FindParagraph(score=0.8, score_type="BOTH", text="high", id="r2/f/b/0-10"),
+        })}),
+    })
+
+
+def test_iter_section_results_reads_models_and_json():
+    """Hits are read directly from response models or raw JSON dicts."""
+    res = KnowledgeboxSearchResults(sentences=Sentences(
+        results=[Sentence(score=0.9, rid="r", text="t", field_type="f", field="f/a", index="3")],
+        facets={},
+        min_score=0.1,
+    ))
+    hit = next(iter_section_results(res, "sentences"))
+    assert (hit.rid, hit.index) == ("r", "3")
+    assert list(iter_section_results(res, "fulltext")) == []
+    raw = {"sentences": {"results": [{"rid": "r", "score": 0.9}]}}
+    assert next(iter_section_results(raw, "sentences"))["rid"] == "r"
+
+
+@pytest.mark.asyncio
+async def test_search_merged_extracts_without_model_dump():
+    """search_merged ranks paragraphs straight from the find response."""
+    response = make_find_response()
+    with patch("search.get_search_client", AsyncMock()), \
+            patch("search.sdk.AsyncNucliaSearch") as mock_search, \
+            patch.object(KnowledgeboxFindResults, "model_dump", side_effect=AssertionError):
+        mock_search.return_value.find = AsyncMock(return_value=response)
+        results = await search_merged(query="offline extraction check", page_size=2)
+
+    assert [r["text"] for r in results] == ["high", "low"]
+    assert results[0] == {"rid": "r2", "score": 0.8, "text": "high", "field": "f/b", "search_type": "merged"}
+
+
+@pytest.mark.asyncio
+async def test_search_merged_projection_controls_payload():
+    """Minimal projection asks Nuclia for no resource properties."""
+    response = make_find_response()
+    with patch("search.get_search_client", AsyncMock()), \
+            patch("search.sdk.AsyncNucliaSearch") as mock_search:
+        mock_search.return_value.find = AsyncMock(return_value=response)
+        minimal = await search_merged(query="projection check", page_size=1)
+        full = await search_merged(query="projection check", page_size=1, projection="full")
+
+    requests = [c.kwargs["query"] for c in mock_search.return_value.find.call_args_list]
+    assert requests[0].show == []
+    assert set(requests[1].show) == {"basic", "values", "extra"}
+    assert "resource" not in minimal[0]
+    assert full[0]["resource"]["id"] == "r2"
@@ -0,0 +1,77 @@
+"""Tests for single-flight coalescing of identical searches."""
+import asyncio
+import pytest
+
+from singleflight import SingleFlight, coalesced
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_calls_share_one_run():
+    """Concurrent callers with the same key trigger a single upstream call."""
+    group = SingleFlight()
+    calls = []
+    release = asyncio.Event()
+
+    @coalesced(group, "merged")
+    async def strategy(query: str, page_size: int = 5):
+        calls.append(query)
+        await release.wait()
+        return [{"text": query}]
+
+    tasks = [asyncio.create_task(strategy("What is X")) for _ in range(5)]
+    tasks.append(asyncio.create_task(strategy("what is  x", page_size=5)))
+    await asyncio.sleep(0)
+    release.set()
+    results = await asyncio.gather(*tasks)
+
+    assert len(calls) == 1
+    assert all(r == [{"text": "What is X"}] for r in results)
+    assert results[0] is not results[1]
+    assert group.stats() == {"in_flight": 0, "executions": 1, "collapsed": 5}
+
+
+@pytest.mark.asyncio
+async def test_different_settings_are_not_coalesced():
+    group = SingleFlight()
+    calls = []
+
+    @coalesced(group, "merged")
+    async def strategy(query: str, page_size: int = 5):
+        calls.append(page_size)
+        await asyncio.sleep(0)
+        return []
+
+    await asyncio.gather(strategy("q", page_size=3), strategy("q", page_size=5))
+    assert sorted(calls) == [3, 5]
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_to_all_callers():
+    group = SingleFlight()
+
+    @coalesced(group, "merged")
+    async def strategy(query: str):
+        await asyncio.sleep(0)
+        raise RuntimeError("upstream down")
+
+    results = await asyncio.gather(strategy("q"), strategy("q"), return_exceptions=True)
+    assert all(isinstance(r, RuntimeError) for r in results)
+    assert group.stats()["executions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cancelled_caller_does_not_cancel_shared_call():
+    group = SingleFlight()
+    release = asyncio.Event()
+
+    @coalesced(group, "merged")
+    async def strategy(query: str):
+        await release.wait()
+        return [{"text": query}]
+
+    first = asyncio.create_task(strategy("q"))
+    second = asyncio.create_task(strategy("q"))
+    await asyncio.sleep(0)
+    first.cancel()
+    release.set()
+    assert await second == [{"text": "q"}]
@@ -0,0 +1,106 @@
+"""Tests for the shared processing-status tracker."""
+import asyncio
+import pytest
+from types import SimpleNamespace
+from unittest.mock import patch
+
+from nucliadb_models.metadata import ResourceProcessingStatus
+
+from ratelimit import throttle
+from status_tracker import ProcessingTracker
+
+
+@pytest.fixture(autouse=True)
+def unthrottled():
+    # The tracker has its own budget; keep the shared ingestion limit out of these timings
+    with patch.object(throttle.bucket, "rate", 0):
+        yield
+
+
+class FakeResources:
+    """Resources that report PROCESSED after a set number of status checks."""
+
+    def __init__(self, polls_needed):
+        self.polls_needed = dict(polls_needed)
+        self.calls = []
+
+    async def get(self, rid, show=None):
+        self.calls.append(rid)
+        await asyncio.sleep(0)
+        remaining = self.polls_needed[rid]
+        if remaining == "error":
+            status = ResourceProcessingStatus.ERROR
+        else:
+            self.polls_needed[rid] = remaining - 1
+            status = ResourceProcessingStatus.PROCESSED if remaining <= 1 else ResourceProcessingStatus.PENDING
+        return SimpleNamespace(id=rid, metadata=SimpleNamespace(status=status))
+
+
+def fast_tracker(**kwargs):
+    options = dict(min_interval=0.01, max_interval=0.05, requests_per_second=1000, timeout=5)
+    options.update(kwargs)
+    return ProcessingTracker(**options)
+
+
+@pytest.mark.asyncio
+async def test_waits_for_many_resources_with_progress():
+    resources = FakeResources({"a": 1, "b": 3, "c": 2})
+    progress = []
+    tracker = fast_tracker(on_progress=lambda rid, status, done, total: progress.append((rid, status, done, total)))
+
+    with patch("status_tracker.sdk.AsyncNucliaResource", return_value=resources):
+        results = await tracker.wait_all(["a", "b", "c"])
+
+    assert [r.id for r in results] == ["a", "b", "c"]
+    assert len(resources.calls) == 6
+    assert sorted(rid for rid, *_ in progress) == ["a", "b", "c"]
+    assert progress[-1][1:] == ("PROCESSED", 3, 3)
+    assert tracker.stats()["watching"] == 0
+
+
+@pytest.mark.asyncio
+async def test_duplicate_watch_shares_one_poll_schedule():
+    resources = FakeResources({"a": 2})
+    tracker = fast_tracker()
+
+    with patch("status_tracker.sdk.AsyncNucliaResource", return_value=resources):
+        await asyncio.gather(tracker.wait("a"), tracker.wait("a"))
+
+    assert resources.calls == ["a", "a"]
+
+
+@pytest.mark.asyncio
+async def test_processing_error_and_timeout_fail_the_waiter():
+    resources = FakeResources({"bad": "error", "slow": 1000})
+    tracker = fast_tracker()
+
+    with patch("status_tracker.sdk.AsyncNucliaResource", return_value=resources):
+        with pytest.raises(RuntimeError):
+            await tracker.wait("bad")
+        with pytest.raises(TimeoutError):
+            await tracker.wait("slow", timeout=0.1)
+
+
+@pytest.mark.asyncio
+async def test_request_budget_caps_status_calls():
+    resources = FakeResources({f"r{i}": 1000 for i in range(20)})
+    tracker = fast_tracker(min_interval=0.001, max_interval=0.001, requests_per_second=50)
+
+    with patch("status_tracker.sdk.AsyncNucliaResource", return_value=resources):
+        waits = [asyncio.create_task(tracker.wait(f"r{i}", timeout=0.3)) for i in range(20)]
+        await asyncio.gather(*waits, return_exceptions=True)
+
+    # ~0.3s at 50/s plus the initial burst of 50, far below one call per rid per ms
+    assert len(resources.calls) <= 70
+
+
+@pytest.mark.asyncio
+async def test_zero_requests_per_second_disables_the_budget():
+    resources = FakeResources({"a": 1, "b": 2})
+    tracker = fast_tracker(requests_per_second=0)
+
+    with patch("status_tracker.sdk.AsyncNucliaResource", return_value=resources):
+        results = await asyncio.wait_for(tracker.wait_all(["a", "b"]), timeout=2)
+
+    assert [r.id for r in results] == ["a", "b"]
+    assert len(resources.calls) == 3
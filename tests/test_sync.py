@@ -0,0 +1,96 @@
+"""Tests for deletion and rename sync between DATA_DIR and the KB."""
+import pytest
+from unittest.mock import patch
+
+from indexing import upload_folder
+from manifest import Manifest
+from sync import sync_folder
+from utils import safe_slug_from_path
+from test_indexing import fake_kb, make_pdfs  # noqa: F401
+
+
+@pytest.fixture
+def synced_kb(fake_kb):
+    with patch("sync.sdk.AsyncNucliaResource", return_value=fake_kb):
+        yield fake_kb
+
+
+@pytest.mark.asyncio
+async def test_sync_deletes_resources_of_removed_files(synced_kb, tmp_path):
+    make_pdfs(tmp_path, 3)
+    first = await upload_folder(tmp_path, wait=False)
+    (tmp_path / "doc1.pdf").unlink()
+
+    results = await sync_folder(tmp_path)
+
+    assert results["doc1.pdf"] == (first["doc1.pdf"][0], "Deleted")
+    assert synced_kb.deleted == [first["doc1.pdf"][0]]
+    assert len(synced_kb.resources) == 2
+
+
+@pytest.mark.asyncio
+async def test_sync_relinks_renamed_file_instead_of_reuploading(synced_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    first = await upload_folder(tmp_path, wait=False)
+    (tmp_path / "doc0.pdf").rename(tmp_path / "renamed.pdf")
+
+    results = await sync_folder(tmp_path)
+
+    rid = first["doc0.pdf"][0]
+    assert results["renamed.pdf"] == (rid, "Relinked")
+    assert synced_kb.resources[rid]["title"] == "renamed.pdf"
+    assert synced_kb.deleted == []
+    assert len(synced_kb.uploads) == 2
+    with Manifest(tmp_path / ".nuclia-manifest.sqlite") as manifest:
+        assert manifest.get("doc0.pdf") is None
+        assert manifest.get("renamed.pdf").rid == rid
+
+
+@pytest.mark.asyncio
+async def test_sync_dry_run_changes_nothing(synced_kb, tmp_path):
+    make_pdfs(tmp_path, 2)
+    await upload_folder(tmp_path, wait=False)
+    (tmp_path / "doc0.pdf").unlink()
+
+    results = await sync_folder(tmp_path, dry_run=True)
+
+    assert results["doc0.pdf"][1] == "Would delete"
+    assert synced_kb.deleted == []
+
+
+@pytest.mark.asyncio
+async def test_sync_prunes_unknown_resources_only_when_asked(synced_kb, tmp_path):
+    make_pdfs(tmp_path, 1)
+    await upload_folder(tmp_path, wait=False)
+    unknown_slug = safe_slug_from_path(str(tmp_path / "gone.pdf"), tmp_path)
+    unknown = await synced_kb.create(title="gone.pdf", slug=unknown_slug)
+    legacy = await synced_kb.create(title="doc0.pdf", slug="doc0-1700000000")
+    foreign = await synced_kb.create(title="other", slug="created-by-another-tool")
+
+    await sync_folder(tmp_path)
+    assert unknown in synced_kb.resources
+
+    results = await sync_folder(tmp_path, prune_unknown=True)
+    assert results[unknown_slug] == (unknown, "Deleted")
+    assert unknown not in synced_kb.resources
+    # Only slugs in our own format are pruned
+    assert legacy in synced_kb.resources
+    assert foreign in synced_kb.resources
+
+
+@pytest.mark.asyncio
+async def test_sync_keeps_existing_files_outside_the_filter(synced_kb, tmp_path):
+    make_pdfs(tmp_path, 1)
+    (tmp_path / "notes.md").write_text("# Notes")
+    first = await upload_folder(tmp_path, wait=False)
+
+    results = await sync_folder(tmp_path, include=("*.pdf",))
+
+    assert "notes.md" not in results
+    assert synced_kb.deleted == []
+    with Manifest(tmp_path / ".nuclia-manifest.sqlite") as manifest:
+        assert manifest.get("notes.md").rid == first["notes.md"][0]
+
+    (tmp_path / "notes.md").unlink()
+    results = await sync_folder(tmp_path, include=("*.pdf",))
+    assert results["notes.md"] == (first["notes.md"][0], "Deleted")
@@ -0,0 +1,115 @@
+"""Tests for per-request phase tracing and the Server-Timing header."""
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import search
+from api import app
+from tracing import RequestTrace, ServerTimingMiddleware, SpanExporter, server_timing, span
+
+
+def timing_phases(header: str) -> dict[str, float]:
+    phases = {}
+    for entry in header.split(","):
+        name, *params = entry.strip().split(";")
+        phases[name] = float(next(p for p in params if p.startswith("dur="))[4:])
+    return phases
+
+
+def test_span_outside_a_request_is_a_no_op():
+    with span("upstream"):
+        pass
+
+
+def test_server_timing_sums_repeated_phases():
+    trace = RequestTrace(started=0.0)
+    trace.add("upstream", 0.0, 0.010)
+    trace.add("upstream", 0.0, 0.030)
+    trace.add("cache", 0.0, 0.001)
+    assert server_timing(trace, 50) == 'upstream;dur=40.0;desc="2 spans", cache;dur=1.0, total;dur=50.0'
+
+
+def test_search_response_has_server_timing_for_every_phase():
+    hit = SimpleNamespace(rid="r1", score=0.8, text="hello", field="f/a", index=0)
+    response = SimpleNamespace(sentences=SimpleNamespace(results=[hit]), resources={})
+
+    async def slow_search(query, ndb):
+        await asyncio.sleep(0.02)
+        return response
+
+    with patch("search.sdk.AsyncNucliaSearch", return_value=SimpleNamespace(search=slow_search)), \
+            patch("search.get_search_client", AsyncMock()), \
+            patch.object(search.result_cache, "ttl", 300):
+        search.result_cache.clear()
+        client = TestClient(app)
+        first = client.post("/search", json={"query": "server timing test", "search_type": "semantic"})
+        second = client.post("/search", json={"query": "server timing test", "search_type": "semantic"})
+
+    assert first.status_code == 200
+    phases = timing_phases(first.headers["server-timing"])
+    assert {"auth", "cache", "upstream", "extraction", "serialization", "total"} <= set(phases)
+    assert phases["upstream"] >= 20
+    assert phases["total"] >= phases["upstream"]
+    # Served from the cache: no upstream call the second time
+    assert "upstream" not in timing_phases(second.headers["server-timing"])
+
+
+def test_spans_are_exported_as_json_lines(tmp_path):
+    inner = FastAPI()
+
+    @inner.get("/work")
+    async def work():
+        with span("upstream"):
+            await asyncio.sleep(0.01)
+        return {"ok": True}
+
+    exporter = SpanExporter(tmp_path / "traces" / "spans.jsonl")
+    inner.add_middleware(ServerTimingMiddleware, exporter=exporter)
+    client = TestClient(inner)
+    client.get("/work")
+    client.get("/missing")
+    exporter.close()
+
+    records = [json.loads(line) for line in (tmp_path / "traces" / "spans.jsonl").read_text().splitlines()]
+    assert [(r["path"], r["status"]) for r in records] == [("/work", 200), ("/missing", 404)]
+    assert records[0]["spans"][0]["name"] == "upstream"
+    assert records[0]["spans"][0]["duration_ms"] >= 10
+    assert records[0]["duration_ms"] >= records[0]["spans"][0]["duration_ms"]
+    assert records[0]["trace_id"] != records[1]["trace_id"]
+
+
+@pytest.mark.asyncio
+async def test_coalesced_followers_record_their_wait():
+    from singleflight import SingleFlight, coalesced
+    from tracing import _current
+
+    group = SingleFlight()
+    release = asyncio.Event()
+
+    @coalesced(group, "semantic")
+    async def strategy(query: str):
+        with span("upstream"):
+            await release.wait()
+        return [{"text": query}]
+
+    async def traced_call():
+        trace = RequestTrace()
+        _current.set(trace)
+        await strategy("q")
+        return trace
+
+    leader = asyncio.create_task(traced_call())
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(traced_call())
+    await asyncio.sleep(0.02)
+    release.set()
+    leader_trace, follower_trace = await asyncio.gather(leader, follower)
+
+    assert "upstream" in leader_trace.totals()
+    assert "upstream" not in follower_trace.totals()
+    assert follower_trace.totals()["coalesced"][0] >= 15
@@ -0,0 +1,57 @@
+"""Tests for content hashing and slug generation."""
+import hashlib
+import os
+
+from utils import file_content_hash, is_path_slug, legacy_slug_from_path, safe_slug_from_path
+
+
+def test_content_hash_matches_sha256(tmp_path):
+    path = tmp_path / "doc.pdf"
+    data = os.urandom(300_000)
+    path.write_bytes(data)
+
+    expected = f"sha256:{hashlib.sha256(data).hexdigest()}"
+    assert file_content_hash(str(path), chunk_size=4096, mmap_threshold=None) == expected
+    assert file_content_hash(str(path), chunk_size=4096, mmap_threshold=1) == expected
+
+
+def test_content_hash_handles_empty_file(tmp_path):
+    path = tmp_path / "empty.pdf"
+    path.write_bytes(b"")
+    assert file_content_hash(str(path), mmap_threshold=0) == f"sha256:{hashlib.sha256(b'').hexdigest()}"
+
+
+def test_content_hash_ignores_mtime(tmp_path):
+    path = tmp_path / "doc.pdf"
+    path.write_bytes(b"%PDF-1.4 same bytes")
+    before = file_content_hash(str(path))
+    os.utime(path, (0, 0))
+    assert file_content_hash(str(path)) == before
+
+
+def test_slug_is_stable_and_path_based(tmp_path):
+    first = tmp_path / "a" / "report v1.pdf"
+    second = tmp_path / "b" / "report v1.pdf"
+    for path in (first, second):
+        path.parent.mkdir()
+        path.write_bytes(b"x")
+
+    slug = safe_slug_from_path(str(first), tmp_path)
+    os.utime(first, (0, 0))
+
+    assert slug == safe_slug_from_path(str(first), tmp_path)
+    assert slug.startswith("report_v1-")
+    assert slug != safe_slug_from_path(str(second), tmp_path)
+
+
+def test_legacy_slug_is_stem_and_mtime(tmp_path):
+    path = tmp_path / "my report.pdf"
+    path.write_bytes(b"x")
+    os.utime(path, (1700000000, 1700000000))
+    assert legacy_slug_from_path(str(path)) == "my_report-1700000000"
+
+
+def test_is_path_slug(tmp_path):
+    assert is_path_slug(safe_slug_from_path(str(tmp_path / "a b.pdf"), tmp_path))
+    assert not is_path_slug("doc0-1700000000")
+    assert not is_path_slug("created-by-another-tool")
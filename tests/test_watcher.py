@@ -0,0 +1,225 @@
+"""Tests for the DATA_DIR watcher: change detection, debouncing and batch dispatch."""
+import asyncio
+import pytest
+from unittest.mock import AsyncMock, patch
+
+from manifest import Manifest, new_entry
+from watcher import (
+    _EVENT_HEADER,
+    CREATED,
+    DELETED,
+    IN_Q_OVERFLOW,
+    MODIFIED,
+    RESCAN,
+    InotifyWatcher,
+    PollingWatcher,
+    apply_batch,
+    batched,
+    create_watcher,
+    scan_folder,
+    watch_folder,
+)
+
+
+def inotify_or_skip(path):
+    try:
+        return InotifyWatcher(path)
+    except (OSError, AttributeError, TypeError):
+        pytest.skip("inotify not available")
+
+
+def record(tmp_path, *keys):
+    """Manifest entries as if ``keys`` had been uploaded."""
+    with Manifest(tmp_path / ".nuclia-manifest.sqlite") as manifest:
+        for key in keys:
+            stat = (tmp_path / ".nuclia-manifest.sqlite").stat()
+            manifest.record(new_entry(key, stat, "sha256:x", key, f"rid-{key}", "processed"))
+
+
+async def collect(changes, count, timeout=2.0):
+    seen = []
+
+    async def take():
+        async for change in changes:
+            seen.append(change)
+            if len(seen) == count:
+                return
+
+    await asyncio.wait_for(take(), timeout)
+    return seen
+
+
+@pytest.mark.asyncio
+async def test_polling_watcher_reports_created_modified_and_deleted(tmp_path):
+    kept = tmp_path / "kept.pdf"
+    gone = tmp_path / "gone.pdf"
+    kept.write_bytes(b"v1")
+    gone.write_bytes(b"x")
+    watcher = PollingWatcher(tmp_path, interval=0.01)
+
+    kept.write_bytes(b"version 2")
+    gone.unlink()
+    (tmp_path / "new.pdf").write_bytes(b"new")
+
+    changes = await collect(watcher.changes(), 3)
+    assert set(changes) == {
+        (MODIFIED, kept.resolve()),
+        (DELETED, gone.resolve()),
+        (CREATED, (tmp_path / "new.pdf").resolve()),
+    }
+
+
+@pytest.mark.asyncio
+async def test_inotify_watcher_reports_writes_and_deletes(tmp_path):
+    try:
+        watcher = InotifyWatcher(tmp_path)
+    except (OSError, AttributeError, TypeError):
+        pytest.skip("inotify not available")
+
+    changes = watcher.changes()
+    pending = asyncio.create_task(collect(changes, 2))
+    await asyncio.sleep(0.05)
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"%PDF")
+    doc.unlink()
+
+    assert await pending == [(MODIFIED, doc.resolve()), (DELETED, doc.resolve())]
+    await changes.aclose()
+    watcher.close()
+
+
+def test_create_watcher_falls_back_to_polling(tmp_path):
+    with patch("watcher.InotifyWatcher", side_effect=OSError("no inotify")):
+        assert isinstance(create_watcher(tmp_path), PollingWatcher)
+    assert isinstance(create_watcher(tmp_path, polling=True), PollingWatcher)
+
+
+@pytest.mark.asyncio
+async def test_batched_debounces_and_collapses_repeated_events(tmp_path):
+    a, b = tmp_path / "a.pdf", tmp_path / "b.pdf"
+
+    async def burst():
+        for change in [(CREATED, a), (MODIFIED, a), (MODIFIED, b), (MODIFIED, b)]:
+            yield change
+        await asyncio.sleep(0.2)
+        yield DELETED, a
+        await asyncio.sleep(10)
+
+    batches = batched(burst(), debounce=0.05, max_batch=10)
+    assert await batches.__anext__() == {a: CREATED, b: MODIFIED}
+    assert await batches.__anext__() == {a: DELETED}
+    await batches.aclose()
+
+
+@pytest.mark.asyncio
+async def test_batched_releases_full_batches_without_waiting(tmp_path):
+    async def flood():
+        for i in range(5):
+            yield MODIFIED, tmp_path / f"{i}.pdf"
+        await asyncio.sleep(10)
+
+    batches = batched(flood(), debounce=5, max_batch=2)
+    first = await asyncio.wait_for(batches.__anext__(), 1)
+    assert len(first) == 2
+    await batches.aclose()
+
+
+@pytest.mark.asyncio
+async def test_apply_batch_upserts_existing_and_deletes_missing(tmp_path):
+    present = tmp_path / "present.pdf"
+    present.write_bytes(b"%PDF")
+    batch = {
+        present.resolve(): MODIFIED,
+        (tmp_path / "removed.pdf").resolve(): DELETED,
+        (tmp_path / "notes.sqlite").resolve(): MODIFIED,
+    }
+
+    with patch("watcher.ingest_files", new_callable=AsyncMock) as ingest, \
+            patch("watcher.delete_files", new_callable=AsyncMock) as delete:
+        await apply_batch(batch, tmp_path)
+
+    assert ingest.await_args.args[0] == [present.resolve()]
+    assert delete.await_args.args[0] == [(tmp_path / "removed.pdf").resolve()]
+
+
+@pytest.mark.asyncio
+async def test_inotify_watcher_reports_directory_renames(tmp_path):
+    old = tmp_path / "old"
+    (old / "inner").mkdir(parents=True)
+    (old / "inner" / "doc.pdf").write_bytes(b"%PDF")
+    watcher = inotify_or_skip(tmp_path)
+
+    changes = watcher.changes()
+    pending = asyncio.create_task(collect(changes, 2))
+    await asyncio.sleep(0.05)
+    old.rename(tmp_path / "new")
+
+    new_doc = (tmp_path / "new" / "inner" / "doc.pdf").resolve()
+    assert await pending == [(DELETED, old.resolve()), (CREATED, new_doc)]
+    # Only the renamed tree is watched, under its new path
+    assert all(not str(d).startswith(str(old.resolve())) for d in watcher._dirs.values())
+    assert (tmp_path / "new" / "inner").resolve() in watcher._dirs.values()
+    await changes.aclose()
+    watcher.close()
+
+
+def test_inotify_queue_overflow_asks_for_a_rescan(tmp_path):
+    watcher = inotify_or_skip(tmp_path)
+    overflow = _EVENT_HEADER.pack(-1, IN_Q_OVERFLOW, 0, 0)
+    assert watcher._parse(overflow) == [(RESCAN, tmp_path.resolve())]
+    watcher.close()
+
+
+@pytest.mark.asyncio
+async def test_apply_batch_deletes_every_entry_under_a_removed_directory(tmp_path):
+    record(tmp_path, "old/a.pdf", "old/inner/b.md", "older/c.pdf")
+
+    with patch("watcher.ingest_files", new_callable=AsyncMock), \
+            patch("watcher.delete_files", new_callable=AsyncMock) as delete:
+        await apply_batch({(tmp_path / "old").resolve(): DELETED}, tmp_path)
+
+    assert delete.await_args.args[0] == [tmp_path.resolve() / "old/a.pdf", tmp_path.resolve() / "old/inner/b.md"]
+
+
+@pytest.mark.asyncio
+async def test_scan_deletes_resources_of_files_removed_while_not_watching(tmp_path):
+    (tmp_path / "kept.pdf").write_bytes(b"%PDF")
+    record(tmp_path, "kept.pdf", "removed.pdf")
+
+    with patch("watcher.ingest_files", new_callable=AsyncMock) as ingest, \
+            patch("watcher.delete_files", new_callable=AsyncMock) as delete:
+        await scan_folder(tmp_path)
+        await apply_batch({tmp_path.resolve(): RESCAN}, tmp_path)
+
+    assert ingest.await_args.args[0] == [tmp_path / "kept.pdf"]
+    assert delete.await_count == 2
+    assert delete.await_args.args[0] == [tmp_path.resolve() / "removed.pdf"]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("polling", [False, True])
+async def test_one_delete_is_one_batch_despite_manifest_writes(tmp_path, polling):
+    doc = tmp_path / "doc.pdf"
+    doc.write_bytes(b"%PDF")
+    record(tmp_path, "doc.pdf")
+    batches = []
+
+    async def counting_apply(batch, *args, **kwargs):
+        batches.append(batch)
+        await real_apply(batch, *args, **kwargs)
+
+    real_apply = apply_batch
+    with patch("watcher.apply_batch", counting_apply), \
+            patch("watcher.ingest_files", new_callable=AsyncMock), \
+            patch("watcher.delete_files", new_callable=AsyncMock):
+        task = asyncio.create_task(watch_folder(
+            tmp_path, debounce=0.05, polling=polling, poll_interval=0.02, initial_scan=False,
+        ))
+        await asyncio.sleep(0.1)
+        doc.unlink()
+        await asyncio.sleep(0.6)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert batches == [{doc.resolve(): DELETED}]
@@ -0,0 +1,161 @@
+"""Per-request phase timing: Server-Timing headers and an optional JSON-lines span export."""
+import json
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from uuid import uuid4
+
+from config import TRACE_EXPORT_PATH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class Span:
+    name: str
+    # Milliseconds since the request started
+    start_ms: float
+    duration_ms: float
+
+
+@dataclass
+class RequestTrace:
+    """Spans recorded while handling one request."""
+    started: float = field(default_factory=time.perf_counter)
+    trace_id: str = field(default_factory=lambda: uuid4().hex)
+    spans: list[Span] = field(default_factory=list)
+
+    def add(self, name: str, started: float, ended: float) -> None:
+        self.spans.append(Span(
+            name=name,
+            start_ms=round((started - self.started) * 1000, 3),
+            duration_ms=round((ended - started) * 1000, 3),
+        ))
+
+    def totals(self) -> dict[str, tuple[float, int]]:
+        """Phase name -> (total milliseconds, number of spans), in first-seen order."""
+        totals: dict[str, tuple[float, int]] = {}
+        for span_ in self.spans:
+            duration, count = totals.get(span_.name, (0.0, 0))
+            totals[span_.name] = (duration + span_.duration_ms, count + 1)
+        return totals
+
+
+_current: ContextVar[RequestTrace | None] = ContextVar("request_trace", default=None)
+
+
+def current_trace() -> RequestTrace | None:
+    return _current.get()
+
+
+@contextmanager
+def span(name: str):
+    """
+    Time the block as phase ``name`` of the current request, if any.
+
+    Concurrent tasks started by a request (e.g. the strategies of
+    /search/compare) inherit its trace, so their spans add up per phase.
+    """
+    trace = _current.get()
+    if trace is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        trace.add(name, started, time.perf_counter())
+
+
+def server_timing(trace: RequestTrace, total_ms: float | None = None) -> str:
+    entries = []
+    for name, (duration, count) in trace.totals().items():
+        entry = f"{name};dur={duration:.1f}"
+        if count > 1:
+            entry += f';desc="{count} spans"'
+        entries.append(entry)
+    if total_ms is not None:
+        entries.append(f"total;dur={total_ms:.1f}")
+    return ", ".join(entries)
+
+
+class SpanExporter:
+    """Append one JSON object per request to a local file."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._file = open(self.path, "a", buffering=1)
+
+    def export(self, record: dict) -> None:
+        line = json.dumps(record, separators=(",", ":"))
+        with self._lock:
+            self._file.write(line + "\n")
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
+
+
+class ServerTimingMiddleware:
+    """
+    ASGI middleware that traces each HTTP request.
+
+    Phases recorded with ``span`` while the request is handled are summed
+    into a ``Server-Timing`` header, plus the middleware's own ``total``.
+    For streaming responses the header only covers the phases finished
+    before the first byte. With an exporter, every request is also written
+    out with its individual spans once the response is complete.
+    """
+
+    def __init__(self, app, exporter: SpanExporter | None = None):
+        self.app = app
+        self.exporter = exporter
+        if exporter is None and TRACE_EXPORT_PATH:
+            self.exporter = SpanExporter(TRACE_EXPORT_PATH)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = RequestTrace()
+        token = _current.set(trace)
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                total_ms = (time.perf_counter() - trace.started) * 1000
+                headers = list(message.get("headers", []))
+                headers.append((b"server-timing", server_timing(trace, total_ms).encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            if self.exporter is not None:
+                self._export(scope, trace, status_code)
+
+    def _export(self, scope, trace: RequestTrace, status_code: int) -> None:
+        try:
+            self.exporter.export({
+                "trace_id": trace.trace_id,
+                "time": datetime.now(timezone.utc).isoformat(),
+                "method": scope.get("method"),
+                "path": scope.get("path"),
+                "status": status_code,
+                "duration_ms": round((time.perf_counter() - trace.started) * 1000, 3),
+                "spans": [vars(s) for s in trace.spans],
+            })
+        except Exception as e:
+            logger.error(f"Span export failed: {e}")
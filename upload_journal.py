@@ -0,0 +1,80 @@
+"""Crash-safe journal of in-progress chunked uploads, so an interrupted upload can resume."""
+import sqlite3
+import time
+from dataclasses import astuple, dataclass, fields
+from pathlib import Path
+
+UPLOADING = "uploading"
+UPLOADED = "uploaded"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS uploads (
+    path TEXT PRIMARY KEY,
+    content_hash TEXT NOT NULL,
+    rid TEXT NOT NULL,
+    field TEXT NOT NULL,
+    upload_url TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    offset INTEGER NOT NULL,
+    state TEXT NOT NULL,
+    updated_at REAL NOT NULL
+)
+"""
+
+
+@dataclass
+class JournalEntry:
+    """
+    One file's upload progress.
+
+    ``state`` is UPLOADING while chunks are being sent (``offset`` is the last
+    offset the server acknowledged) and UPLOADED once every byte is in but the
+    ingest_hash metadata has not been written yet. The entry is removed once
+    the metadata update succeeds.
+    """
+    path: str
+    content_hash: str
+    rid: str
+    field: str
+    upload_url: str
+    size: int
+    offset: int = 0
+    state: str = UPLOADING
+    updated_at: float = 0.0
+
+
+_COLUMNS = ", ".join(f.name for f in fields(JournalEntry))
+_PLACEHOLDERS = ", ".join("?" for _ in fields(JournalEntry))
+
+
+class UploadJournal:
+    """SQLite-backed journal; every change is committed before the next chunk is sent."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(_SCHEMA)
+        self._conn.commit()
+
+    def __enter__(self) -> "UploadJournal":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def get(self, path: str) -> JournalEntry | None:
+        row = self._conn.execute(f"SELECT {_COLUMNS} FROM uploads WHERE path = ?", (path,)).fetchone()
+        return JournalEntry(*row) if row else None
+
+    def save(self, entry: JournalEntry) -> None:
+        entry.updated_at = time.time()
+        with self._conn:
+            self._conn.execute(f"INSERT OR REPLACE INTO uploads ({_COLUMNS}) VALUES ({_PLACEHOLDERS})", astuple(entry))
+
+    def remove(self, path: str) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM uploads WHERE path = ?", (path,))
+
+    def close(self) -> None:
+        self._conn.close()
@@ -1,8 +1,9 @@
 import re
 import os
+import hashlib
+import mmap
 from pathlib import Path
-from nuclia import sdk
-from nucliadb_models.metadata import ResourceProcessingStatus
+from status_tracker import get_tracker
 
 try:
     from nucliadb_sdk.v2 import exceptions as ndb_exceptions
@@ -10,11 +11,75 @@ except ImportError:
     ndb_exceptions = None
 
 
-def safe_slug_from_filename(path: str) -> str:
-    """Generate slug from filename + mtime for idempotency."""
-    filename = Path(path).stem
-    safe_name = re.sub(r"[^A-Za-z0-9_\-:]", "_", filename)
-    return f"{safe_name}-{int(os.path.getmtime(path))}"
+HASH_CHUNK_SIZE = 1024 * 1024
+# safe_slug_from_path output. Legacy slugs end in a 10-digit mtime, so an
+# all-digit suffix is not taken as ours.
+PATH_SLUG = re.compile(r"[A-Za-z0-9_\-:]*-(?![0-9]{10}$)[0-9a-f]{10}")
+MMAP_THRESHOLD = 64 * 1024 * 1024
+
+
+def safe_slug_from_path(path: str, root: str | Path | None = None) -> str:
+    """
+    Generate a stable slug from the file path.
+
+    The slug is the sanitized file stem plus a short digest of the path
+    relative to ``root`` (or of the bare filename), so it survives touch and
+    copy-in-place but stays unique for same-named files in different folders.
+    """
+    file_path = Path(path)
+    relative = file_path.relative_to(root) if root else Path(file_path.name)
+    safe_name = re.sub(r"[^A-Za-z0-9_\-:]", "_", file_path.stem)
+    digest = hashlib.sha1(relative.as_posix().encode("utf-8")).hexdigest()[:10]
+    return f"{safe_name}-{digest}"
+
+
+def is_path_slug(slug: str) -> bool:
+    """Whether ``slug`` looks like it came from safe_slug_from_path."""
+    return PATH_SLUG.fullmatch(slug) is not None
+
+
+def legacy_slug_from_path(path: str) -> str:
+    """
+    The slug uploads used before slugs were path-based: sanitized stem plus
+    the file's mtime. Only used to find and migrate those resources.
+    """
+    file_path = Path(path)
+    safe_name = re.sub(r"[^A-Za-z0-9_\-:]", "_", file_path.stem)
+    return f"{safe_name}-{int(os.path.getmtime(file_path))}"
+
+
+def file_content_hash(
+    path: str,
+    chunk_size: int = HASH_CHUNK_SIZE,
+    mmap_threshold: int | None = MMAP_THRESHOLD,
+) -> str:
+    """
+    SHA-256 of the file contents, read in chunks so memory stays flat.
+
+    Files of at least ``mmap_threshold`` bytes are hashed through a read-only
+    memory map instead of buffered reads. Pass None to disable mmap.
+    """
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        size = os.fstat(f.fileno()).st_size
+        if mmap_threshold is not None and size and size >= mmap_threshold:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                with memoryview(mapped) as view:
+                    for offset in range(0, size, chunk_size):
+                        digest.update(view[offset:offset + chunk_size])
+        else:
+            while chunk := f.read(chunk_size):
+                digest.update(chunk)
+    return f"sha256:{digest.hexdigest()}"
+
+
+def file_md5(path: str, chunk_size: int = HASH_CHUNK_SIZE) -> str:
+    """Hex MD5 of the file contents, as expected in TUS upload metadata."""
+    digest = hashlib.md5(usedforsecurity=False)
+    with open(path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            digest.update(chunk)
+    return digest.hexdigest()
 
 
 def normalize_id(resource_or_id):
@@ -27,15 +92,6 @@ def normalize_id(resource_or_id):
     raise RuntimeError("Could not normalize resource id from SDK response")
 
 
-async def wait_until_processed(rid: str, interval: int = 2, timeout: int = 900):
-    """Poll resource until PROCESSED status."""
-    res_api = sdk.AsyncNucliaResource()
-    import asyncio
-    deadline = asyncio.get_event_loop().time() + timeout
-    while True:
-        res = await res_api.get(rid=rid, show=["basic"])
-        if res.metadata.status == ResourceProcessingStatus.PROCESSED:
-            return res
-        if asyncio.get_event_loop().time() > deadline:
-            raise TimeoutError(f"Timed out waiting for {rid}")
-        await asyncio.sleep(interval)
+async def wait_until_processed(rid: str, timeout: float | None = None):
+    """Wait until the resource reaches PROCESSED status, via the shared status tracker."""
+    return await get_tracker().wait(rid, timeout)
@@ -0,0 +1,395 @@
+"""Watch DATA_DIR for file changes and ingest them incrementally."""
+import asyncio
+import ctypes
+import ctypes.util
+import logging
+import os
+import struct
+from pathlib import Path
+from typing import AsyncIterator, Callable
+
+from config import (
+    INGEST_MANIFEST_PATH,
+    WATCH_DEBOUNCE,
+    WATCH_MAX_BATCH,
+    WATCH_POLL_INTERVAL,
+)
+from filetypes import DEFAULT_EXCLUDE, DEFAULT_INCLUDE, discover_files, is_excluded, is_included
+from indexing import delete_files, ingest_files, journal_path, manifest_file
+from manifest import Manifest
+from sync import find_orphans
+
+logger = logging.getLogger(__name__)
+
+CREATED = "created"
+MODIFIED = "modified"
+DELETED = "deleted"
+# Events were lost; the whole folder has to be diffed again
+RESCAN = "rescan"
+
+# A change event: (kind, absolute path)
+Change = tuple[str, Path]
+# Returns True for paths whose changes are not reported
+Skip = Callable[[Path], bool]
+
+# inotify(7) constants
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+_WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def state_files(data_dir: Path, manifest_path: Path | None = INGEST_MANIFEST_PATH) -> tuple[Path, ...]:
+    """The manifest and upload journal, which ingesting writes to."""
+    return (manifest_file(data_dir, manifest_path).resolve(), journal_path(data_dir).resolve())
+
+
+def skip_paths(data_dir: Path, exclude=DEFAULT_EXCLUDE, manifest_path: Path | None = INGEST_MANIFEST_PATH) -> Skip:
+    """
+    A filter for changes nobody needs to hear about: excluded paths and our
+    own state files, including SQLite's -wal/-shm/-journal companions.
+    Reporting those would make every batch trigger another one.
+    """
+    root = data_dir.resolve()
+    state = state_files(data_dir, manifest_path)
+
+    def skip(path: Path) -> bool:
+        if any(path.parent == s.parent and (path.name == s.name or path.name.startswith(s.name + "-")) for s in state):
+            return True
+        try:
+            relative = path.relative_to(root).as_posix()
+        except ValueError:
+            return True
+        return is_excluded(relative, exclude)
+
+    return skip
+
+
+def _never(path: Path) -> bool:
+    return False
+
+
+class InotifyWatcher:
+    """
+    Linux inotify watcher over ``root`` and its subdirectories.
+
+    Files are reported on close-after-write rather than on create, so a
+    file still being copied in is not picked up half-written.
+    """
+
+    def __init__(self, root: Path, skip: Skip = _never):
+        self.skip = skip
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.root = Path(root).resolve()
+        self._fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: dict[int, Path] = {}
+        for directory, _, _ in os.walk(self.root):
+            self._watch_dir(Path(directory))
+
+    def _watch_dir(self, directory: Path) -> None:
+        wd = self._add_watch(self._fd, os.fsencode(directory), _WATCH_MASK)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {directory}")
+        self._dirs[wd] = directory
+
+    def _forget_dir(self, directory: Path) -> None:
+        """Stop watching a directory that was moved away or removed, and everything under it."""
+        for wd, watched in list(self._dirs.items()):
+            if watched == directory or directory in watched.parents:
+                del self._dirs[wd]
+                # Fails harmlessly if the kernel already dropped the watch
+                self._rm_watch(self._fd, wd)
+
+    def _parse(self, data: bytes) -> list[Change]:
+        changes = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b"\0")
+            offset += length
+            if wd == -1 or mask & IN_Q_OVERFLOW:
+                logger.warning("inotify queue overflowed, rescanning")
+                changes.append((RESCAN, self.root))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not name:
+                continue
+            path = directory / os.fsdecode(name)
+            if self.skip(path):
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_CREATE | IN_MOVED_TO):
+                    for subdirectory, _, _ in os.walk(path):
+                        self._watch_dir(Path(subdirectory))
+                    # Files moved in with the directory produce no events of their own
+                    changes.extend((CREATED, p) for p in path.rglob("*") if p.is_file() and not self.skip(p))
+                elif mask & (IN_MOVED_FROM | IN_DELETE):
+                    self._forget_dir(path)
+                    # Nor do files moved out with it; apply_batch deletes
+                    # the manifest entries under the directory
+                    changes.append((DELETED, path))
+                continue
+            if mask & (IN_MOVED_FROM | IN_DELETE):
+                changes.append((DELETED, path))
+            elif mask & IN_MOVED_TO:
+                changes.append((CREATED, path))
+            elif mask & IN_CLOSE_WRITE:
+                changes.append((MODIFIED, path))
+        return changes
+
+    async def changes(self) -> AsyncIterator[Change]:
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue[Change] = asyncio.Queue()
+
+        def readable():
+            try:
+                data = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                return
+            for change in self._parse(data):
+                queue.put_nowait(change)
+
+        loop.add_reader(self._fd, readable)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            loop.remove_reader(self._fd)
+
+    def close(self) -> None:
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """Portable fallback that diffs a (size, mtime) snapshot of ``root`` every ``interval`` seconds."""
+
+    def __init__(self, root: Path, interval: float = WATCH_POLL_INTERVAL, skip: Skip = _never):
+        self.root = Path(root).resolve()
+        self.interval = interval
+        self.skip = skip
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                path = Path(directory) / name
+                if self.skip(path):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (stat.st_size, stat.st_mtime_ns)
+        return snapshot
+
+    async def changes(self) -> AsyncIterator[Change]:
+        while True:
+            await asyncio.sleep(self.interval)
+            current = await asyncio.to_thread(self._scan)
+            previous, self._snapshot = self._snapshot, current
+            for path, signature in current.items():
+                if path not in previous:
+                    yield CREATED, path
+                elif previous[path] != signature:
+                    yield MODIFIED, path
+            for path in previous.keys() - current.keys():
+                yield DELETED, path
+
+    def close(self) -> None:
+        pass
+
+
+def create_watcher(root: Path, polling: bool = False, poll_interval: float = WATCH_POLL_INTERVAL, skip: Skip = _never):
+    """inotify where available, polling otherwise (or when asked for)."""
+    if not polling:
+        try:
+            return InotifyWatcher(root, skip=skip)
+        except (OSError, AttributeError, TypeError) as e:
+            logger.warning(f"inotify unavailable, falling back to polling: {e}")
+    return PollingWatcher(root, interval=poll_interval, skip=skip)
+
+
+def _merge(previous: str | None, kind: str) -> str:
+    # A file created and then written in the same window is still new
+    if previous == CREATED and kind == MODIFIED:
+        return CREATED
+    return kind
+
+
+async def batched(
+    changes: AsyncIterator[Change],
+    debounce: float = WATCH_DEBOUNCE,
+    max_batch: int = WATCH_MAX_BATCH,
+) -> AsyncIterator[dict[Path, str]]:
+    """
+    Group changes into batches of path -> latest kind.
+
+    A batch is released once no new change has arrived for ``debounce``
+    seconds, or as soon as it holds ``max_batch`` paths. Repeated events for
+    one path collapse into a single entry.
+    """
+    queue: asyncio.Queue[Change] = asyncio.Queue()
+
+    async def pump():
+        async for change in changes:
+            await queue.put(change)
+
+    pump_task = asyncio.create_task(pump())
+    try:
+        while True:
+            kind, path = await queue.get()
+            batch = {path: kind}
+            while len(batch) < max_batch:
+                try:
+                    kind, path = await asyncio.wait_for(queue.get(), timeout=debounce)
+                except asyncio.TimeoutError:
+                    break
+                batch[path] = _merge(batch.get(path), kind)
+            yield batch
+    finally:
+        pump_task.cancel()
+
+
+async def apply_batch(
+    batch: dict[Path, str],
+    data_dir: Path,
+    wait: bool = False,
+    split_strategy: str = "PARAGRAPH",
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+    include=DEFAULT_INCLUDE,
+    exclude=DEFAULT_EXCLUDE,
+    type_options: dict[str, dict] | None = None,
+) -> None:
+    """
+    Upsert files that exist and delete the resources of files that are gone.
+
+    A deleted path with manifest entries under it is a directory that was
+    removed or moved away, so all of those entries are deleted. A RESCAN
+    change diffs the whole folder instead, as on startup.
+    """
+    if RESCAN in batch.values():
+        await scan_folder(data_dir, wait, split_strategy, manifest_path, include, exclude, type_options)
+        return
+
+    root = data_dir.resolve()
+    skip = skip_paths(data_dir, exclude, manifest_path)
+    upserts, gone = [], []
+    for path, kind in sorted(batch.items()):
+        # Filter before anything opens the manifest, whose writes are changes too
+        if skip(path):
+            continue
+        relative = path.relative_to(root).as_posix()
+        if path.exists():
+            if is_included(relative, include, exclude):
+                upserts.append(path)
+        elif kind == DELETED:
+            gone.append((path, relative))
+
+    deletes = []
+    if gone:
+        with Manifest(manifest_file(data_dir, manifest_path)) as manifest:
+            known = manifest.entries()
+        for path, relative in gone:
+            under = [root / key for key in known if key.startswith(relative + "/")]
+            if under:
+                deletes.extend(under)
+            elif relative in known or is_included(relative, include, exclude):
+                deletes.append(path)
+
+    if upserts:
+        await ingest_files(
+            upserts,
+            data_dir,
+            wait=wait,
+            split_strategy=split_strategy,
+            manifest_path=manifest_path,
+            type_options=type_options,
+        )
+    if deletes:
+        await delete_files(deletes, data_dir, manifest_path=manifest_path)
+
+
+async def scan_folder(
+    data_dir: Path,
+    wait: bool = False,
+    split_strategy: str = "PARAGRAPH",
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+    include=DEFAULT_INCLUDE,
+    exclude=DEFAULT_EXCLUDE,
+    type_options: dict[str, dict] | None = None,
+) -> None:
+    """
+    Diff the whole folder against the manifest: ingest new and changed
+    files and delete the resources of files that no longer exist.
+    """
+    files = await asyncio.to_thread(discover_files, data_dir, include, exclude)
+    if files:
+        await ingest_files(
+            files,
+            data_dir,
+            wait=wait,
+            split_strategy=split_strategy,
+            manifest_path=manifest_path,
+            type_options=type_options,
+        )
+    with Manifest(manifest_file(data_dir, manifest_path)) as manifest:
+        orphans = find_orphans(data_dir.resolve(), manifest.entries())
+    if orphans:
+        await delete_files([data_dir.resolve() / key for key in orphans], data_dir, manifest_path=manifest_path)
+
+
+async def watch_folder(
+    data_dir: Path,
+    wait: bool = False,
+    split_strategy: str = "PARAGRAPH",
+    debounce: float = WATCH_DEBOUNCE,
+    max_batch: int = WATCH_MAX_BATCH,
+    polling: bool = False,
+    poll_interval: float = WATCH_POLL_INTERVAL,
+    initial_scan: bool = True,
+    manifest_path: Path | None = INGEST_MANIFEST_PATH,
+    include=DEFAULT_INCLUDE,
+    exclude=DEFAULT_EXCLUDE,
+    type_options: dict[str, dict] | None = None,
+) -> None:
+    """
+    Ingest changes to ``data_dir`` as they happen, until cancelled.
+
+    With ``initial_scan`` the folder is first diffed against the manifest
+    (see scan_folder) so files added, changed or deleted while nothing was
+    watching are not missed.
+    """
+    if not data_dir.exists():
+        raise FileNotFoundError(f"Data directory not found: {data_dir}")
+
+    options = dict(wait=wait, split_strategy=split_strategy, manifest_path=manifest_path, type_options=type_options)
+    skip = skip_paths(data_dir, exclude, manifest_path)
+    watcher = create_watcher(data_dir, polling=polling, poll_interval=poll_interval, skip=skip)
+    print(f"Watching {data_dir} ({type(watcher).__name__})")
+    try:
+        if initial_scan:
+            await scan_folder(data_dir, include=include, exclude=exclude, **options)
+
+        async for batch in batched(watcher.changes(), debounce=debounce, max_batch=max_batch):
+            try:
+                await apply_batch(batch, data_dir, include=include, exclude=exclude, **options)
+            except Exception as e:
+                # Keep watching; the manifest lets the next batch or scan retry
+                logger.error(f"Failed to apply batch of {len(batch)} changes: {e}")
+    finally:
+        watcher.close()